@@ -467,6 +467,7 @@ def generate_config() -> None:
     中文: 根据输入生成并保存配置文件(JSON格式)
     """
     global config
+    old_config = config
     config = {
         "broker": website_entry.get(),
         "secret_id": secret_entry.get(),
@@ -500,6 +501,13 @@ def generate_config() -> None:
             config[f"{prefix}_value"] = theme["value"]
             serve_index += 1
 
+    # 保留界面未管理的高级配置项（如调度器参数），只能手动编辑config.json
+    builtin_keys = tuple(theme["key"] for theme in builtin_themes)
+    for key, value in old_config.items():
+        if key in config or key.startswith(("application", "serve") + builtin_keys):
+            continue
+        config[key] = value
+
     # 保存为 JSON 文件
     with open(config_file_path, "w", encoding="utf-8") as f:
         json.dump(config, f, ensure_ascii=False, indent=4)
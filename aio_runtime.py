@@ -0,0 +1,312 @@
+"""
+asyncio 运行模式：用一个事件循环驱动 paho 的套接字，替代 threaded 模式中运行 ReconnectManager.run_network_loop() 的网络线程。
+
+- 套接字读写通过 add_reader/add_writer 挂到事件循环上，没有单独的网络线程
+- 每个主题一个协程通道，同一主题按顺序执行，不同主题并发执行
+- 命令处理函数（handlers.CommandHandlers）都是同步的阻塞调用（WMI、COM、子进程等），仍在执行器线程中运行：
+  线程在第一次需要时创建，最多 dispatcher_workers 个，创建后一直保留到关闭（ThreadPoolExecutor 不回收空闲线程），
+  所以与 threaded 模式相比省掉的只是网络线程和空闲时的调度线程，不是命令线程
+- stop() 按固定顺序关闭：停止接收 -> 等待进行中的命令 -> 断开 MQTT -> 停止循环
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import paho.mqtt.client as mqtt
+
+from reconnect import ReconnectManager
+from dispatcher import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEW,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_POLICIES,
+    DispatcherStats,
+)
+
+
+class AsyncioRuntime:
+    """
+    English: Drives a paho client from a single asyncio event loop
+    中文: 在单个 asyncio 事件循环中驱动 paho 客户端
+
+    参数:
+    - client: paho 客户端，需在 connect() 之前创建本对象
+    - reconnect: ReconnectManager 实例，决定断线后的重连节奏
+    """
+
+    def __init__(self, client, reconnect: ReconnectManager = None):
+        self.client = client
+        self.loop = asyncio.new_event_loop()
+        self.reconnect = reconnect or ReconnectManager(client)
+        # 网络恢复或系统唤醒时跳过退避等待
+        self.reconnect.on_kick = lambda: self.call_soon(self._reconnect_now)
+        self.reconnect.call = self.call_soon
+        self.thread_id = None
+        self._reconnect_handle = None
+        self._misc_task = None
+        self._stopping = False
+        self._shutdown_hooks = []
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def add_shutdown_hook(self, hook) -> None:
+        """
+        English: Registers a coroutine function awaited during shutdown, before disconnecting
+        中文: 注册关闭时（断开连接之前）等待执行的协程函数
+        """
+        self._shutdown_hooks.append(hook)
+
+    def in_loop_thread(self) -> bool:
+        return threading.get_ident() == self.thread_id
+
+    def call_soon(self, callback, *args) -> None:
+        """
+        English: Schedules callback on the loop from any thread
+        中文: 从任意线程把回调安排到事件循环中执行
+        """
+        if self.in_loop_thread():
+            self.loop.call_soon(callback, *args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def run(self, connected: bool = True) -> None:
+        """
+        English: Runs the event loop in the current thread until stop() is called
+        中文: 在当前线程运行事件循环，直到调用 stop()；connected 为 False 时先按退避策略重连
+        """
+        self.thread_id = threading.get_ident()
+        asyncio.set_event_loop(self.loop)
+        if not connected:
+            self.reconnect.on_disconnected()
+            self._schedule_reconnect()
+        logging.info("asyncio 运行模式已启动")
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+            logging.info("asyncio 事件循环已关闭")
+
+    def stop(self) -> None:
+        """
+        English: Requests a deterministic shutdown; safe to call from any thread
+        中文: 请求按顺序关闭，可从任意线程调用
+        """
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self._shutdown()))
+
+    async def _shutdown(self) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        self.reconnect.stop()
+        if self._reconnect_handle:
+            self._reconnect_handle.cancel()
+        logging.info("asyncio 运行模式正在关闭...")
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logging.error(f"关闭时执行清理出错: {e}")
+        try:
+            self.client.disconnect()
+        except Exception as e:
+            logging.error(f"断开MQTT连接时出错: {e}")
+        if self._misc_task and not self._misc_task.done():
+            self._misc_task.cancel()
+            await asyncio.gather(self._misc_task, return_exceptions=True)
+        self.loop.stop()
+
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        self.loop.add_reader(sock, client.loop_read)
+        if self._misc_task is None or self._misc_task.done():
+            self._misc_task = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        self.loop.remove_reader(sock)
+        self.loop.remove_writer(sock)
+        if not self._stopping:
+            self.reconnect.on_disconnected()
+            logging.warning("MQTT连接已断开")
+            self._schedule_reconnect()
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        self.loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        self.loop.remove_writer(sock)
+
+    def _schedule_reconnect(self) -> None:
+        delay = self.reconnect.next_delay()
+        if delay > 0 and not self.reconnect.paused:
+            logging.info(f"{delay:.1f}秒后重连（第 {self.reconnect.backoff.attempt} 次）")
+        self._reconnect_handle = self.loop.call_later(delay, self._reconnect)
+
+    def _reconnect_now(self) -> None:
+        # 只有在等待重连时才提前执行
+        if self._reconnect_handle is not None:
+            self._reconnect_handle.cancel()
+            self._reconnect()
+
+    def _reconnect(self) -> None:
+        self._reconnect_handle = None
+        if self._stopping:
+            return
+        try:
+            self.client.reconnect()
+        except OSError as e:
+            logging.error(f"重连失败: {e}")
+            self._schedule_reconnect()
+
+    async def _misc_loop(self) -> None:
+        # 处理心跳、重发等定时任务
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                return
+
+
+class AsyncDispatcher:
+    """
+    English: asyncio counterpart of CommandDispatcher with per-topic coroutine lanes
+    中文: CommandDispatcher 的 asyncio 版本，每个主题一个协程通道
+
+    接口与 CommandDispatcher 一致（submit/snapshot/stop），on_message 和滑块合并无需区分运行模式。
+    """
+
+    DEFAULT_LANE = "__default__"
+
+    def __init__(self, runtime: AsyncioRuntime, handler, workers: int = 4, max_queue: int = 100,
+                 overflow: str = OVERFLOW_DROP_OLDEST, lanes=None, on_complete=None, on_drop=None):
+        if overflow not in OVERFLOW_POLICIES:
+            logging.warning(f"未知的队列溢出策略: {overflow}，使用 {OVERFLOW_DROP_OLDEST}")
+            overflow = OVERFLOW_DROP_OLDEST
+        if overflow == OVERFLOW_BLOCK:
+            # 事件循环中不能阻塞等待
+            logging.warning(f"asyncio 模式不支持 {OVERFLOW_BLOCK} 策略，使用 {OVERFLOW_DROP_OLDEST}")
+            overflow = OVERFLOW_DROP_OLDEST
+        self.runtime = runtime
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.overflow = overflow
+        self.on_complete = on_complete
+        self.on_drop = on_drop
+        self.stats = DispatcherStats()
+        self._lanes = {key: deque() for key in (lanes or []) if key}
+        self._lanes[self.DEFAULT_LANE] = deque()
+        self._tasks = {}
+        self._depth = 0
+        self._executor = None
+        self._accepting = False
+        runtime.add_shutdown_hook(self._drain)
+
+    def start(self) -> None:
+        # 执行器线程在提交命令时才创建，最多 workers 个；创建后不会因为空闲而退出，一直保留到关闭
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="RC-aio-worker")
+        self._accepting = True
+        logging.info(
+            f"命令调度器已启动(asyncio): 执行器线程上限={self.workers}, 队列长度={self.max_queue}, "
+            f"溢出策略={self.overflow}, 主题通道数={len(self._lanes) - 1}"
+        )
+
+    def stop(self, timeout: float = 2.0) -> None:
+        # 关闭流程由 runtime.stop() 统一驱动
+        self.runtime.stop()
+
+    def submit(self, command: str, topic: str, context=None) -> bool:
+        """
+        English: Enqueues a command from any thread
+        中文: 提交命令，可从任意线程调用
+        """
+        if not self._accepting:
+            return False
+        item = (command, topic, time.monotonic(), context)
+        if self.runtime.in_loop_thread():
+            # on_message 本身就在事件循环中执行，直接入队
+            self._enqueue(item)
+        else:
+            self.runtime.call_soon(self._enqueue, item)
+        return True
+
+    def snapshot(self) -> dict:
+        return self.stats.snapshot(self._depth)
+
+    def _enqueue(self, item) -> None:
+        command, topic = item[0], item[1]
+        key = topic if topic in self._lanes else self.DEFAULT_LANE
+        lane = self._lanes[key]
+        self.stats.submitted += 1
+        if self._depth >= self.max_queue:
+            self.stats.dropped += 1
+            if self.overflow == OVERFLOW_DROP_NEW:
+                logging.warning(f"命令队列已满，丢弃新命令: {command} 主题: {topic}")
+                self._notify_drop(item)
+                return
+            victim = lane if lane else max(self._lanes.values(), key=len)
+            dropped = victim.popleft()
+            self._depth -= 1
+            logging.warning(f"命令队列已满，丢弃最早的命令: {dropped[0]} 主题: {dropped[1]}")
+            self._notify_drop(dropped)
+        lane.append(item)
+        self._depth += 1
+        if self._depth > self.stats.max_depth:
+            self.stats.max_depth = self._depth
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = self.runtime.loop.create_task(self._run_lane(key, lane))
+
+    def _notify_drop(self, item) -> None:
+        if self.on_drop:
+            self.on_drop(item[3])
+
+    async def _run_lane(self, key, lane) -> None:
+        loop = self.runtime.loop
+        while lane:
+            command, topic, enqueued, context = lane.popleft()
+            self._depth -= 1
+            started = time.monotonic()
+            failed = False
+            try:
+                await loop.run_in_executor(self._executor, self.handler, command, topic)
+            except Exception as e:
+                failed = True
+                logging.error(f"执行命令出错: {command} 主题: {topic}, 错误: {e}")
+            finished = time.monotonic()
+            wait = started - enqueued
+            cost = finished - started
+            stats = self.stats
+            stats.executed += 1
+            if failed:
+                stats.failed += 1
+            stats.wait_total += wait
+            stats.exec_total += cost
+            stats.wait_max = max(stats.wait_max, wait)
+            stats.exec_max = max(stats.exec_max, cost)
+            logging.info(f"命令完成: {command} 主题: {topic}, 排队 {wait * 1000:.1f}ms, 执行 {cost * 1000:.1f}ms")
+            if self.on_complete:
+                self.on_complete(context, finished - enqueued, failed)
+
+    async def _drain(self, timeout: float = 2.0) -> None:
+        # 停止接收新命令，丢弃排队中的命令，等待正在执行的命令结束
+        self._accepting = False
+        for lane in self._lanes.values():
+            while lane:
+                self.stats.dropped += 1
+                self._notify_drop(lane.popleft())
+        self._depth = 0
+        running = [task for task in self._tasks.values() if not task.done()]
+        if running:
+            done, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        logging.info(f"命令调度器已停止: {self.snapshot()}")
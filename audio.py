@@ -0,0 +1,275 @@
+"""
+音量后端。Windows 上（PycawVolume）缓存默认播放设备的 IAudioEndpointVolume 接口，每次设置音量只需一次方法调用；
+Linux 上（PulseVolume）控制 PulseAudio/PipeWire 的默认输出设备。
+
+- COM 接口只能在创建它的线程（套间）中使用，所以每个工作线程各自初始化 COM 并缓存一份接口
+- 默认播放设备切换或设备状态变化时（IMMNotificationClient 通知）使所有线程的缓存失效
+- 调用失败时重新获取接口并重试一次
+- 记录当前音量（包括用户在系统中手动调整的音量），读取当前值不需要任何 COM 调用
+"""
+
+import ctypes
+import logging
+import re
+import subprocess
+import sys
+import threading
+
+
+def _default_com_init():
+    import comtypes
+
+    comtypes.CoInitialize()
+
+
+def _default_activate():
+    from comtypes import CLSCTX_ALL
+    from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+    devices = AudioUtilities.GetSpeakers()
+    interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+    return ctypes.cast(interface, ctypes.POINTER(IAudioEndpointVolume))
+
+
+class PycawVolume:
+    """
+    English: Volume backend with per-thread cached endpoint interfaces and device-change invalidation
+    中文: 按线程缓存音频端点接口、默认设备变化时自动失效的音量后端
+
+    参数:
+    - activate: 返回默认播放设备 IAudioEndpointVolume 接口的函数
+    - com_init: 在新线程中初始化 COM 的函数
+    """
+
+    def __init__(self, activate=None, com_init=None):
+        self.activate = activate or _default_activate
+        self.com_init = com_init or _default_com_init
+        self.rebinds = 0
+        self._level = None
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 保持通知对象的引用，否则 COM 回调对象会被回收
+        self._device_client = None
+        self._enumerator = None
+        self._volume_callback_class = None
+        self._volume_callbacks = []
+        self._watched_generation = None
+
+    def invalidate(self, reason: str = "") -> None:
+        """
+        English: Drops the cached interface of every thread and the cached level
+        中文: 使所有线程缓存的接口和记录的音量失效
+        """
+        if reason:
+            logging.info(f"音频设备变化（{reason}），重新获取音量接口")
+        with self._lock:
+            self._generation += 1
+            self._level = None
+
+    def _endpoint(self):
+        local = self._local
+        if not getattr(local, "com_ready", False):
+            # COM 接口与线程套间绑定，每个线程使用前都要初始化一次
+            self.com_init()
+            local.com_ready = True
+        if getattr(local, "generation", None) != self._generation or getattr(local, "endpoint", None) is None:
+            generation = self._generation
+            local.endpoint = self.activate()
+            local.generation = generation
+            with self._lock:
+                self.rebinds += 1
+                self._watch_volume(local.endpoint, generation)
+        return local.endpoint
+
+    def _call(self, action):
+        try:
+            return action(self._endpoint())
+        except Exception as e:
+            logging.warning(f"音量接口失效，重新获取: {e}")
+            self._local.endpoint = None
+            return action(self._endpoint())
+
+    def set(self, value: int) -> None:
+        """
+        English: Sets the master volume (0-100)
+        中文: 设置主音量（0-100）
+        """
+        self._call(lambda endpoint: endpoint.SetMasterVolumeLevelScalar(value / 100, None))
+        self._level = value
+
+    @property
+    def level(self):
+        """
+        English: The tracked master volume, or None when it may be stale
+        中文: 记录的当前音量；未注册到当前设备的音量通知时可能已过期，返回 None
+        """
+        if self._watched_generation != self._generation:
+            return None
+        return self._level
+
+    def get(self) -> int:
+        """
+        English: Returns the current master volume (0-100), from the cache when known
+        中文: 返回当前主音量（0-100），已知时直接返回记录的值
+        """
+        level = self.level
+        if level is None:
+            level = round(self._call(lambda endpoint: endpoint.GetMasterVolumeLevelScalar()) * 100)
+            self._level = level
+        return level
+
+    def watch(self) -> bool:
+        """
+        English: Registers device-change and volume-change notifications; returns False if unavailable
+        中文: 注册设备变化和音量变化通知，不可用时返回 False（此时只在调用失败时重新获取接口）
+        """
+        try:
+            from pycaw.callbacks import AudioEndpointVolumeCallback, MMNotificationClient
+            from pycaw.pycaw import AudioUtilities
+        except ImportError as e:
+            logging.warning(f"无法注册音频设备通知: {e}")
+            return False
+
+        backend = self
+
+        class DeviceClient(MMNotificationClient):
+            def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                backend.invalidate("默认设备切换")
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                backend.invalidate("设备状态变化")
+
+        class VolumeCallback(AudioEndpointVolumeCallback):
+            def __init__(self, generation):
+                super().__init__()
+                self.generation = generation
+
+            def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+                # 用户在系统中手动调整音量时同步记录的值，已切换走的旧设备的通知忽略
+                if self.generation == backend._generation:
+                    backend._level = round(new_volume * 100)
+
+        try:
+            self.com_init()
+            self._enumerator = AudioUtilities.GetDeviceEnumerator()
+            self._device_client = DeviceClient()
+            self._enumerator.RegisterEndpointNotificationCallback(self._device_client)
+        except Exception as e:
+            logging.warning(f"注册音频设备通知失败: {e}")
+            return False
+        self._volume_callback_class = VolumeCallback
+        logging.info("已注册音频设备变化通知")
+        return True
+
+    def _watch_volume(self, endpoint, generation: int) -> None:
+        # 在新获取的接口上注册音量变化通知，每次设备切换只注册一次
+        if self._volume_callback_class is None or self._watched_generation == generation:
+            return
+        try:
+            callback = self._volume_callback_class(generation)
+            endpoint.RegisterControlChangeNotify(callback)
+        except Exception as e:
+            logging.warning(f"注册音量变化通知失败: {e}")
+            return
+        self._watched_generation = generation
+        self._volume_callbacks.append((endpoint, callback))
+        # 只保留最近的几个，旧设备的回调对象在其生成号过期后不再起作用
+        del self._volume_callbacks[:-4]
+
+
+class PulseVolume:
+    """
+    English: Linux volume backend for the default PulseAudio/PipeWire sink
+    中文: Linux 音量后端，控制 PulseAudio/PipeWire 的默认输出设备
+
+    安装了可选依赖 pulsectl 时在进程内保持一个连接，否则每次调用 pactl 命令。
+    接口与 PycawVolume 一致（set/get/level/watch/invalidate）。
+    """
+
+    def __init__(self):
+        self.rebinds = 0
+        self._pulse = None
+        self._use_pactl = False
+        self._lock = threading.Lock()
+
+    @property
+    def level(self):
+        # 没有音量变化通知，外部可能已修改，不使用缓存值做跳过判断
+        return None
+
+    def invalidate(self, reason: str = "") -> None:
+        with self._lock:
+            self._close()
+
+    def watch(self) -> bool:
+        return False
+
+    def _close(self) -> None:
+        if self._pulse is not None:
+            try:
+                self._pulse.close()
+            except Exception:
+                pass
+            self._pulse = None
+
+    def _client(self):
+        # 调用方持有 self._lock
+        if self._pulse is None and not self._use_pactl:
+            try:
+                import pulsectl
+            except ImportError:
+                logging.info("未安装 pulsectl，使用 pactl 命令控制音量")
+                self._use_pactl = True
+                return None
+            self._pulse = pulsectl.Pulse("RC-main")
+            self.rebinds += 1
+        return self._pulse
+
+    def _sink(self, pulse):
+        return pulse.get_sink_by_name(pulse.server_info().default_sink_name)
+
+    def set(self, value: int) -> None:
+        """
+        English: Sets the default sink volume (0-100)
+        中文: 设置默认输出设备的音量（0-100）
+        """
+        with self._lock:
+            pulse = self._client()
+            if pulse is None:
+                subprocess.run(["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"{value}%"], check=True)
+            else:
+                try:
+                    pulse.volume_set_all_chans(self._sink(pulse), value / 100)
+                except Exception as e:
+                    logging.warning(f"PulseAudio 连接失效，重新连接: {e}")
+                    self._close()
+                    pulse = self._client()
+                    pulse.volume_set_all_chans(self._sink(pulse), value / 100)
+
+    def get(self) -> int:
+        """
+        English: Returns the default sink volume (0-100)
+        中文: 返回默认输出设备的音量（0-100）
+        """
+        with self._lock:
+            pulse = self._client()
+            if pulse is None:
+                output = subprocess.run(
+                    ["pactl", "get-sink-volume", "@DEFAULT_SINK@"], capture_output=True, text=True, check=True
+                ).stdout
+                match = re.search(r"(\d+)%", output)
+                if match is None:
+                    raise RuntimeError(f"无法解析 pactl 输出: {output}")
+                return int(match.group(1))
+            return round(pulse.volume_get_all_chans(self._sink(pulse)) * 100)
+
+
+def create_volume():
+    """
+    English: Returns the volume backend of the current platform
+    中文: 返回当前平台的音量后端
+    """
+    if sys.platform == "win32":
+        return PycawVolume()
+    return PulseVolume()
@@ -0,0 +1,99 @@
+"""
+亮度设置基准：对比原先每次调用都新建 WMI 连接的写法与 WmiBrightness 缓存连接后的单次耗时。
+
+在 Windows 上直接调用真实的 WMI（会实际改变屏幕亮度，结束后恢复原亮度）；
+其他平台没有 WMI，用模拟连接代替，连接与枚举耗时取 Windows 上的典型量级。
+
+用法（在项目根目录下）:
+    python bench/bench_brightness.py [调用次数]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brightness import WmiBrightness  # noqa: E402
+from reconnect import percentile  # noqa: E402
+
+# 模拟模式下的耗时（秒）
+SIMULATED_CONNECT = 0.15
+SIMULATED_ENUMERATE = 0.05
+SIMULATED_SET = 0.003
+
+
+class _SimulatedMethods:
+    def WmiSetBrightness(self, value, timeout):
+        time.sleep(SIMULATED_SET)
+
+
+class _SimulatedConnection:
+    def __init__(self):
+        time.sleep(SIMULATED_CONNECT)
+
+    def WmiMonitorBrightnessMethods(self):
+        time.sleep(SIMULATED_ENUMERATE)
+        return [_SimulatedMethods()]
+
+
+def make_connect():
+    try:
+        import wmi
+    except ImportError:
+        return _SimulatedConnection, True
+    return (lambda: wmi.WMI(namespace="wmi")), False
+
+
+def run_in_worker(func, calls: int) -> list:
+    # 与调度器一样在工作线程中执行，每个线程先初始化 COM
+    timings = []
+
+    def work():
+        try:
+            import pythoncom
+
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        for index in range(calls):
+            started = time.perf_counter()
+            func(40 + index % 20)
+            timings.append(time.perf_counter() - started)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    print(
+        f"{name:<14} p50={percentile(timings, 0.5) * 1000:8.2f}ms "
+        f"p99={percentile(timings, 0.99) * 1000:8.2f}ms 总计={sum(timings) * 1000:9.1f}ms"
+    )
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    connect, simulated = make_connect()
+    if simulated:
+        print("未找到 wmi 模块，使用模拟连接")
+    backend = WmiBrightness(connect=connect)
+    original = None if simulated else backend.get()
+
+    def per_call(value):
+        connect().WmiMonitorBrightnessMethods()[0].WmiSetBrightness(value, 0)
+
+    try:
+        report("每次新建连接", run_in_worker(per_call, calls))
+        report("WmiBrightness", run_in_worker(backend.set, calls))
+    finally:
+        if original is not None:
+            backend.set(original)
+    print(f"WmiBrightness 重建连接次数: {backend.rebuilds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+进程发现基准：对比遍历进程表（读取每个进程的名称和命令行）、共享进程快照（只读取 Python 进程的命令行，
+分别测量每次刷新和 TTL 内复用）与读取身份记录后一次 psutil.Process(pid) 校验的查找耗时。
+
+可用 --spawn 先启动若干个空闲子进程，模拟进程数量很多的主机，结束时全部清理。
+
+用法（在项目根目录下）:
+    python bench/bench_discovery.py [--spawn 2000] [--lookups 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discovery  # noqa: E402
+import procsnap  # noqa: E402
+from reconnect import percentile  # noqa: E402
+
+MARKER = "rc_bench_discovery_main.py"
+
+
+def spawn_idle(count: int) -> list:
+    # 什么都不做的子进程，只用来增加进程表的大小，结束时统一 kill
+    command = ["sleep", "600"] if sys.platform != "win32" else [sys.executable, "-c", "input()"]
+    processes = []
+    for _ in range(count):
+        processes.append(subprocess.Popen(command, stdin=subprocess.PIPE))
+    return processes
+
+
+def scan(marker: str):
+    # 改用进程快照之前 get_main_proc 的脚本模式：检查每个进程的名称和命令行
+    for proc in psutil.process_iter(["pid", "name", "cmdline", "username"]):
+        try:
+            cmdline = " ".join(proc.info["cmdline"] or ())
+            if marker in cmdline:
+                return proc
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            continue
+    return None
+
+
+def snapshot_find(snapshot, marker: str, fresh: bool):
+    if fresh:
+        snapshot.invalidate()
+    entries = snapshot.by_script(marker)
+    return entries[0] if entries else None
+
+
+def measure(func, lookups: int) -> list:
+    timings = []
+    for _ in range(lookups):
+        started = time.perf_counter()
+        found = func()
+        timings.append(time.perf_counter() - started)
+        if found is None:
+            raise RuntimeError("没有找到目标进程")
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    print(
+        f"{name:<10} p50={percentile(timings, 0.5) * 1000:9.3f}ms "
+        f"p99={percentile(timings, 0.99) * 1000:9.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程发现耗时基准")
+    parser.add_argument("--spawn", type=int, default=0, help="额外启动的空闲子进程数量")
+    parser.add_argument("--lookups", type=int, default=20, help="每种方式的查找次数")
+    args = parser.parse_args()
+
+    idle = spawn_idle(args.spawn)
+    target = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()", MARKER], stdin=subprocess.PIPE)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            discovery.announce(directory, "RC-main", psutil.Process(target.pid))
+            print(f"当前进程数: {len(psutil.pids())}")
+            report("遍历进程表", measure(lambda: scan(MARKER), args.lookups))
+            snapshot = procsnap.ProcessSnapshot(ttl=60)
+            report("快照刷新", measure(lambda: snapshot_find(snapshot, MARKER, True), args.lookups))
+            report("快照复用", measure(lambda: snapshot_find(snapshot, MARKER, False), args.lookups))
+            report("进程记录", measure(lambda: discovery.lookup(directory, "RC-main"), args.lookups))
+    finally:
+        for process in idle + [target]:
+            process.kill()
+        for process in idle + [target]:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+端到端延迟基准：在进程内启动 MQTT 替身服务器，按 main.py 的方式组装客户端、路由表、
+滑块合并、命令调度器和消息记录，消息经过与 main.py 相同的 handlers.MessagePipeline 和
+handlers.CommandHandlers，只把亮度/音量/进程/服务/系统后端换成假后端，测量：
+
+- 从服务器发布消息到命令执行完成的延迟 p50/p99
+- 拖动滑块时合并后的执行次数与最终值的延迟
+- 不丢命令且 p99 不超限时可持续的最大消息速率
+
+不依赖 Windows 组件，可在 Linux 上无界面运行，用于部署前发现性能退化。
+指定 --max-p99 时，若常规速率下的 p99 超过该值则以退出码 1 结束。
+
+用法（在项目根目录下）:
+    python bench/bench_e2e.py [--runtime threaded|asyncio] [--rate 200] [--duration 3]
+                              [--cost-scale 1.0] [--max-p99 毫秒]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paho.mqtt.client as mqtt  # noqa: E402
+
+from bench.fake_broker import FakeBroker  # noqa: E402
+from coalescer import SliderCoalescer  # noqa: E402
+from dispatcher import CommandDispatcher  # noqa: E402
+from handlers import CommandHandlers, MessagePipeline  # noqa: E402
+from history import MessageHistory  # noqa: E402
+from ramp import RampEngine  # noqa: E402
+from reconnect import ReconnectManager, percentile  # noqa: E402
+from routing import build_routes  # noqa: E402
+from scheduler import TimerScheduler  # noqa: E402
+from services import ServiceResult  # noqa: E402
+from subscriptions import SubscriptionTracker  # noqa: E402
+
+BUILTINS = {"Computer": "computer001", "screen": "screen002", "volume": "volume003", "sleep": "sleep004", "media": "media005"}
+APP_TOPICS = 10
+SERVE_TOPICS = 10
+
+# 假后端每次调用的模拟耗时（秒），大致对应 WMI、pycaw、进程扫描、服务控制的量级
+FAKE_COSTS = {
+    "application": 0.002,
+    "service": 0.005,
+    "Computer": 0.001,
+    "screen": 0.02,
+    "volume": 0.002,
+    "sleep": 0.0,
+    "media": 0.001,
+}
+
+# 最大速率搜索的各档速率（条/秒）和每档持续时间（秒）
+RATE_STEPS = (250, 500, 1000, 2000, 4000, 8000)
+RATE_STEP_DURATION = 1.0
+
+
+def _cost(kind: str, scale: float) -> None:
+    cost = FAKE_COSTS.get(kind, 0.0) * scale
+    if cost > 0:
+        time.sleep(cost)
+
+
+class FakeLevel:
+    """假的亮度/音量后端：set/get 与 create_brightness()/create_volume() 返回的对象相同"""
+
+    def __init__(self, kind: str, scale: float):
+        self.kind = kind
+        self.scale = scale
+        self.level = None
+
+    def set(self, value: int) -> None:
+        _cost(self.kind, self.scale)
+        self.level = value
+
+    def get(self) -> int:
+        return self.level if self.level is not None else 0
+
+
+class FakeSystem:
+    """假的系统操作后端：锁屏/重启/睡眠只消耗模拟耗时，返回 None 表示已在进程内完成"""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+
+    def lock(self):
+        _cost("Computer", self.scale)
+
+    def reboot(self, delay: int = 0):
+        _cost("Computer", self.scale)
+
+    def suspend(self):
+        _cost("sleep", self.scale)
+
+
+class FakeProcesses:
+    """假的进程记录：launch/terminate 与 ProcessRegistry 相同，不启动真实进程"""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.running = set()
+
+    def launch(self, topic: str, args, **kwargs):
+        _cost("application", self.scale)
+        self.running.add(topic)
+        return SimpleNamespace(pid=0)
+
+    def terminate(self, topic: str) -> int:
+        _cost("application", self.scale)
+        if topic in self.running:
+            self.running.discard(topic)
+            return 1
+        return 0
+
+    def is_on(self, topic: str) -> bool:
+        return topic in self.running
+
+
+class FakeServices:
+    """假的服务控制后端：start/stop 与 create_service_manager() 返回的对象相同"""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.running = set()
+
+    def start(self, name: str, timeout: float = 30) -> ServiceResult:
+        _cost("service", self.scale)
+        changed = name not in self.running
+        self.running.add(name)
+        return ServiceResult(True, "running", changed)
+
+    def stop(self, name: str, timeout: float = 30) -> ServiceResult:
+        _cost("service", self.scale)
+        changed = name in self.running
+        self.running.discard(name)
+        return ServiceResult(True, "stopped", changed)
+
+
+class FakeMedia:
+    name = "fake"
+
+    def __init__(self, scale: float):
+        self.scale = scale
+
+    def press(self, key: str) -> None:
+        _cost("media", self.scale)
+
+
+class TimedHistory(MessageHistory):
+    """消息记录：记录每条消息时取出它在服务器上的发布时刻，供计算端到端延迟"""
+
+    def __init__(self, size: int, published: dict):
+        super().__init__(size)
+        self.published = published
+        self.sent = {}
+
+    def record(self, topic: str, payload: str):
+        entry = super().record(topic, payload)
+        self.sent[entry] = self.published[topic].popleft()
+        return entry
+
+
+class Harness:
+    """
+    English: main.py's message pipeline and handlers wired to a fake broker and fake backends
+    中文: 按 main.py 组装的消息处理链路和处理函数，连接替身服务器并使用假后端
+
+    参数:
+    - runtime_mode: threaded 或 asyncio
+    - cost_scale: 假后端耗时的倍数，为 0 时只测量框架本身的开销
+    - window: 滑块合并窗口（秒）
+    - routes: 路由表，默认生成 APP_TOPICS 个程序主题、SERVE_TOPICS 个服务主题和全部内置主题
+    """
+
+    def __init__(self, runtime_mode: str = "threaded", cost_scale: float = 1.0, window: float = 0.15,
+                 routes: dict = None):
+        self.runtime_mode = runtime_mode
+        self.cost_scale = cost_scale
+        self.broker = FakeBroker().start()
+        # 程序主题指向临时目录中的空文件，on 命令会走到与实际相同的启动路径
+        self._directory = tempfile.mkdtemp(prefix="rc-bench-")
+        if routes is None:
+            applications = []
+            for i in range(APP_TOPICS):
+                path = os.path.join(self._directory, f"app{i}.exe")
+                open(path, "wb").close()
+                applications.append((f"app{i}006", path))
+            serves = [(f"serve{i}006", f"fake-service{i}") for i in range(SERVE_TOPICS)]
+            routes = build_routes(applications, serves, BUILTINS)
+        self.routes = routes
+        self.latencies = []
+        self.topic_latencies = defaultdict(list)
+        self.executed = []
+        self.completed = 0
+        self.dropped = 0
+        self.merged = 0
+        self._published = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.history = TimedHistory(1000, self._published)
+        self.timer = TimerScheduler("bench-timer")
+
+        self.client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
+        self.client.on_connect = self._on_connect
+        self.client.on_subscribe = self._on_subscribe
+        self.reconnect = ReconnectManager(self.client)
+        self.pipeline = MessagePipeline(self.history, self.reconnect)
+        self.client.on_message = self.pipeline.on_message
+        self.handlers = CommandHandlers(
+            self.routes,
+            FakeSystem(cost_scale),
+            FakeLevel("screen", cost_scale),
+            FakeLevel("volume", cost_scale),
+            FakeProcesses(cost_scale),
+            FakeServices(cost_scale),
+            RampEngine(self.timer),
+            # 睡眠命令不断开与替身服务器的连接
+            SimpleNamespace(pause=lambda reason: None),
+            lambda message: None,
+            media_factory=lambda: FakeMedia(cost_scale),
+        )
+        options = dict(
+            workers=4,
+            max_queue=100,
+            overflow="drop_oldest",
+            lanes=list(self.routes),
+            on_complete=self._on_complete,
+            on_drop=self._on_drop,
+        )
+        if runtime_mode == "asyncio":
+            from aio_runtime import AsyncDispatcher, AsyncioRuntime
+
+            self.runtime = AsyncioRuntime(self.client, self.reconnect)
+            self.dispatcher = AsyncDispatcher(self.runtime, self._process, **options)
+        else:
+            self.runtime = None
+            self.dispatcher = CommandDispatcher(self._process, **options)
+        self.dispatcher.start()
+        self.coalescer = SliderCoalescer(
+            self.dispatcher.submit,
+            [topic for topic, route in self.routes.items() if route.kind in ("screen", "volume")],
+            window=window,
+            on_drop=self._on_merged,
+            scheduler=self.timer,
+        )
+        self.handlers.coalescer = self.coalescer
+        self.pipeline.coalescer = self.coalescer
+        self.pipeline.dispatcher = self.dispatcher
+        self.subscriptions = SubscriptionTracker(on_ready=lambda elapsed: self._ready.set())
+        self._thread = None
+
+    def start(self) -> "Harness":
+        self.client.connect(self.broker.host, self.broker.port)
+        if self.runtime is not None:
+            target, args = self.runtime.run, (True,)
+        else:
+            target, args = self.reconnect.run_network_loop, (True,)
+        self._thread = threading.Thread(target=target, args=args, name="bench-network", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError("订阅超时")
+        return self
+
+    def stop(self) -> None:
+        if self.runtime is not None:
+            self.runtime.stop()
+        else:
+            self.reconnect.stop()
+            self.dispatcher.stop()
+            self.client.disconnect()
+        self._thread.join(5)
+        self.broker.stop()
+        self.timer.stop()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _process(self, command: str, topic: str) -> None:
+        # 记录实际执行顺序，再交给与 main.py 相同的 process_command
+        with self._lock:
+            self.executed.append((topic, command))
+        self.handlers.process_command(command, topic)
+
+    def publish(self, topic: str, payload: str) -> None:
+        # 先记下发布时刻再发布，网络线程收到消息时按主题顺序取出
+        self._published[topic].append(time.monotonic())
+        self.broker.publish(topic, payload)
+
+    def inject(self, topic: str, payload: bytes) -> None:
+        """
+        English: Feeds a message straight into on_message, bypassing the broker
+        中文: 不经过服务器，直接把消息交给 on_message（回放时使用）
+        """
+        self._published[topic].append(time.monotonic())
+        self.pipeline.on_message(self.client, None, SimpleNamespace(topic=topic, payload=payload))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies = []
+            self.topic_latencies = defaultdict(list)
+            self.executed = []
+            self.completed = self.dropped = self.merged = 0
+
+    def settled(self) -> int:
+        with self._lock:
+            return self.completed + self.dropped + self.merged
+
+    def wait_settled(self, total: int, timeout: float = 30.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.settled() < total:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None) -> None:
+        self.subscriptions.subscribe_all(client, list(self.routes))
+        self.reconnect.on_connected()
+
+    def _on_subscribe(self, client, userdata, mid, reason_code_list, properties=None) -> None:
+        self.subscriptions.acknowledge(mid)
+
+    def _on_complete(self, entry, latency: float, failed: bool) -> None:
+        finished = time.monotonic()
+        self.pipeline.on_complete(entry, latency, failed)
+        latency = finished - self.history.sent.pop(entry)
+        with self._lock:
+            self.completed += 1
+            self.latencies.append(latency)
+            self.topic_latencies[entry.topic].append(latency)
+
+    def _on_drop(self, entry) -> None:
+        self.pipeline.on_drop(entry)
+        self.history.sent.pop(entry, None)
+        with self._lock:
+            self.dropped += 1
+
+    def _on_merged(self, entry) -> None:
+        self.pipeline.on_merged(entry)
+        self.history.sent.pop(entry, None)
+        with self._lock:
+            self.merged += 1
+
+
+def paced(harness: Harness, messages, rate: float) -> dict:
+    """
+    English: Publishes (topic, payload) pairs at a fixed rate and waits until every one is settled
+    中文: 按固定速率发布消息，等待全部执行、丢弃或被合并后返回统计
+    """
+    harness.reset()
+    interval = 1.0 / rate
+    started = time.monotonic()
+    for index, (topic, payload) in enumerate(messages):
+        delay = started + index * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        harness.publish(topic, payload)
+    settled = harness.wait_settled(len(messages))
+    elapsed = time.monotonic() - started
+    with harness._lock:
+        latencies = list(harness.latencies)
+        stats = {
+            "published": len(messages),
+            "completed": harness.completed,
+            "dropped": harness.dropped,
+            "merged": harness.merged,
+        }
+    stats.update(
+        settled=settled,
+        elapsed=elapsed,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        max_ms=max(latencies, default=0.0) * 1000,
+    )
+    return stats
+
+
+def mixed_messages(routes, count: int) -> list:
+    # 轮流发送到所有主题，睡眠主题除外（假后端不区分，但保持和实际使用一致）
+    topics = [topic for topic, route in routes.items() if route.kind != "sleep"]
+    return [(topics[i % len(topics)], "on" if (i // len(topics)) % 2 else "off") for i in range(count)]
+
+
+def slider_messages(drags: int, steps: int) -> list:
+    # 模拟拖动滑块：每次拖动从 0 连续发送到目标值
+    messages = []
+    for drag in range(drags):
+        topic = BUILTINS["screen"] if drag % 2 else BUILTINS["volume"]
+        target = 40 + drag % 60
+        messages.extend((topic, f"on#{target * (step + 1) // steps}") for step in range(steps))
+    return messages
+
+
+def report(name: str, stats: dict) -> None:
+    rate = stats["published"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    print(
+        f"{name:<10} 发布={stats['published']:>6} 执行={stats['completed']:>6} "
+        f"合并={stats['merged']:>5} 丢弃={stats['dropped']:>4} "
+        f"p50={stats['p50_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms max={stats['max_ms']:7.2f}ms "
+        f"({rate:.0f} 条/秒)"
+    )
+
+
+def max_sustained_rate(harness: Harness, limit_ms: float) -> float:
+    """
+    English: Steps up the publish rate until commands are dropped or p99 exceeds limit_ms
+    中文: 逐档提高发布速率，直到出现丢弃或 p99 超过 limit_ms，返回最后一档达标的速率
+    """
+    best = 0.0
+    for rate in RATE_STEPS:
+        stats = paced(harness, mixed_messages(harness.routes, int(rate * RATE_STEP_DURATION)), rate)
+        report(f"{rate}/s", stats)
+        if not stats["settled"] or stats["dropped"] or stats["p99_ms"] > limit_ms:
+            break
+        best = rate
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端延迟基准")
+    parser.add_argument("--runtime", choices=("threaded", "asyncio"), default="threaded")
+    parser.add_argument("--rate", type=float, default=200, help="常规速率（条/秒）")
+    parser.add_argument("--duration", type=float, default=3.0, help="常规速率的持续时间（秒）")
+    parser.add_argument("--cost-scale", type=float, default=1.0, help="假后端耗时倍数，0 表示只测框架开销")
+    parser.add_argument("--window", type=float, default=0.15, help="滑块合并窗口（秒）")
+    parser.add_argument("--limit", type=float, default=100.0, help="最大速率搜索时允许的 p99（毫秒）")
+    parser.add_argument("--max-p99", type=float, default=None, help="常规速率下 p99 超过该值（毫秒）时返回 1")
+    args = parser.parse_args()
+
+    # 日志写入空设备：保留 main.py 中逐条记录日志的格式化开销，但不输出
+    handler = logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+    harness = Harness(args.runtime, args.cost_scale, args.window).start()
+    print(f"运行模式={args.runtime} 主题数={len(harness.routes)} 假后端耗时倍数={args.cost_scale}")
+    try:
+        steady = paced(harness, mixed_messages(harness.routes, int(args.rate * args.duration)), args.rate)
+        report("常规", steady)
+        report("滑块", paced(harness, slider_messages(20, 15), 50))
+        best = max_sustained_rate(harness, args.limit)
+        print(f"可持续最大速率: {best:.0f} 条/秒（无丢弃且 p99 <= {args.limit:.0f}ms）")
+    finally:
+        harness.stop()
+
+    if args.max_p99 is not None and steady["p99_ms"] > args.max_p99:
+        print(f"p99 {steady['p99_ms']:.2f}ms 超过上限 {args.max_p99:.2f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
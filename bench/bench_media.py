@@ -0,0 +1,104 @@
+"""
+媒体键基准：对比原先 pyautogui.press 的单次耗时与 media.py 后端的单次分发耗时，以及两者的导入耗时。
+
+默认不会真正注入按键（否则会切歌）：SendInputMedia 使用不发送的假函数，只测量构造/查找 INPUT 数组和调用开销；
+MprisMedia 使用模拟的会话总线。pyautogui.press 的耗时包括每次按键后固定的 PAUSE 等待，
+未安装 pyautogui 时按其默认 PAUSE（0.1 秒）模拟。
+加 --real 时在 Windows 上调用真实的 SendInput（会实际触发播放/暂停，成对调用以恢复原状态）。
+
+用法（在项目根目录下）:
+    python bench/bench_media.py [--presses N] [--real]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media import MprisMedia, SendInputMedia  # noqa: E402
+from reconnect import percentile  # noqa: E402
+
+# pyautogui 默认的 PAUSE（秒）
+PYAUTOGUI_PAUSE = 0.1
+
+
+class _SimulatedBus:
+    # 模拟会话总线上只有一个正在播放的播放器
+    available = True
+
+    def call(self, bus_name, path, interface, method, signature="", args=()):
+        if method == "ListNames":
+            return (["org.freedesktop.DBus", "org.mpris.MediaPlayer2.vlc"],)
+        if method == "Get":
+            return (("s", "Playing"),)
+        return ()
+
+
+def import_time(module: str):
+    # 在新进程中测量导入耗时，避免受本进程已导入模块的影响
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)) or "."
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout)
+
+
+def measure(press, presses: int) -> list:
+    timings = []
+    for _ in range(presses):
+        started = time.perf_counter()
+        press("playpause")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    print(
+        f"{name:<16} p50={percentile(timings, 0.5) * 1000:8.3f}ms "
+        f"p99={percentile(timings, 0.99) * 1000:8.3f}ms 总计={sum(timings) * 1000:9.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="媒体键分发耗时基准")
+    parser.add_argument("--presses", type=int, default=20, help="每种实现的按键次数")
+    parser.add_argument("--real", action="store_true", help="在 Windows 上真正注入按键")
+    args = parser.parse_args()
+    presses = args.presses + args.presses % 2
+
+    try:
+        import pyautogui
+
+        pyautogui.FAILSAFE = False
+        old_press = pyautogui.press if args.real else (lambda key: time.sleep(pyautogui.PAUSE))
+    except Exception:
+        print(f"未找到 pyautogui，按 PAUSE={PYAUTOGUI_PAUSE}秒 模拟")
+        old_press = lambda key: time.sleep(PYAUTOGUI_PAUSE)  # noqa: E731
+
+    real = args.real and sys.platform == "win32"
+    if args.real and not real:
+        print("--real 只在 Windows 上有效，使用不发送的假函数")
+    send_input = SendInputMedia() if real else SendInputMedia(send=len)
+    mpris = MprisMedia(bus=_SimulatedBus())
+
+    # 旧实现最多测 10 次，每次至少 0.1 秒
+    report("pyautogui.press", measure(old_press, min(presses, 10)))
+    report("SendInputMedia", measure(send_input.press, presses))
+    report("MprisMedia", measure(mpris.press, presses))
+    print(f"MprisMedia 查找播放器次数: {mpris.lookups}")
+
+    for module in ("pyautogui", "media"):
+        elapsed = import_time(module)
+        if elapsed is None:
+            print(f"导入 {module:<10} 不可用")
+        else:
+            print(f"导入 {module:<10} {elapsed * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Python 解释器池基准：对比冷启动（每次新建解释器运行脚本）与在预热的工作进程中运行同一脚本时，
+从发出启动请求到脚本输出第一行的耗时。
+
+测试脚本先导入 --imports 指定的模块再输出一行；解释器池预先导入同样的模块。
+
+用法（在项目根目录下）:
+    python bench/bench_pypool.py [--runs N] [--imports json,decimal,asyncio]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypool import PythonPool  # noqa: E402
+from reconnect import percentile  # noqa: E402
+
+
+def write_script(directory: str, imports: list) -> str:
+    path = os.path.join(directory, "bench_script.py")
+    with open(path, "w", encoding="utf-8") as f:
+        for name in imports:
+            f.write(f"import {name}\n")
+        f.write('print("ready", flush=True)\n')
+    return path
+
+
+def cold_runs(path: str, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, path], stdout=subprocess.PIPE, text=True)
+        process.stdout.readline()
+        timings.append(time.perf_counter() - started)
+        process.wait()
+    return timings
+
+
+def pooled_runs(path: str, runs: int, imports: list) -> tuple:
+    finished = threading.Event()
+    pool = PythonPool(size=1, preload=imports, max_runs=runs + 1, on_finish=lambda topic, popen: finished.set())
+    pool.start()
+    deadline = time.monotonic() + 30
+    while pool.run("bench", path) is None:
+        # 等待第一个工作进程就绪
+        if time.monotonic() > deadline:
+            raise RuntimeError("Python 工作进程没有就绪")
+        time.sleep(0.05)
+    finished.wait(10)
+    pool.first_line_latencies.clear()
+    for _ in range(runs):
+        finished.clear()
+        while pool.run("bench", path) is None:
+            time.sleep(0.001)
+        finished.wait(10)
+        # 等待输出线程记录首行耗时
+        time.sleep(0.01)
+    timings = list(pool.first_line_latencies)
+    snapshot = pool.snapshot()
+    pool.close()
+    return timings, snapshot
+
+
+def report(name: str, timings: list) -> None:
+    print(
+        f"{name:<10} p50={percentile(timings, 0.5) * 1000:8.1f}ms "
+        f"p99={percentile(timings, 0.99) * 1000:8.1f}ms 次数={len(timings)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python 解释器池首行输出耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="每种方式的运行次数")
+    parser.add_argument("--imports", default="json,decimal,asyncio,email.mime.text", help="脚本导入的模块，逗号分隔")
+    args = parser.parse_args()
+    imports = [name for name in args.imports.split(",") if name]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_script(directory, imports)
+        report("冷启动", cold_runs(path, args.runs))
+        timings, snapshot = pooled_runs(path, args.runs, imports)
+        report("解释器池", timings)
+        print(f"解释器池统计: {snapshot}")
+
+
+if __name__ == "__main__":
+    main()
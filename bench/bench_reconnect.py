@@ -0,0 +1,81 @@
+"""
+重连耗时基准：反复断开替身服务器上的所有连接，
+对比 paho 默认的 loop_forever() 重连节奏与 ReconnectManager 的重连耗时分位数。
+
+用法（在项目根目录下）:
+    python bench/bench_reconnect.py [断线次数]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paho.mqtt.client as mqtt  # noqa: E402
+
+from bench.fake_broker import FakeBroker  # noqa: E402
+from reconnect import Backoff, ReconnectManager, percentile  # noqa: E402
+
+
+def measure(broker: FakeBroker, rounds: int, use_manager: bool) -> list:
+    connected = threading.Event()
+    client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
+    manager = ReconnectManager(client, Backoff(base=0.5, cap=10, jitter=0.5))
+
+    def on_connect(client, userdata, flags, reason_code, properties=None):
+        manager.on_connected()
+        connected.set()
+
+    def on_disconnect(client, userdata, flags, reason_code, properties=None):
+        manager.on_disconnected()
+
+    client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
+    client.connect(broker.host, broker.port)
+    if use_manager:
+        runner = threading.Thread(target=manager.run_network_loop, args=(True,), daemon=True)
+    else:
+        runner = threading.Thread(target=client.loop_forever, daemon=True)
+    runner.start()
+    if not connected.wait(5):
+        raise RuntimeError("首次连接失败")
+
+    latencies = []
+    for _ in range(rounds):
+        connected.clear()
+        started = time.monotonic()
+        broker.drop_clients()
+        if not connected.wait(30):
+            raise RuntimeError("重连超时")
+        latencies.append(time.monotonic() - started)
+        # 连接稳定后再进行下一次断线，退避计数会被重置
+        time.sleep(0.2)
+
+    manager.stop()
+    client.disconnect()
+    runner.join(5)
+    return latencies
+
+
+def report(name: str, latencies: list) -> None:
+    print(
+        f"{name:<18} p50={percentile(latencies, 0.5) * 1000:8.1f}ms "
+        f"p90={percentile(latencies, 0.9) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:8.1f}ms"
+    )
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    broker = FakeBroker().start()
+    try:
+        report("paho loop_forever", measure(broker, rounds, use_manager=False))
+        report("ReconnectManager", measure(broker, rounds, use_manager=True))
+    finally:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+主题分发微基准：对比路由表字典查找与原先逐个遍历 applications/serves 的耗时。
+
+用法（在项目根目录下）:
+    python bench/bench_routing.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routing import build_routes  # noqa: E402
+
+BUILTINS = {"Computer": "computer001", "screen": "screen002", "volume": "volume003", "sleep": "sleep004", "media": "media005"}
+SIZES = (5, 50, 500, 5000)
+LOOKUPS = 20000
+
+
+def make_topics(count: int):
+    half = count // 2
+    applications = [(f"app{i}006", f"C:\\apps\\app{i}.exe") for i in range(half)]
+    serves = [(f"serve{i}006", f"service{i}") for i in range(count - half)]
+    return applications, serves
+
+
+def linear_dispatch(applications, serves, topic):
+    """原先 process_command 的查找方式：依次遍历程序、服务、内置主题"""
+    for application, directory in applications:
+        if topic == application:
+            return directory
+    for serve, serve_name in serves:
+        if topic == serve:
+            return serve_name
+    for name, builtin in BUILTINS.items():
+        if topic == builtin:
+            return name
+    return None
+
+
+def main():
+    print(f"{'主题数':>8} {'线性遍历(ns/次)':>16} {'路由表(ns/次)':>14}")
+    for size in SIZES:
+        applications, serves = make_topics(size)
+        routes = build_routes(applications, serves, BUILTINS)
+        # 最坏情况：内置主题排在所有自定义主题之后
+        topic = BUILTINS["volume"]
+        linear = timeit.timeit(lambda: linear_dispatch(applications, serves, topic), number=LOOKUPS)
+        hashed = timeit.timeit(lambda: routes.get(topic), number=LOOKUPS)
+        print(f"{size:>8} {linear / LOOKUPS * 1e9:>16.1f} {hashed / LOOKUPS * 1e9:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+重连后订阅耗时基准：对比逐个主题订阅与批量订阅，
+从 CONNACK 到全部 SUBACK 收到所需的时间。
+
+用法（在项目根目录下）:
+    python bench/bench_subscribe.py [主题数...]
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paho.mqtt.client as mqtt  # noqa: E402
+
+from bench.fake_broker import FakeBroker  # noqa: E402
+from subscriptions import SubscriptionTracker  # noqa: E402
+
+# 模拟服务器对每个报文的处理/往返延迟
+PACKET_DELAY = 0.002
+
+
+def time_to_subscribed(broker: FakeBroker, topics, batch: int) -> float:
+    done = threading.Event()
+    tracker = SubscriptionTracker(max_topics=batch, on_ready=lambda elapsed: done.set())
+
+    def on_connect(client, userdata, flags, reason_code, properties=None):
+        tracker.subscribe_all(client, topics)
+
+    def on_subscribe(client, userdata, mid, reason_code_list, properties=None):
+        tracker.acknowledge(mid)
+
+    client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
+    client.on_connect = on_connect
+    client.on_subscribe = on_subscribe
+    client.connect(broker.host, broker.port)
+    client.loop_start()
+    try:
+        if not done.wait(60):
+            raise RuntimeError("订阅超时")
+        return tracker.last_elapsed
+    finally:
+        client.disconnect()
+        client.loop_stop()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500]
+    broker = FakeBroker(packet_delay=PACKET_DELAY).start()
+    print(f"模拟每个报文处理延迟 {PACKET_DELAY * 1000:.1f}ms")
+    print(f"{'主题数':>6} {'逐个订阅(ms)':>14} {'批量订阅(ms)':>14}")
+    try:
+        for size in sizes:
+            topics = [f"topic{i}006" for i in range(size)]
+            single = time_to_subscribed(broker, topics, batch=1)
+            batched = time_to_subscribed(broker, topics, batch=50)
+            print(f"{size:>6} {single * 1000:>14.1f} {batched * 1000:>14.1f}")
+    finally:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
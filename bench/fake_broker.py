@@ -0,0 +1,233 @@
+"""
+进程内 MQTT 3.1.1 替身服务器，仅供基准测试使用。
+
+只实现本项目用到的部分：CONNECT、SUBSCRIBE、UNSUBSCRIBE、QoS 0/1 PUBLISH、
+PINGREQ、DISCONNECT。可以模拟每个报文的处理延迟，也可以主动断开所有客户端来模拟断网。
+"""
+
+import logging
+import socket
+import struct
+import threading
+import time
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+
+def publish_packet(topic: str, payload: bytes) -> bytes:
+    body = encode_string(topic) + payload
+    return bytes([PUBLISH << 4]) + encode_length(len(body)) + body
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    if pattern == topic:
+        return True
+    parts = pattern.split("/")
+    levels = topic.split("/")
+    for index, part in enumerate(parts):
+        if part == "#":
+            return True
+        if index >= len(levels) or (part != "+" and part != levels[index]):
+            return False
+    return len(parts) == len(levels)
+
+
+class _Session:
+    def __init__(self, broker, sock):
+        self.broker = broker
+        self.sock = sock
+        self.subscriptions = set()
+        self.send_lock = threading.Lock()
+        self.alive = True
+
+    def send(self, data: bytes) -> None:
+        with self.send_lock:
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                self.alive = False
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data.extend(chunk)
+        return bytes(data)
+
+    def serve(self) -> None:
+        try:
+            while self.alive:
+                header = self._recv_exact(1)[0]
+                multiplier, length = 1, 0
+                while True:
+                    byte = self._recv_exact(1)[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = self._recv_exact(length) if length else b""
+                if self.broker.packet_delay:
+                    time.sleep(self.broker.packet_delay)
+                self.handle(header >> 4, header & 0x0F, body)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.alive = False
+            self.broker._remove(self)
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def handle(self, packet_type: int, flags: int, body: bytes) -> None:
+        if packet_type == CONNECT:
+            self.send(bytes([CONNACK << 4, 2, 0, 0]))
+        elif packet_type == SUBSCRIBE:
+            mid = body[:2]
+            offset = 2
+            granted = bytearray()
+            while offset < len(body):
+                (size,) = struct.unpack("!H", body[offset:offset + 2])
+                topic = body[offset + 2:offset + 2 + size].decode("utf-8")
+                offset += 2 + size
+                granted.append(min(body[offset], 1))
+                offset += 1
+                self.subscriptions.add(topic)
+            self.broker.subscribe_packets += 1
+            payload = mid + bytes(granted)
+            self.send(bytes([SUBACK << 4]) + encode_length(len(payload)) + payload)
+        elif packet_type == UNSUBSCRIBE:
+            mid = body[:2]
+            offset = 2
+            while offset < len(body):
+                (size,) = struct.unpack("!H", body[offset:offset + 2])
+                self.subscriptions.discard(body[offset + 2:offset + 2 + size].decode("utf-8"))
+                offset += 2 + size
+            self.send(bytes([UNSUBACK << 4, 2]) + mid)
+        elif packet_type == PUBLISH:
+            qos = (flags >> 1) & 0x03
+            (size,) = struct.unpack("!H", body[:2])
+            topic = body[2:2 + size].decode("utf-8")
+            offset = 2 + size
+            if qos:
+                mid = body[offset:offset + 2]
+                offset += 2
+                self.send(bytes([PUBACK << 4, 2]) + mid)
+            self.broker.publish(topic, body[offset:])
+        elif packet_type == PINGREQ:
+            self.send(bytes([PINGRESP << 4, 0]))
+        elif packet_type == DISCONNECT:
+            self.alive = False
+
+
+class FakeBroker:
+    """
+    English: Minimal in-process MQTT broker stand-in for benchmarks
+    中文: 用于基准测试的最小进程内 MQTT 服务器替身
+
+    参数:
+    - host: 监听地址
+    - port: 监听端口，0 表示自动分配
+    - packet_delay: 每个收到的报文的模拟处理延迟（秒）
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, packet_delay: float = 0.0):
+        self.host = host
+        self.packet_delay = packet_delay
+        self.subscribe_packets = 0
+        self._server = socket.create_server((host, port))
+        self.port = self._server.getsockname()[1]
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self) -> "FakeBroker":
+        self._running = True
+        threading.Thread(target=self._accept, name="fake-broker", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        try:
+            self._server.close()
+        except OSError:
+            pass
+        self.drop_clients()
+
+    def drop_clients(self) -> None:
+        """
+        English: Closes every client connection to simulate a network drop
+        中文: 断开所有客户端连接，模拟断网
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.alive = False
+            try:
+                session.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def publish(self, topic: str, payload: bytes) -> int:
+        """
+        English: Delivers a message to every matching subscriber, returns the delivery count
+        中文: 向所有匹配的订阅者投递消息，返回投递数量
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        packet = publish_packet(topic, payload)
+        with self._lock:
+            sessions = list(self._sessions)
+        delivered = 0
+        for session in sessions:
+            if any(topic_matches(pattern, topic) for pattern in session.subscriptions):
+                session.send(packet)
+                delivered += 1
+        return delivered
+
+    def subscribed_topics(self) -> set:
+        with self._lock:
+            sessions = list(self._sessions)
+        topics = set()
+        for session in sessions:
+            topics |= session.subscriptions
+        return topics
+
+    def _accept(self) -> None:
+        while self._running:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = _Session(self, sock)
+            with self._lock:
+                self._sessions.append(session)
+            threading.Thread(target=session.serve, daemon=True).start()
+
+    def _remove(self, session) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        logging.debug("fake broker: client disconnected")
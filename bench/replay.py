@@ -0,0 +1,158 @@
+"""
+消息轨迹回放：把 main.py 录制的轨迹（config.json 中 "trace_record": 1，写入 logs/trace.rct）
+按原速、N 倍速或最快速度送入与 main.py 相同的 on_message -> 合并 -> 调度 -> process_command 链路
+（handlers.MessagePipeline 和 handlers.CommandHandlers），只有系统调用由 bench_e2e 中的假后端代替。
+
+报告吞吐量、按主题的延迟分位数，并检查执行顺序：
+- 同一主题实际执行的命令必须是轨迹中该主题命令的子序列（合并只会丢弃，不会改变顺序）
+- 指定 --save 保存本次的执行顺序，之后用 --compare 与新版本的回放结果逐主题比较
+
+用法（在项目根目录下）:
+    python bench/replay.py logs/trace.rct [--speed 1|10|max] [--config config.json]
+                           [--runtime threaded|asyncio] [--save run.json] [--compare run.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.bench_e2e import Harness  # noqa: E402
+from recording import read_trace  # noqa: E402
+from reconnect import percentile  # noqa: E402
+from routing import ApplicationRoute, routes_from_config  # noqa: E402
+
+
+def load_routes(messages, config_path: str) -> dict:
+    # 有 config.json 时按实际配置生成路由表，否则把轨迹中的每个主题都当作程序主题
+    if config_path:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return routes_from_config(json.load(f))
+    return {message.topic: ApplicationRoute(message.topic, "") for message in messages}
+
+
+def replay(harness: Harness, messages, speed: float) -> float:
+    """
+    English: Injects the trace at speed x real time (0 = as fast as possible); returns the elapsed seconds
+    中文: 按 speed 倍速注入轨迹（0 表示最快速度），等待全部处理完成后返回耗时
+    """
+    harness.reset()
+    started = time.monotonic()
+    first = messages[0].arrival
+    for message in messages:
+        if speed > 0:
+            delay = started + (message.arrival - first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        harness.inject(message.topic, message.payload)
+    if not harness.wait_settled(len(messages), timeout=max(30.0, len(messages) * 0.01)):
+        logging.warning("等待回放完成超时")
+    return time.monotonic() - started
+
+
+def executed_by_topic(executed) -> dict:
+    by_topic = defaultdict(list)
+    for topic, command in executed:
+        by_topic[topic].append(command)
+    return dict(by_topic)
+
+
+def is_subsequence(part, whole) -> bool:
+    remaining = iter(whole)
+    return all(item in remaining for item in part)
+
+
+def first_difference(left, right) -> int:
+    for index, (a, b) in enumerate(zip(left, right)):
+        if a != b:
+            return index
+    return -1 if len(left) == len(right) else min(len(left), len(right))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息轨迹回放")
+    parser.add_argument("trace", help="轨迹文件路径")
+    parser.add_argument("--speed", default="1", help="回放倍速，max 表示最快速度")
+    parser.add_argument("--config", help="config.json 路径，用于生成与实际相同的路由表")
+    parser.add_argument("--runtime", choices=("threaded", "asyncio"), default="threaded")
+    parser.add_argument("--cost-scale", type=float, default=1.0, help="假后端耗时倍数")
+    parser.add_argument("--window", type=float, default=0.15, help="滑块合并窗口（秒）")
+    parser.add_argument("--save", help="保存本次执行顺序和统计的 JSON 路径")
+    parser.add_argument("--compare", help="与之前保存的回放结果比较执行顺序")
+    args = parser.parse_args()
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+
+    logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))])
+    messages = list(read_trace(args.trace))
+    if not messages:
+        print("轨迹为空")
+        return
+    routes = load_routes(messages, args.config)
+    harness = Harness(args.runtime, args.cost_scale, args.window, routes=routes).start()
+    try:
+        elapsed = replay(harness, messages, speed)
+    finally:
+        harness.stop()
+
+    span = messages[-1].arrival - messages[0].arrival
+    print(
+        f"回放 {len(messages)} 条消息（录制时长 {span:.1f}秒，倍速 {args.speed}），耗时 {elapsed:.2f}秒，"
+        f"吞吐量 {len(messages) / elapsed:.0f} 条/秒"
+    )
+    print(f"执行={harness.completed} 合并={harness.merged} 丢弃={harness.dropped}")
+    print(f"{'主题':<24} {'收到':>6} {'执行':>6} {'p50(ms)':>9} {'p99(ms)':>9}")
+    received = defaultdict(list)
+    for message in messages:
+        received[message.topic].append(message.payload.decode("utf-8", "replace"))
+    executed = executed_by_topic(harness.executed)
+    for topic in sorted(received):
+        latencies = harness.topic_latencies.get(topic, [])
+        print(
+            f"{topic:<24} {len(received[topic]):>6} {len(executed.get(topic, [])):>6} "
+            f"{percentile(latencies, 0.5) * 1000:>9.2f} {percentile(latencies, 0.99) * 1000:>9.2f}"
+        )
+
+    reordered = [topic for topic, commands in executed.items() if not is_subsequence(commands, received[topic])]
+    if reordered:
+        print(f"执行顺序与轨迹不一致的主题: {reordered}")
+    else:
+        print("所有主题的执行顺序与轨迹一致")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)["executed"]
+        differences = 0
+        for topic in sorted(set(previous) | set(executed)):
+            index = first_difference(previous.get(topic, []), executed.get(topic, []))
+            if index >= 0:
+                differences += 1
+                print(
+                    f"与上次回放不同: {topic} 从第 {index + 1} 条命令开始"
+                    f"（上次 {len(previous.get(topic, []))} 条，本次 {len(executed.get(topic, []))} 条）"
+                )
+        if not differences:
+            print("执行顺序与上次回放完全相同")
+
+    if args.save:
+        result = {
+            "trace": os.path.abspath(args.trace),
+            "speed": args.speed,
+            "messages": len(messages),
+            "elapsed": elapsed,
+            "completed": harness.completed,
+            "merged": harness.merged,
+            "dropped": harness.dropped,
+            "executed": executed,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+        print(f"回放结果已保存: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
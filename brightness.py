@@ -0,0 +1,244 @@
+"""
+屏幕亮度后端。
+
+- WmiBrightness（Windows）：每个工作线程只初始化一次 COM 并打开一次 WMI 连接，缓存亮度方法对象，
+  之后每次设置亮度只需一次方法调用。调用失败或显示器数量变化时才重建连接。
+  原先每次调用都新建 wmi.WMI(namespace="wmi") 并重新枚举 WmiMonitorBrightnessMethods()，
+  单次耗时可达数百毫秒。
+- SysfsBrightness（Linux）：保持 /sys/class/backlight 下 brightness 文件打开，每次设置只需一次写入。
+"""
+
+import ctypes
+import logging
+import os
+import sys
+import threading
+
+# GetSystemMetrics: 显示器数量
+SM_CMONITORS = 80
+
+
+def _default_connect():
+    import wmi
+
+    return wmi.WMI(namespace="wmi")
+
+
+def _default_com_init():
+    try:
+        import pythoncom
+    except ImportError:
+        return
+    pythoncom.CoInitialize()
+
+
+def _default_monitor_count() -> int:
+    if sys.platform != "win32":
+        return 0
+    return ctypes.windll.user32.GetSystemMetrics(SM_CMONITORS)
+
+
+class WmiBrightness:
+    """
+    English: Brightness backend with a per-thread cached WMI connection and method handle
+    中文: 按线程缓存 WMI 连接和亮度方法对象的亮度后端
+
+    参数:
+    - connect: 打开 WMI 连接的函数，默认 wmi.WMI(namespace="wmi")
+    - com_init: 在新线程中初始化 COM 的函数，默认 pythoncom.CoInitialize
+    - monitor_count: 返回当前显示器数量的函数，数量变化时重建所有线程的缓存
+    """
+
+    def __init__(self, connect=None, com_init=None, monitor_count=None):
+        self.connect = connect or _default_connect
+        self.com_init = com_init or _default_com_init
+        self.monitor_count = monitor_count or _default_monitor_count
+        self.rebuilds = 0
+        self._generation = 0
+        self._monitors = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """
+        English: Drops the cached handles of every thread
+        中文: 使所有线程缓存的连接失效，下次调用时重建
+        """
+        with self._lock:
+            self._generation += 1
+
+    def _check_monitors(self) -> None:
+        # 查询显示器数量不持有锁；比较和更新在锁内进行，多个工作线程同时发现变化时只重建一次
+        count = self.monitor_count()
+        with self._lock:
+            if count == self._monitors:
+                return
+            previous = self._monitors
+            self._monitors = count
+            if previous is not None:
+                self._generation += 1
+        if previous is not None:
+            logging.info(f"显示器数量变化: {previous} -> {count}，重建亮度控制连接")
+
+    def _handles(self):
+        local = self._local
+        if not getattr(local, "com_ready", False):
+            # WMI 基于 COM，每个线程使用前都要初始化一次
+            self.com_init()
+            local.com_ready = True
+        if getattr(local, "generation", None) != self._generation:
+            local.connection = None
+            local.methods = None
+        if local.methods is None:
+            connection = self.connect()
+            methods = connection.WmiMonitorBrightnessMethods()
+            if not methods:
+                raise RuntimeError("没有找到支持亮度调节的显示器")
+            local.connection = connection
+            local.methods = methods[0]
+            local.generation = self._generation
+            with self._lock:
+                self.rebuilds += 1
+        return local
+
+    def set(self, value: int) -> None:
+        """
+        English: Sets the brightness (0-100); rebuilds the connection once on failure
+        中文: 设置亮度（0-100），调用失败时重建连接并重试一次
+        """
+        self._check_monitors()
+        try:
+            self._handles().methods.WmiSetBrightness(value, 0)
+        except Exception as e:
+            logging.warning(f"亮度控制连接失效，重新连接: {e}")
+            self._local.methods = None
+            self._handles().methods.WmiSetBrightness(value, 0)
+
+    def get(self) -> int:
+        """
+        English: Returns the current brightness of the first monitor
+        中文: 返回第一个显示器的当前亮度
+        """
+        self._check_monitors()
+        try:
+            return int(self._handles().connection.WmiMonitorBrightness()[0].CurrentBrightness)
+        except Exception:
+            self._local.methods = None
+            return int(self._handles().connection.WmiMonitorBrightness()[0].CurrentBrightness)
+
+
+class SysfsBrightness:
+    """
+    English: Linux brightness backend writing to /sys/class/backlight/<device>/brightness
+    中文: Linux 亮度后端，直接写入 /sys/class/backlight/<设备>/brightness
+
+    没有写权限时（非 root 且没有 udev 规则）通过 systemd-logind 的 Session.SetBrightness 设置。
+
+    参数:
+    - root: 背光设备目录，默认 /sys/class/backlight
+    - bus: system.DBus 实例（系统总线），用于 logind 回退
+    """
+
+    def __init__(self, root: str = "/sys/class/backlight", bus=None):
+        self.root = root
+        self.bus = bus
+        self.rebuilds = 0
+        self._device = None
+        self._max = None
+        self._fd = None
+        self._use_logind = False
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._close()
+            self._device = None
+
+    def _close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _open(self) -> None:
+        # 调用方持有 self._lock
+        if self._device is not None:
+            return
+        devices = sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+        if not devices:
+            raise RuntimeError(f"没有找到背光设备: {self.root}")
+        # 多个设备时优先使用固件/平台接口，与内核和桌面环境的选择一致
+        devices.sort(key=lambda name: self._priority(name))
+        device = devices[0]
+        path = os.path.join(self.root, device)
+        with open(os.path.join(path, "max_brightness")) as f:
+            self._max = int(f.read())
+        try:
+            self._fd = os.open(os.path.join(path, "brightness"), os.O_WRONLY)
+            self._use_logind = False
+        except PermissionError:
+            if self.bus is None:
+                raise
+            logging.info(f"没有 {path}/brightness 的写权限，通过 logind 设置亮度")
+            self._use_logind = True
+        self._device = device
+        self.rebuilds += 1
+        logging.info(f"使用背光设备: {device}（最大亮度 {self._max}）")
+
+    def _priority(self, name: str) -> int:
+        try:
+            with open(os.path.join(self.root, name, "type")) as f:
+                kind = f.read().strip()
+        except OSError:
+            kind = ""
+        return {"firmware": 0, "platform": 1, "raw": 2}.get(kind, 3)
+
+    def set(self, value: int) -> None:
+        """
+        English: Sets the brightness (0-100)
+        中文: 设置亮度（0-100）
+        """
+        with self._lock:
+            for attempt in (0, 1):
+                self._open()
+                raw = round(max(0, min(100, value)) * self._max / 100)
+                try:
+                    if self._use_logind:
+                        self.bus.call(
+                            "org.freedesktop.login1", "/org/freedesktop/login1/session/auto",
+                            "org.freedesktop.login1.Session", "SetBrightness", "ssu",
+                            ("backlight", self._device, raw),
+                        )
+                    else:
+                        os.pwrite(self._fd, str(raw).encode(), 0)
+                    return
+                except OSError as e:
+                    if attempt:
+                        raise
+                    logging.warning(f"写入背光设备失败，重新打开: {e}")
+                    self._close()
+                    self._device = None
+
+    def get(self) -> int:
+        """
+        English: Returns the current brightness (0-100)
+        中文: 返回当前亮度（0-100）
+        """
+        with self._lock:
+            self._open()
+            with open(os.path.join(self.root, self._device, "actual_brightness")) as f:
+                return round(int(f.read()) * 100 / self._max)
+
+
+def create_brightness():
+    """
+    English: Returns the brightness backend of the current platform
+    中文: 返回当前平台的亮度后端
+    """
+    if sys.platform == "win32":
+        return WmiBrightness()
+    from system import DBus
+
+    return SysfsBrightness(bus=DBus())
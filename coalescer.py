@@ -0,0 +1,131 @@
+"""
+滑块命令合并：米家拖动滑块时会连续发送大量 on#NN 消息。
+
+在短时间窗口内只保留每个主题最新的 on#NN，窗口结束后再交给调度器执行；
+若目标值与上次已应用的值相同则跳过写入。
+"""
+
+import logging
+import threading
+import time
+
+
+class SliderCoalescer:
+    """
+    English: Collapses bursts of on#NN commands per topic to the latest value
+    中文: 按主题把短时间内的多个 on#NN 命令合并为最新的一个
+
+    参数:
+    - submit: 窗口结束后提交命令的函数，签名为 submit(command, topic, context)
+    - topics: 需要合并的主题（亮度、音量）
+    - window: 合并窗口（秒），为 0 时不合并
+    - applied_ttl: 已应用值的有效期（秒），超时后不再据此跳过写入
+    - on_drop: 命令被合并丢弃时的回调，签名为 on_drop(context)
+    - scheduler: 共享的 TimerScheduler，未指定时每个合并窗口使用一个 threading.Timer
+    """
+
+    def __init__(self, submit, topics, window: float = 0.15, applied_ttl: float = 30.0, on_drop=None,
+                 scheduler=None):
+        self.submit = submit
+        self.on_drop = on_drop
+        self.scheduler = scheduler
+        self.topics = {topic for topic in topics if topic}
+        self.window = max(0.0, float(window))
+        self.applied_ttl = applied_ttl
+        self.received = 0
+        self.dropped = 0
+        self.applied = 0
+        self.skipped = 0
+        self._pending = {}
+        self._timers = {}
+        self._last_applied = {}
+        self._lock = threading.Lock()
+        # 取出并提交待合并命令期间持有，避免定时器线程与网络线程交错导致顺序颠倒
+        self._submit_lock = threading.Lock()
+
+    @staticmethod
+    def is_slider(command: str) -> bool:
+        return command.startswith("on#")
+
+    def offer(self, command: str, topic: str, context=None) -> bool:
+        """
+        English: Takes ownership of a slider command; returns False if the caller should submit it itself
+        中文: 接管滑块命令；返回 False 时由调用者自行提交
+        """
+        if topic not in self.topics or self.window <= 0:
+            return False
+        if not self.is_slider(command):
+            # 非滑块命令（on/off）先把该主题待合并的命令提交，保证顺序不变
+            self.flush(topic)
+            return False
+        with self._lock:
+            self.received += 1
+            replaced = self._pending.get(topic)
+            if replaced is not None:
+                self.dropped += 1
+                logging.info(f"合并滑块命令: {replaced[0]} -> {command} 主题: {topic}")
+            self._pending[topic] = (command, context)
+            if topic not in self._timers:
+                if self.scheduler is not None:
+                    timer = self.scheduler.call_later(self.window, self.flush, topic)
+                else:
+                    timer = threading.Timer(self.window, self.flush, args=(topic,))
+                    timer.daemon = True
+                    timer.start()
+                self._timers[topic] = timer
+        if replaced is not None and self.on_drop:
+            self.on_drop(replaced[1])
+        return True
+
+    def flush(self, topic: str) -> None:
+        """
+        English: Submits the pending command of the topic immediately
+        中文: 立即提交该主题待合并的命令
+        """
+        with self._submit_lock:
+            with self._lock:
+                timer = self._timers.pop(topic, None)
+                pending = self._pending.pop(topic, None)
+            if timer is not None:
+                timer.cancel()
+            if pending is not None:
+                self.submit(pending[0], topic, pending[1])
+
+    def should_apply(self, topic: str, value: int) -> bool:
+        """
+        English: Returns False if value equals the last applied value of the topic
+        中文: 目标值与上次应用的值相同时返回 False
+        """
+        with self._lock:
+            last = self._last_applied.get(topic)
+            if last is not None and last[0] == value and time.monotonic() - last[1] < self.applied_ttl:
+                self.skipped += 1
+                return False
+            return True
+
+    def mark_applied(self, topic: str, value: int) -> None:
+        """
+        English: Records the value that was actually written
+        中文: 记录实际写入的值
+        """
+        with self._lock:
+            self.applied += 1
+            self._last_applied[topic] = (value, time.monotonic())
+
+    def forget(self, topic: str) -> None:
+        """
+        English: Drops the cached applied value, e.g. after a failed write
+        中文: 清除缓存的已应用值（例如写入失败后）
+        """
+        with self._lock:
+            self._last_applied.pop(topic, None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "received": self.received,
+                "dropped": self.dropped,
+                "applied": self.applied,
+                "skipped": self.skipped,
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,193 @@
+"""
+外部命令执行：不轮询、不阻塞调用方。
+
+- 默认直接以参数列表启动进程（不经过 cmd.exe / sh），需要 shell 语法时显式传 shell=True
+- 每个进程一个等待线程，wait() 到进程退出即得出结果；stdout/stderr 由单独的读取线程按行写入日志，
+  进程退出后最多再等 output_grace 秒：命令启动的子进程继承了输出管道并仍在运行时（例如 shell=True），
+  不会因为管道一直没有读到结束而让 Future 永远不完成
+- 超时由共享定时器上的一个定时任务负责，到期时结束进程，不再每秒醒来检查；
+  Linux 上命令在独立的进程组中运行，超时时结束整个进程组
+- run() 立即返回 concurrent.futures.Future，结果为 CommandResult
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from scheduler import TimerScheduler
+
+# Windows 上不为控制台程序弹出窗口
+CREATE_NO_WINDOW = 0x08000000
+
+
+class CommandResult:
+    """
+    English: Outcome of an external command
+    中文: 外部命令的执行结果
+
+    - returncode: 退出码
+    - timed_out: 是否因超时被结束
+    - elapsed: 从启动到退出的耗时（秒）
+    - output: 最后若干行输出（stdout 与 stderr 合并）
+    """
+
+    __slots__ = ("args", "returncode", "timed_out", "elapsed", "output")
+
+    def __init__(self, args, returncode: int, timed_out: bool, elapsed: float, output: list):
+        self.args = args
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+        self.output = output
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandResult(args={self.args!r}, returncode={self.returncode!r}, "
+            f"timed_out={self.timed_out!r}, elapsed={self.elapsed:.3f})"
+        )
+
+
+class CommandRunner:
+    """
+    English: Runs external commands asynchronously, streaming their output into the log
+    中文: 异步执行外部命令，输出按行写入日志
+
+    参数:
+    - scheduler: 负责超时的 TimerScheduler，默认新建一个
+    - keep_lines: CommandResult.output 中保留的最后输出行数
+    - output_grace: 进程退出后等待读取剩余输出的最长时间（秒）
+    """
+
+    def __init__(self, scheduler: TimerScheduler = None, keep_lines: int = 50, output_grace: float = 1.0):
+        self.scheduler = scheduler or TimerScheduler("RC-command-timer")
+        self.keep_lines = keep_lines
+        self.output_grace = output_grace
+        self.started = 0
+        self.timed_out = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def running(self) -> int:
+        with self._lock:
+            return self._running
+
+    def run(self, args, timeout: float = 30, shell: bool = False, name: str = None) -> Future:
+        """
+        English: Starts a command and returns a Future of its CommandResult
+        中文: 启动命令并立即返回 Future，结果为 CommandResult；启动失败时 Future 携带异常
+
+        参数:
+        - args: 参数列表（默认）或 shell=True 时的命令字符串
+        - timeout: 超时时间（秒），超时后结束进程；0 或 None 表示不限时
+        - name: 日志中显示的名称，默认为程序名
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        if name is None:
+            name = args if isinstance(args, str) else args[0]
+        if sys.platform == "win32":
+            options = {"creationflags": CREATE_NO_WINDOW}
+        else:
+            # 独立的进程组，超时时连同命令启动的子进程一起结束
+            options = {"start_new_session": True}
+        started = time.monotonic()
+        try:
+            process = subprocess.Popen(
+                args,
+                shell=shell,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                **options,
+            )
+        except OSError as e:
+            logging.error(f"命令启动失败: {name}: {e}")
+            future.set_exception(e)
+            return future
+        logging.info(f"命令已启动: {name}（PID {process.pid}）")
+        with self._lock:
+            self.started += 1
+            self._running += 1
+        state = {"timed_out": False}
+        handle = None
+        if timeout:
+            handle = self.scheduler.call_later(timeout, self._expire, process, name, state)
+        threading.Thread(
+            target=self._watch,
+            args=(process, args, name, started, handle, state, future),
+            name=f"RC-command-{process.pid}",
+            daemon=True,
+        ).start()
+        return future
+
+    def _expire(self, process: subprocess.Popen, name: str, state: dict) -> None:
+        # 在定时器线程中执行，只结束进程，收尾由等待线程完成
+        if process.poll() is not None:
+            return
+        logging.warning(f"命令超时，正在终止: {name}")
+        state["timed_out"] = True
+        with self._lock:
+            self.timed_out += 1
+        try:
+            if sys.platform == "win32":
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read(process, name, output) -> None:
+        # 管道的所有写端（包括继承了它的子进程）都关闭时读取结束
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                if line:
+                    output.append(line)
+                    logging.info(f"[{name}] {line}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            process.stdout.close()
+
+    def _watch(self, process, args, name, started, handle, state, future) -> None:
+        output = deque(maxlen=self.keep_lines)
+        reader = threading.Thread(
+            target=self._read, args=(process, name, output), name=f"RC-command-out-{process.pid}", daemon=True
+        )
+        reader.start()
+        try:
+            returncode = process.wait()
+        except Exception as e:
+            with self._lock:
+                self._running -= 1
+            future.set_exception(e)
+            return
+        finally:
+            if handle is not None:
+                handle.cancel()
+        elapsed = time.monotonic() - started
+        # 进程已退出；只再等一小段时间读完剩余输出，管道仍被子进程占用时不再等待
+        reader.join(self.output_grace)
+        if reader.is_alive():
+            logging.warning(f"命令 {name} 已退出，但输出管道仍被它启动的子进程占用，不再等待其输出")
+        result = CommandResult(args, returncode, state["timed_out"], elapsed, list(output.copy()))
+        with self._lock:
+            self._running -= 1
+        if result.ok:
+            logging.info(f"命令完成: {name}，耗时 {result.elapsed:.2f}秒")
+        else:
+            logging.warning(f"命令失败: {name}，退出码 {returncode}，超时: {result.timed_out}")
+        future.set_result(result)
@@ -0,0 +1,112 @@
+"""
+进程发现：主程序和托盘启动时各自写一份身份记录（PID、进程创建时间、程序名），
+对方查找时只需读取记录并用一次 psutil.Process(pid) 校验，不再遍历整个进程表。
+
+- 记录写到 logs 目录下的 <名称>.pid（JSON）。主程序在取得单实例锁之后才写入，同一时间只有一个写入者；
+  先写临时文件再原子替换，读取方不会读到写了一半的内容
+- 校验进程创建时间，PID 被其他进程复用时记录自动失效
+- 没有记录或记录失效时才调用调用方提供的全表扫描函数；扫描找到后补写记录，下次直接命中
+"""
+
+import json
+import logging
+import os
+import threading
+
+import psutil
+
+# 进程创建时间的比较容差（秒），psutil 在不同平台上的精度不同
+CREATE_TIME_TOLERANCE = 0.01
+
+
+def record_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.pid")
+
+
+def _identity(proc: psutil.Process) -> dict:
+    with proc.oneshot():
+        return {"pid": proc.pid, "create_time": proc.create_time(), "exe_name": proc.name()}
+
+
+def announce(directory: str, name: str, proc: psutil.Process = None) -> bool:
+    """
+    English: Writes the identity record of proc (default: this process) under name
+    中文: 写入进程（默认为当前进程）的身份记录
+
+    参数:
+    - directory: 记录所在目录（logs 目录）
+    - name: 组件名称，例如 RC-main、RC-tray
+    """
+    path = record_path(directory, name)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        record = _identity(proc or psutil.Process())
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(temp, path)
+    except (OSError, psutil.Error) as e:
+        logging.warning(f"写入进程记录 {path} 失败: {e}")
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def withdraw(directory: str, name: str) -> None:
+    """
+    English: Removes the record of name if it still describes this process
+    中文: 记录仍属于当前进程时删除它（退出时调用）
+    """
+    path = record_path(directory, name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("pid") == os.getpid():
+            os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+def lookup(directory: str, name: str):
+    """
+    English: Returns the live process described by the record of name, or None
+    中文: 读取记录并校验，返回仍在运行的对应进程；没有记录或记录已失效时返回 None
+    """
+    path = record_path(directory, name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        proc = psutil.Process(int(record["pid"]))
+        # PID 可能已被复用，创建时间一致才是同一个进程
+        if abs(proc.create_time() - float(record["create_time"])) > CREATE_TIME_TOLERANCE:
+            return None
+        if not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE:
+            return None
+        return proc
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, psutil.Error):
+        return None
+
+
+def find(directory: str, name: str, scan=None):
+    """
+    English: Looks a component up by its record, falling back to scan() and repairing the record
+    中文: 先按记录查找组件进程，记录无效时才调用 scan() 全表扫描，找到后补写记录
+
+    参数:
+    - scan: 全表扫描函数，返回 psutil.Process、True 或 None
+    """
+    proc = lookup(directory, name)
+    if proc is not None:
+        logging.info(f"按进程记录找到 {name}: PID {proc.pid}")
+        return proc
+    if scan is None:
+        return None
+    logging.info(f"没有有效的 {name} 进程记录，遍历进程表查找")
+    found = scan()
+    if isinstance(found, psutil.Process):
+        announce(directory, name, found)
+    return found
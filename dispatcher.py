@@ -0,0 +1,226 @@
+"""
+命令调度器：将 MQTT 网络线程与命令执行解耦。
+
+on_message 只负责解码并把命令放入有界队列，由固定数量的工作线程执行
+process_command，避免耗时命令（睡眠、服务启动等）阻塞 paho 的网络循环。
+
+每个主题对应一条串行通道：同一主题的命令严格按到达顺序执行，
+不同主题的命令可以在不同工作线程上并行执行。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+# 队列满时的处理策略
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_NEW = "drop_new"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEW, OVERFLOW_DROP_OLDEST)
+
+
+class DispatcherStats:
+    """
+    English: Counters for queue depth, wait time and execution time
+    中文: 调度器统计：队列深度、排队耗时、执行耗时
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.executed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.exec_total = 0.0
+        self.exec_max = 0.0
+
+    def snapshot(self, depth: int) -> dict:
+        done = self.executed or 1
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "wait_avg_ms": round(self.wait_total / done * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "exec_avg_ms": round(self.exec_total / done * 1000, 3),
+            "exec_max_ms": round(self.exec_max * 1000, 3),
+        }
+
+
+class CommandDispatcher:
+    """
+    English: Executes submitted commands on a bounded worker pool
+    中文: 在有界线程池中执行提交的命令
+
+    参数:
+    - handler: 执行命令的函数，签名为 handler(command, topic)
+    - workers: 工作线程数量
+    - max_queue: 队列最大长度
+    - overflow: 队列满时的策略（block / drop_new / drop_oldest）
+    - lanes: 已知主题列表，每个主题一条串行通道；未知主题共用一条默认通道
+    - on_complete: 命令执行完成后的回调，签名为 on_complete(context, latency, failed)
+    - on_drop: 命令被丢弃时的回调，签名为 on_drop(context)
+    """
+
+    DEFAULT_LANE = "__default__"
+
+    def __init__(self, handler, workers: int = 4, max_queue: int = 100, overflow: str = OVERFLOW_DROP_OLDEST, lanes=None,
+                 on_complete=None, on_drop=None):
+        if overflow not in OVERFLOW_POLICIES:
+            logging.warning(f"未知的队列溢出策略: {overflow}，使用 {OVERFLOW_DROP_OLDEST}")
+            overflow = OVERFLOW_DROP_OLDEST
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.overflow = overflow
+        self.on_complete = on_complete
+        self.on_drop = on_drop
+        self.stats = DispatcherStats()
+        # 主题 -> 该主题待执行的命令
+        self._lanes = {key: deque() for key in (lanes or []) if key}
+        self._lanes[self.DEFAULT_LANE] = deque()
+        # 有待执行命令且当前没有线程在执行的通道
+        self._ready = deque()
+        # 已在 _ready 中或正在被执行的通道，保证同一通道同时只有一个线程
+        self._busy = set()
+        self._depth = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    def start(self) -> None:
+        """
+        English: Starts the worker threads
+        中文: 启动工作线程
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"RC-worker-{index}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        logging.info(
+            f"命令调度器已启动: 线程数={self.workers}, 队列长度={self.max_queue}, "
+            f"溢出策略={self.overflow}, 主题通道数={len(self._lanes) - 1}"
+        )
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        English: Stops the workers, waiting up to timeout seconds for running commands
+        中文: 停止工作线程，最多等待 timeout 秒
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads.clear()
+        logging.info(f"命令调度器已停止: {self.snapshot()}")
+
+    def submit(self, command: str, topic: str, context=None) -> bool:
+        """
+        English: Enqueues a command; returns False if it was dropped
+        中文: 将命令放入队列，被丢弃时返回 False；context 会原样传给回调
+        """
+        item = (command, topic, time.monotonic(), context)
+        key = topic if topic in self._lanes else self.DEFAULT_LANE
+        lane = self._lanes[key]
+        dropped = None
+        with self._cond:
+            self.stats.submitted += 1
+            while self._depth >= self.max_queue:
+                if self.overflow == OVERFLOW_DROP_NEW:
+                    self.stats.dropped += 1
+                    logging.warning(f"命令队列已满，丢弃新命令: {command} 主题: {topic}")
+                    dropped = item
+                    break
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    # 优先丢弃同一主题最早的命令，否则丢弃积压最多的通道中最早的命令
+                    victim = lane if lane else max(self._lanes.values(), key=len)
+                    dropped = victim.popleft()
+                    self._depth -= 1
+                    self.stats.dropped += 1
+                    logging.warning(f"命令队列已满，丢弃最早的命令: {dropped[0]} 主题: {dropped[1]}")
+                    break
+                # block：等待工作线程腾出空间
+                self._cond.wait()
+                if not self._running:
+                    return False
+            if dropped is not item:
+                lane.append(item)
+                self._depth += 1
+                if self._depth > self.stats.max_depth:
+                    self.stats.max_depth = self._depth
+                if key not in self._busy:
+                    self._busy.add(key)
+                    self._ready.append(key)
+                self._cond.notify_all()
+        if dropped is not None and self.on_drop:
+            self.on_drop(dropped[3])
+        return dropped is not item
+
+    def snapshot(self) -> dict:
+        """
+        English: Returns a copy of the current counters
+        中文: 返回当前统计数据
+        """
+        with self._cond:
+            return self.stats.snapshot(self._depth)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._ready:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                key = self._ready.popleft()
+                lane = self._lanes[key]
+                if not lane:
+                    # 通道中的命令已被 drop_oldest 丢弃
+                    self._busy.discard(key)
+                    continue
+                command, topic, enqueued, context = lane.popleft()
+                self._depth -= 1
+                # 唤醒可能在 block 策略下等待的提交者
+                self._cond.notify_all()
+            started = time.monotonic()
+            failed = False
+            try:
+                self.handler(command, topic)
+            except Exception as e:
+                failed = True
+                logging.error(f"执行命令出错: {command} 主题: {topic}, 错误: {e}")
+            finished = time.monotonic()
+            wait = started - enqueued
+            cost = finished - started
+            with self._cond:
+                stats = self.stats
+                stats.executed += 1
+                if failed:
+                    stats.failed += 1
+                stats.wait_total += wait
+                stats.exec_total += cost
+                if wait > stats.wait_max:
+                    stats.wait_max = wait
+                if cost > stats.exec_max:
+                    stats.exec_max = cost
+                # 同一通道还有命令则重新排到就绪队列末尾，保证各主题轮流执行
+                if lane:
+                    self._ready.append(key)
+                    self._cond.notify()
+                else:
+                    self._busy.discard(key)
+            logging.info(f"命令完成: {command} 主题: {topic}, 排队 {wait * 1000:.1f}ms, 执行 {cost * 1000:.1f}ms")
+            if self.on_complete:
+                self.on_complete(context, finished - enqueued, failed)
@@ -0,0 +1,432 @@
+"""
+命令处理：主题路由到处理函数、各类主题（程序、服务、电脑、亮度、音量、睡眠、媒体）的处理逻辑，
+以及 MQTT 消息从 on_message 到调度器的处理链路。
+
+所有后端（系统操作、亮度、音量、进程、服务等）都通过构造参数传入，main.py 传入真实后端，
+bench/bench_e2e.py 和 bench/replay.py 传入假后端，两者运行的是同一套处理代码。
+"""
+
+import logging
+import os
+import threading
+
+from history import MessageHistory
+from ramp import RampEngine, parse_level
+from routing import ApplicationRoute, BuiltinRoute, ServiceRoute
+
+
+class CommandHandlers:
+    """
+    English: Route handlers of every topic kind; process_command is what the dispatcher runs
+    中文: 各类主题的处理函数，调度器执行的是 process_command
+
+    参数:
+    - routes: 主题 -> 路由记录
+    - system: 系统操作后端（锁屏、重启、睡眠）
+    - brightness: 亮度后端，提供 set/get
+    - volume: 音量后端，提供 set/get 和 level
+    - process_registry: 程序主题启动的进程记录（ProcessRegistry）
+    - service_manager: 服务控制后端
+    - ramp_engine: 亮度/音量渐变引擎
+    - reconnect: 断线重连管理器，睡眠前主动断开连接
+    - notify: 发送通知的函数，签名为 notify(message)
+    - media_factory: 创建媒体控制后端的函数，第一次使用媒体主题时才调用，默认为 media.create_media
+    - python_pool: 可选的 Python 解释器池
+    - ramp_duration: 默认渐变时长（秒）
+    - service_timeout: 等待服务状态变化的最长时间（秒）
+
+    coalescer（滑块合并器）依赖调度器，而调度器依赖 process_command，所以在创建合并器之后再赋值给 coalescer 属性。
+    """
+
+    def __init__(
+        self,
+        routes: dict,
+        system,
+        brightness,
+        volume,
+        process_registry,
+        service_manager,
+        ramp_engine: RampEngine,
+        reconnect,
+        notify,
+        media_factory=None,
+        python_pool=None,
+        ramp_duration: float = 0.0,
+        service_timeout: float = 30.0,
+    ):
+        self.routes = routes
+        self.system = system
+        self.brightness = brightness
+        self.volume = volume
+        self.media_factory = media_factory
+        self.process_registry = process_registry
+        self.service_manager = service_manager
+        self.ramp_engine = ramp_engine
+        self.reconnect = reconnect
+        self.notify = notify
+        self.python_pool = python_pool
+        self.ramp_duration = ramp_duration
+        self.service_timeout = service_timeout
+        self.coalescer = None
+        self.media = None
+        self._media_lock = threading.Lock()
+        # 路由记录的 kind -> 处理函数
+        self.handlers = {
+            "application": self.handle_application,
+            "service": self.handle_service,
+            "Computer": self.handle_computer,
+            "screen": self.handle_screen,
+            "volume": self.handle_volume,
+            "sleep": self.handle_sleep,
+            "media": self.handle_media,
+        }
+
+    def process_command(self, command: str, topic: str) -> None:
+        """
+        English: Handles the command received from MQTT messages based on the given topic
+        中文: 根据主题处理从 MQTT 消息接收到的命令
+        """
+        logging.info(f"处理命令: {command} 主题: {topic}")
+
+        # 启动时已编译好路由表，一次字典查找即可找到处理函数
+        route = self.routes.get(topic)
+        if route is None:
+            # 未知主题
+            logging.error(f"未知主题: {topic}")
+            self.notify(f"未知主题: {topic}")
+            return
+        self.handlers[route.kind](route, command)
+
+    def notify_on_failure(self, future, action: str) -> None:
+        """
+        English: Notifies when the external command behind an action fails; returns immediately
+        中文: 操作对应的外部命令失败时发出通知，不等待命令结束
+        """
+        if future is None:
+            # 已通过 D-Bus 等方式在进程内完成
+            return
+
+        def done(future):
+            error = future.exception()
+            if error is None and future.result().ok:
+                return
+            logging.error(f"{action}失败: {error or future.result()}")
+            self.notify(f"{action}失败，详情请查看日志")
+
+        future.add_done_callback(done)
+
+    def set_brightness(self, topic: str, value: int, duration: float = None) -> None:
+        """
+        English: Sets the screen brightness to the specified value (0-100), ramping over duration seconds
+        中文: 设置屏幕亮度，取值范围为 0-100；duration 为渐变时长（秒），未指定时使用配置的 ramp_duration
+        """
+        if duration is None:
+            duration = self.ramp_duration
+        if not self.ramp_engine.active(topic) and not self.coalescer.should_apply(topic, value):
+            logging.info(f"亮度已是 {value}，跳过设置")
+            return
+        self.coalescer.forget(topic)
+        logging.info(f"设置亮度: {value}")
+        # 复用当前工作线程缓存的 WMI 连接，失败或显示器变化时才重建
+        # 渐变由共享定时器计时、在渐变线程中设置，同一主题的新命令会从当前值重新开始渐变
+        # 设置失败时异常交给调度器，命令记为失败，也不会发布新状态
+        self.ramp_engine.start(
+            topic,
+            value,
+            duration,
+            self.brightness.set,
+            self.brightness.get,
+            on_done=lambda target: self.coalescer.mark_applied(topic, target),
+        )
+
+    def set_volume(self, topic: str, value: int, duration: float = None) -> None:
+        """
+        English: Sets the system volume to the specified value (0-100), ramping over duration seconds
+        中文: 设置系统音量，取值范围为 0-100；duration 为渐变时长（秒），未指定时使用配置的 ramp_duration
+        """
+        if duration is None:
+            duration = self.ramp_duration
+        if not self.ramp_engine.active(topic):
+            if not self.coalescer.should_apply(topic, value):
+                logging.info(f"音量已是 {value}，跳过设置")
+                return
+            if self.volume.level == value:
+                # 记录的音量会随系统中的手动调整同步更新，相同则无需调用
+                logging.info(f"音量已是 {value}，跳过设置")
+                self.coalescer.mark_applied(topic, value)
+                return
+        self.coalescer.forget(topic)
+        # 复用当前工作线程缓存的音量接口，默认设备切换或调用失败时才重新获取
+        self.ramp_engine.start(
+            topic,
+            value,
+            duration,
+            self.volume.set,
+            self.volume.get,
+            on_done=lambda target: self.coalescer.mark_applied(topic, target),
+        )
+
+    def media_key(self, key: str) -> None:
+        """
+        English: Presses a media key, creating the media backend on first use
+        中文: 按下媒体键，第一次使用时才创建媒体控制后端
+        """
+        if self.media is None:
+            with self._media_lock:
+                if self.media is None:
+                    factory = self.media_factory
+                    if factory is None:
+                        from media import create_media as factory
+                    self.media = factory()
+                    logging.info(f"媒体控制后端: {self.media.name}")
+        self.media.press(key)
+
+    def handle_application(self, route: ApplicationRoute, command: str) -> None:
+        """
+        English: Starts or kills the program of an application topic
+        中文: 启动或终止程序/脚本主题对应的程序
+        """
+        directory = route.path
+        if command == "off":
+            process_name = os.path.basename(directory)
+            # 只结束本程序为该主题启动的进程（及其子进程）
+            count = self.process_registry.terminate(route.topic)
+            if count:
+                logging.info(f"已终止 {process_name} 启动的 {count} 个进程")
+                self.notify(f"已终止进程: {process_name}")
+                return
+            # 没有记录（例如程序是在主程序重启前或手动启动的）时不按进程名结束，以免误杀同名的其他进程
+            logging.info(f"没有记录 {route.topic} 启动的进程，跳过: {process_name}")
+            self.notify(f"没有本程序启动的 {process_name} 进程")
+        elif command == "on":
+            if not directory or not os.path.isfile(directory):
+                logging.error(f"启动失败，文件不存在: {directory}")
+                self.notify(f"启动失败，文件不存在: {directory}")
+                return
+            logging.info(f"启动: {directory}")
+            process = None
+            if self.python_pool is not None and directory.lower().endswith(".py"):
+                # 在预热的解释器中运行，没有空闲的工作进程时按原方式启动
+                process = self.python_pool.run(route.topic, directory)
+            if process is None:
+                process = self.process_registry.launch(route.topic, directory)
+            logging.info(f"已启动 {directory}，PID: {process.pid}")
+            self.notify(f"启动: {directory}")
+
+    def handle_service(self, route: ServiceRoute, command: str) -> None:
+        """
+        English: Starts or stops the service of a service topic and waits for the state change
+        中文: 启动或停止服务主题对应的服务，并等待状态变化完成
+        """
+        serve_name = route.service
+        if command == "off":
+            result = self.service_manager.stop(serve_name, timeout=self.service_timeout)
+            if not result.ok:
+                logging.error(f"关闭 {serve_name} 失败: {result}")
+                self.notify(f"关闭 {serve_name} 失败: {result.error}")
+            elif not result.changed:
+                logging.info(f"{serve_name} 还没有运行")
+                self.notify(f"{serve_name} 还没有运行")
+            else:
+                logging.info(f"成功关闭 {serve_name}")
+                self.notify(f"成功关闭 {serve_name}")
+        elif command == "on":
+            result = self.service_manager.start(serve_name, timeout=self.service_timeout)
+            if not result.ok:
+                logging.error(f"启动 {serve_name} 失败: {result}")
+                self.notify(f"启动 {serve_name} 失败: {result.error}")
+            elif not result.changed:
+                logging.info(f"{serve_name} 已经在运行")
+                self.notify(f"{serve_name} 已经在运行")
+            else:
+                logging.info(f"成功启动 {serve_name}")
+                self.notify(f"成功启动 {serve_name}")
+
+    def handle_computer(self, route: BuiltinRoute, command: str) -> None:
+        """
+        English: Locks (on) or reboots (off) the computer
+        中文: 电脑开关机控制：锁屏（on）或重启（off）
+        """
+        if command == "on":
+            logging.info("执行锁屏操作")
+            self.notify_on_failure(self.system.lock(), "锁屏")
+        elif command == "off":
+            logging.info("60秒后执行重启操作")
+            self.notify_on_failure(self.system.reboot(60), "重启")
+            self.notify("电脑将在60秒后重启")
+
+    def handle_screen(self, route: BuiltinRoute, command: str) -> None:
+        """
+        English: Screen brightness control
+        中文: 屏幕亮度控制
+        """
+        if command == "off":
+            logging.info("执行亮度最小化操作")
+            self.set_brightness(route.topic, 0)
+        elif command == "on":
+            logging.info("执行亮度最大化操作")
+            self.set_brightness(route.topic, 100)
+        elif command.startswith("on#"):
+            try:
+                # 解析百分比值，可带渐变时长后缀，例如 on#80@2
+                brightness, duration = parse_level(command)
+            except ValueError:
+                logging.error("亮度值无效")
+                self.notify("亮度值无效")
+                return
+            try:
+                self.set_brightness(route.topic, brightness, duration)
+            except Exception as e:
+                logging.error(f"设置亮度时出错: {e}")
+                self.notify(f"设置亮度时发生未知错误，请查看日志")
+                # 交给调度器记为失败，不发布新状态
+                raise
+        else:
+            logging.error(f"未知的亮度控制命令: {command}")
+            self.notify(f"未知的亮度控制命令: {command}")
+
+    def handle_volume(self, route: BuiltinRoute, command: str) -> None:
+        """
+        English: System volume control
+        中文: 系统音量控制
+        """
+        if command == "off":
+            logging.info("执行音量最小化操作")
+            self.set_volume(route.topic, 0)
+        elif command == "on":
+            logging.info("执行音量最大化操作")
+            self.set_volume(route.topic, 100)
+        elif command == "pause":
+            # 播放/暂停
+            logging.info("执行静音操作")
+            self.set_volume(route.topic, 0)
+        elif command.startswith("on#"):
+            try:
+                # 解析百分比值，可带渐变时长后缀，例如 on#30@1.5
+                volume_value, duration = parse_level(command)
+            except ValueError:
+                logging.error("音量值无效")
+                self.notify("音量值无效")
+                return
+            logging.info(f"设置音量: {volume_value}")
+            try:
+                self.set_volume(route.topic, volume_value, duration)
+            except Exception as e:
+                logging.error(f"设置音量时出错: {e}")
+                self.notify(f"设置音量时发生未知错误，请查看日志")
+                # 交给调度器记为失败，不发布新状态
+                raise
+        else:
+            logging.error(f"未知的音量控制命令: {command}")
+            self.notify(f"未知的音量控制命令: {command}")
+
+    def handle_sleep(self, route: BuiltinRoute, command: str) -> None:
+        """
+        English: Suspends the computer
+        中文: 睡眠控制
+        """
+        if command == "off":
+            logging.info("执行关闭睡眠模式操作")
+            self.notify("当前还没有进入睡眠模式哦！")
+        elif command == "on":
+            logging.info("执行开启睡眠模式操作")
+            # 睡眠前主动断开MQTT，唤醒后由 ResumeDetector 触发立即重连
+            self.reconnect.pause("即将进入睡眠")
+            self.notify_on_failure(self.system.suspend(), "睡眠")
+
+    def handle_media(self, route: BuiltinRoute, command: str) -> None:
+        """
+        English: Media playback control (exposed as a curtain device)
+        中文: 媒体控制（作为窗帘设备）
+        """
+        try:
+            if command == "off":
+                # 下一曲
+                logging.info("执行下一曲操作")
+                self.media_key('nexttrack')
+            elif command == "on":
+                # 上一曲
+                logging.info("执行上一曲操作")
+                self.media_key('prevtrack')
+            elif command == "pause":
+                # 播放/暂停
+                logging.info("执行播放/暂停操作")
+                self.media_key('playpause')
+            elif command.startswith("on#"):
+                # 解析百分比值
+                value = int(command.split("#")[1])
+                if value <= 33:
+                    # 1-33：下一曲
+                    logging.info(f"执行下一曲操作（百分比:{value}）")
+                    self.media_key('nexttrack')
+                elif value <= 66:
+                    # 34-66：播放/暂停
+                    logging.info(f"执行播放/暂停操作（百分比:{value}）")
+                    self.media_key('playpause')
+                else:
+                    # 67-100：上一曲
+                    logging.info(f"执行上一曲操作（百分比:{value}）")
+                    self.media_key('prevtrack')
+            else:
+                logging.error(f"未知的媒体控制命令: {command}")
+                self.notify(f"未知的媒体控制命令: {command}")
+        except Exception as e:
+            logging.error(f"媒体控制执行失败: {e}")
+            self.notify(f"媒体控制执行失败，详情请查看日志")
+            raise
+
+
+class MessagePipeline:
+    """
+    English: The path of an MQTT message: trace -> history -> slider coalescing -> dispatcher -> completion
+    中文: MQTT 消息的处理链路：录制 -> 消息记录 -> 滑块合并 -> 调度器 -> 完成后记录结果并同步状态
+
+    参数:
+    - history: 消息记录
+    - reconnect: 断线重连管理器，用于发布状态（离线时缓存）
+    - tracer: 可选的消息轨迹录制器
+    - state_publish: 命令完成后是否把新状态发布到 <主题>/set
+
+    coalescer 和 dispatcher 在创建之后赋值：调度器的回调就是本类的 on_complete / on_drop。
+    """
+
+    def __init__(self, history: MessageHistory, reconnect, tracer=None, state_publish: bool = False):
+        self.history = history
+        self.reconnect = reconnect
+        self.tracer = tracer
+        self.state_publish = state_publish
+        self.coalescer = None
+        self.dispatcher = None
+
+    def on_message(self, client, userdata, message) -> None:
+        """
+        English: Callback when an MQTT message is received
+        中文: MQTT接收到消息时的回调函数
+        """
+        if self.tracer is not None:
+            self.tracer.record(message.topic, message.payload)
+        command = message.payload.decode()
+        logging.info(f"'{message.topic}' 主题收到 '{command}'")
+        entry = self.history.record(message.topic, command)
+        # 网络线程只负责收发，命令交给调度器的工作线程执行
+        # 亮度/音量的滑块命令先经过合并，窗口内只执行最新的值
+        if not self.coalescer.offer(command, message.topic, entry):
+            self.dispatcher.submit(command, message.topic, entry)
+
+    def on_complete(self, entry, latency: float, failed: bool) -> None:
+        """
+        English: Records the result and, if enabled, publishes the new state to <topic>/set
+        中文: 记录处理结果；启用状态同步时把新状态发布到 <主题>/set
+        """
+        if entry is None:
+            return
+        self.history.complete(entry, failed)
+        if self.state_publish and not failed:
+            # 巴法云约定：发布到 主题/set 时不会推送给自己，离线时缓存到重连后补发
+            self.reconnect.publish(f"{entry.topic}/set", entry.payload)
+
+    def on_drop(self, entry) -> None:
+        self.history.drop(entry)
+
+    def on_merged(self, entry) -> None:
+        self.history.drop(entry, "merged")
@@ -0,0 +1,157 @@
+"""
+消息记录：固定容量的环形缓冲区，只保留最近 N 条消息，
+另外按主题累计计数和耗时，长期运行也不会无限占用内存。
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+
+class MessageRecord:
+    """
+    English: One received message with its handling latency
+    中文: 一条收到的消息及其处理耗时
+    """
+
+    __slots__ = ("topic", "payload", "received_at", "received_mono", "latency", "status")
+
+    def __init__(self, topic: str, payload: str, received_at: float, received_mono: float):
+        self.topic = topic
+        self.payload = payload
+        self.received_at = received_at
+        self.received_mono = received_mono
+        # 处理完成前为 None
+        self.latency = None
+        self.status = "pending"
+
+    def to_dict(self) -> dict:
+        return {
+            "topic": self.topic,
+            "payload": self.payload,
+            "received_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.received_at))
+            + f".{int(self.received_at % 1 * 1000):03d}",
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 3),
+            "status": self.status,
+        }
+
+
+class TopicStats:
+    """
+    English: Aggregate counters of one topic
+    中文: 单个主题的累计统计
+    """
+
+    __slots__ = ("received", "handled", "failed", "dropped", "latency_total", "latency_max", "last_received")
+
+    def __init__(self):
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.last_received = 0.0
+
+    def to_dict(self) -> dict:
+        done = self.handled or 1
+        return {
+            "received": self.received,
+            "handled": self.handled,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "latency_avg_ms": round(self.latency_total / done * 1000, 3),
+            "latency_max_ms": round(self.latency_max * 1000, 3),
+            "last_received": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last_received)),
+        }
+
+
+class MessageHistory:
+    """
+    English: Ring buffer of the last N messages plus per-topic counters
+    中文: 保存最近 N 条消息的环形缓冲区，以及按主题的累计统计
+
+    参数:
+    - capacity: 保留的消息条数
+    """
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = max(1, int(capacity))
+        self.total = 0
+        self._records = deque(maxlen=self.capacity)
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def record(self, topic: str, payload: str) -> MessageRecord:
+        """
+        English: Records a received message and returns its record
+        中文: 记录收到的消息并返回该记录
+        """
+        now = time.time()
+        entry = MessageRecord(topic, payload, now, time.monotonic())
+        with self._lock:
+            self.total += 1
+            self._records.append(entry)
+            stats = self._topics.get(topic)
+            if stats is None:
+                stats = self._topics[topic] = TopicStats()
+            stats.received += 1
+            stats.last_received = now
+        return entry
+
+    def complete(self, entry: MessageRecord, failed: bool = False) -> None:
+        """
+        English: Marks a message as handled, latency is measured from when it was received
+        中文: 标记消息已处理完成，耗时从收到消息时开始计算（包含排队与合并等待）
+        """
+        latency = time.monotonic() - entry.received_mono
+        with self._lock:
+            entry.latency = latency
+            entry.status = "failed" if failed else "done"
+            stats = self._topics.get(entry.topic)
+            if stats is None:
+                return
+            stats.handled += 1
+            if failed:
+                stats.failed += 1
+            stats.latency_total += latency
+            if latency > stats.latency_max:
+                stats.latency_max = latency
+
+    def drop(self, entry: MessageRecord, reason: str = "dropped") -> None:
+        """
+        English: Marks a message as dropped (queue overflow or merged)
+        中文: 标记消息被丢弃（队列溢出或被合并）
+        """
+        with self._lock:
+            entry.status = reason
+            stats = self._topics.get(entry.topic)
+            if stats is not None:
+                stats.dropped += 1
+
+    def summary(self) -> dict:
+        """
+        English: Returns per-topic counters
+        中文: 返回按主题的统计
+        """
+        with self._lock:
+            return {
+                "total": self.total,
+                "topics": {topic: stats.to_dict() for topic, stats in self._topics.items()},
+            }
+
+    def dump(self, path: str) -> None:
+        """
+        English: Writes the buffered messages and counters to a JSON file
+        中文: 将缓冲区中的消息和统计写入 JSON 文件
+        """
+        with self._lock:
+            records = [entry.to_dict() for entry in self._records]
+        data = self.summary()
+        data["capacity"] = self.capacity
+        data["recent"] = records
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        logging.info(f"消息记录已导出: {path}（{len(records)} 条）")
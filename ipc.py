@@ -0,0 +1,187 @@
+"""
+本地控制通道：主程序监听一个只在本机可用的端点，托盘通过它查询状态、请求正常退出、重新加载配置和读取统计，
+不再需要写批处理、UAC 提权和 taskkill 强制结束（强制结束时 MQTT 连接不会正常断开）。
+
+- Linux 使用 logs 目录下的 Unix 套接字（权限 600）；Windows 使用 127.0.0.1 上的随机端口：
+  主程序通常以管理员权限运行，它创建的命名管道默认不允许普通权限的托盘写入
+- 连接时用随机密钥做 HMAC 挑战认证（multiprocessing.connection），地址和密钥写在 logs/<名称>.ipc，
+  只有能读取 logs 目录的用户才能连接
+- 端点文件记录主程序的 PID，客户端先用 discovery.lookup 校验进程仍在运行，不会连到崩溃后残留的旧端点
+- 请求和响应都是 dict：{"cmd": "status"} -> {"ok": True, ...}；未知命令返回 {"ok": False, "error": ...}
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+import discovery
+from system import IS_WINDOWS
+
+
+def endpoint_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.ipc")
+
+
+class ControlServer:
+    """
+    English: Local authenticated control endpoint; handlers map a command name to func(request) -> dict
+    中文: 本机控制端点（带认证），handlers 把命令名映射到处理函数 func(request) -> dict
+
+    参数:
+    - directory: 端点文件所在目录（logs 目录）
+    - name: 组件名称，与 discovery 的进程记录名称一致
+    """
+
+    def __init__(self, directory: str, name: str = "RC-main", handlers: dict = None):
+        self.directory = directory
+        self.name = name
+        self.handlers = dict(handlers or {})
+        self.handled = 0
+        self.rejected = 0
+        self._listener = None
+        self._socket_path = None
+        self._closed = False
+
+    def register(self, command: str, handler) -> None:
+        self.handlers[command] = handler
+
+    def start(self) -> "ControlServer":
+        authkey = secrets.token_bytes(32)
+        if IS_WINDOWS:
+            self._listener = Listener(("127.0.0.1", 0), family="AF_INET", authkey=authkey)
+            address = list(self._listener.address)
+            family = "AF_INET"
+        else:
+            self._socket_path = os.path.join(self.directory, f"{self.name}.sock")
+            # 持有单实例锁时才会启动，残留的套接字文件一定属于已退出的旧进程
+            try:
+                os.remove(self._socket_path)
+            except FileNotFoundError:
+                pass
+            self._listener = Listener(self._socket_path, family="AF_UNIX", authkey=authkey)
+            os.chmod(self._socket_path, 0o600)
+            address = self._socket_path
+            family = "AF_UNIX"
+        record = {"pid": os.getpid(), "family": family, "address": address, "authkey": authkey.hex()}
+        path = endpoint_path(self.directory, self.name)
+        temp = f"{path}.{os.getpid()}.tmp"
+        # 端点文件包含密钥，只允许当前用户读取（Windows 上继承 logs 目录的权限）
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(temp, path)
+        threading.Thread(target=self._serve, name="RC-ipc", daemon=True).start()
+        logging.info(f"本地控制通道已启动: {family} {address}")
+        return self
+
+    def _serve(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except AuthenticationError:
+                self.rejected += 1
+                logging.warning("本地控制通道拒绝了一个未通过认证的连接")
+                continue
+            except OSError:
+                if self._closed:
+                    return
+                logging.exception("本地控制通道接受连接失败")
+                time.sleep(0.5)
+                continue
+            threading.Thread(target=self._handle, args=(connection,), name="RC-ipc-conn", daemon=True).start()
+
+    def _handle(self, connection) -> None:
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                connection.send(self._dispatch(request))
+        except Exception:
+            logging.exception("处理本地控制请求时出错")
+        finally:
+            connection.close()
+
+    def _dispatch(self, request) -> dict:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "请求格式错误"}
+        command = request.get("cmd")
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"未知命令: {command}"}
+        self.handled += 1
+        logging.info(f"收到本地控制命令: {command}")
+        try:
+            reply = handler(request) or {}
+        except Exception as e:
+            logging.exception(f"执行本地控制命令 {command} 失败")
+            return {"ok": False, "error": str(e)}
+        reply.setdefault("ok", True)
+        return reply
+
+    def close(self) -> None:
+        self._closed = True
+        try:
+            self._listener.close()
+        except (AttributeError, OSError):
+            pass
+        # 只删除仍属于本进程的端点文件
+        path = endpoint_path(self.directory, self.name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if json.load(f).get("pid") == os.getpid():
+                    os.remove(path)
+        except (OSError, ValueError):
+            pass
+        if self._socket_path:
+            try:
+                os.remove(self._socket_path)
+            except OSError:
+                pass
+
+
+def request(directory: str, command: str, name: str = "RC-main", timeout: float = 3.0, **params):
+    """
+    English: Sends one command to the control endpoint of name; returns the reply dict, or None if unavailable
+    中文: 向组件的控制端点发送一条命令，返回响应 dict；端点不可用（未运行、旧版本、超时等）时返回 None
+
+    参数:
+    - command: status、stop、reload、stats 等命令名
+    - timeout: 等待响应的最长时间（秒）
+    - params: 随请求一起发送的其他字段
+    """
+    path = endpoint_path(directory, name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        address = record["address"]
+        if record["family"] == "AF_INET":
+            address = tuple(address)
+        authkey = bytes.fromhex(record["authkey"])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning(f"读取控制端点 {path} 失败: {e}")
+        return None
+    # 端点所属的进程必须仍在运行，避免连到崩溃后残留的地址（Windows 上端口可能已被其他程序占用）
+    proc = discovery.lookup(directory, name)
+    if proc is None or proc.pid != record.get("pid"):
+        return None
+    started = time.perf_counter()
+    try:
+        with Client(address, family=record["family"], authkey=authkey) as connection:
+            connection.send(dict(params, cmd=command))
+            if not connection.poll(timeout):
+                logging.warning(f"控制命令 {command} 在 {timeout} 秒内没有响应")
+                return None
+            reply = connection.recv()
+    except (OSError, EOFError, AuthenticationError) as e:
+        logging.warning(f"连接控制端点失败: {e}")
+        return None
+    logging.info(f"控制命令 {command} 往返耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+    return reply
@@ -3,6 +3,8 @@
 pyinstaller -F -n RC-main --windowed --icon=res\\icon.ico --add-data "res\\icon.ico;."  main.py
 程序名：RC-main.exe
 运行用户：当前登录用户（通过计划任务启动）
+
+Linux 上直接运行 python main.py：不加载托盘、Tk 和通知相关的模块，适合无界面的主机。
 """
 
 #导入各种必要的模块
@@ -10,67 +12,75 @@ import io
 import paho.mqtt.client as mqtt
 import os
 import psutil
-import pystray
-from PIL import Image
-import wmi
-from win11toast import notify
 import json
 import logging
 from logging.handlers import RotatingFileHandler
-from tkinter import messagebox
 import sys
 import threading
 import subprocess
 import time
-import ctypes
+import signal
 import socket
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-import pyautogui
-from pyautogui import press as pyautogui_press
+from system import IS_WINDOWS, InstanceLock, get_system
+from commands import CommandRunner
+
+if IS_WINDOWS:
+    # 托盘、通知和对话框只在 Windows 上加载，Linux 无界面运行时不导入
+    import pystray
+    from PIL import Image
+    from win11toast import notify
+    from tkinter import messagebox
+from dispatcher import CommandDispatcher
+from coalescer import SliderCoalescer
+from routing import any_theme_enabled, build_routes, custom_theme_indices
+from subscriptions import SubscriptionTracker
+from reconnect import Backoff, OfflineBuffer, ReconnectManager, watch_network_changes
+from resume import ResumeDetector
+from history import MessageHistory
+from recording import TraceWriter
+from brightness import create_brightness
+from audio import create_volume
+from services import create_service_manager
+from processes import ProcessRegistry
+from pypool import PythonPool
+import discovery
+import procsnap
+from ipc import ControlServer
+from scheduler import TimerScheduler
+from ramp import RampEngine
+from handlers import CommandHandlers, MessagePipeline
 
 BANBEN = "V2.1.0"
+started_at = time.monotonic()
+restart_requested = False
+control_server = None
+# 进程退出码：用户或托盘请求的退出为 0，异常退出为 1
+exit_code = 0
 
-# 禁用 PyAutoGUI 安全模式，确保即使鼠标在屏幕角落也能执行命令
-pyautogui.FAILSAFE = False
-
-# 创建一个命名的互斥体
-mutex = ctypes.windll.kernel32.CreateMutexW(None, False, "RC-main")
-# 检查互斥体是否已经存在
-if ctypes.windll.kernel32.GetLastError() == 183:
-    messagebox.showerror("错误", "应用程序已在运行。")
-    sys.exit()
 
-"""
-执行系统命令，并在超时后终止命令。
+def show_error(title: str, message: str) -> None:
+    """
+    English: Shows an error dialog on Windows; only logs on Linux where there is no desktop
+    中文: Windows 上弹出错误对话框；Linux 无界面运行时只记录日志
+    """
+    if IS_WINDOWS:
+        messagebox.showerror(title, message)
+    else:
+        logging.error(f"{title}: {message}")
 
-参数:
-- cmd: 要执行的命令（字符串或列表）
-- timeout: 命令执行的超时时间（秒，默认为30秒）
 
-返回值:
-- 命令终止的返回码
-"""
+# 共享定时器线程：滑块合并窗口、亮度/音量渐变的计时和外部命令的超时都在这一个线程上执行，渐变的设置交给渐变线程
+timer = TimerScheduler()
 
+# 系统操作后端（锁屏、重启、睡眠、进程），外部命令异步执行
+command_runner = CommandRunner(timer)
+system = get_system(command_runner)
 
-def execute_command(cmd: str, timeout: int = 30) -> int:
-    """
-    English: Executes a system command with an optional timeout, terminating the command if it exceeds the timeout
-    中文: 使用可选超时时间执行系统命令，如果超时则终止命令
-    """
-    process = subprocess.Popen(cmd, shell=True)
-    process.poll()
-    if timeout:
-        remaining = timeout
-        while process.poll() is None and remaining > 0:
-            logging.info(f"命令正在运行: {cmd}")
-            time.sleep(1)
-            remaining -= 1
-        if remaining == 0 and process.poll() is None:
-            logging.warning(f"命令超时，正在终止: {cmd}")
-            process.kill()
-    return process.wait()
-
+# 单实例锁：Windows 上为命名互斥体，Linux 上为加锁的文件
+instance_lock = InstanceLock("RC-main")
+if not instance_lock.acquire():
+    show_error("错误", "应用程序已在运行。")
+    sys.exit()
 
 """
 MQTT订阅成功时的回调函数。
@@ -94,6 +104,7 @@ def on_subscribe(client, userdata, mid, reason_code_list, properties=None):
             logging.error(f"订阅失败:{reason_code_list}")
         else:
             logging.info(f"使用代码发送订阅申请成功：{mid}")
+    subscriptions.acknowledge(mid)
 
 
 """
@@ -108,7 +119,7 @@ MQTT取消订阅时的回调函数。
 """
 
 
-def on_unsubscribe(client, userdata: list, mid: int, reason_code_list: list, properties) -> None:
+def on_unsubscribe(client, userdata: MessageHistory, mid: int, reason_code_list: list, properties) -> None:
     """
     English: Callback when MQTT unsubscription completes
     中文: MQTT取消订阅后回调函数
@@ -120,55 +131,14 @@ def on_unsubscribe(client, userdata: list, mid: int, reason_code_list: list, pro
     client.disconnect()
 
 
-"""
-设置屏幕亮度。
-
-参数:
-- value: 亮度值（0-100）
-"""
-
-
-def set_brightness(value: int) -> None:
-    """
-    English: Sets the screen brightness to the specified value (0-100)
-    中文: 设置屏幕亮度，取值范围为 0-100
-    """
-    try:
-        logging.info(f"设置亮度: {value}")
-        wmi.WMI(namespace="wmi").WmiMonitorBrightnessMethods()[0].WmiSetBrightness(
-            value, 0
-        )
-    except Exception as e:
-        logging.error(f"无法设置亮度: {e}")
-
-
-"""
-设置音量。
-
-参数:
-- value: 音量值（0-100）
-"""
-
-
-def set_volume(value: int) -> None:
-    """
-    English: Sets the system volume to the specified value (0-100)
-    中文: 设置系统音量，取值范围为 0-100
-    """
-    devices = AudioUtilities.GetSpeakers()
-    interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-    volume = ctypes.cast(interface, ctypes.POINTER(IAudioEndpointVolume))
-
-    # 控制音量在 0.0 - 1.0 之间
-    volume.SetMasterVolumeLevelScalar(value / 100, None)  # type: ignore
-
-
 def notify_in_thread(message: str) -> None:
     """
     English: Displays a Windows toast notification in a separate thread
-    中文: 在单独线程中显示 Windows toast 通知
+    中文: 在单独线程中显示 Windows toast 通知（Linux 上只记录日志）
     """
     logging.info(f"通知: {message}")
+    if not IS_WINDOWS:
+        return
     def notify_message():
         notify(message)
 
@@ -177,223 +147,16 @@ def notify_in_thread(message: str) -> None:
     thread.start()
 
 
-"""
-根据接收到的命令和主题来处理相应的操作。
-
-参数:
-- command: 接收到的命令
-- topic: 命令的主题
-"""
-
-
-def process_command(command: str, topic: str) -> None:
-    """
-    English: Handles the command received from MQTT messages based on the given topic
-    中文: 根据主题处理从 MQTT 消息接收到的命令
-    """
-    logging.info(f"处理命令: {command} 主题: {topic}")
-
-    # 先判断应用程序或服务类型主题
-    for application, directory in applications:
-        if topic == application:
-            if command == "off":
-                process_name = os.path.basename(directory)
-                logging.info(f"尝试终止进程: {process_name}")
-                notify_in_thread(f"尝试终止进程: {process_name}")
-                result = subprocess.run(
-                    ["taskkill", "/F", "/IM", process_name],
-                    capture_output=True,
-                    text=True,
-                )
-                logging.info(result.stdout)
-            elif command == "on":
-                if not directory or not os.path.isfile(directory):
-                    logging.error(f"启动失败，文件不存在: {directory}")
-                    notify_in_thread(f"启动失败，文件不存在: {directory}")
-                    return
-                logging.info(f"启动: {directory}")
-                subprocess.Popen(directory)
-                notify_in_thread(f"启动: {directory}")
-            return
-    
-    def check_service_status(service_name):
-        result = subprocess.run(["sc", "query", service_name], capture_output=True, text=True)
-        if "RUNNING" in result.stdout:
-            logging.info(f"服务 {service_name} 正在运行")
-            return "running"
-        elif "STOPPED" in result.stdout:
-            logging.info(f"服务 {service_name} 已停止")
-            return "stopped"
-        else:
-            logging.error(f"无法获取服务{serve_name}的状态:{result.stderr}")
-            return "unknown"
-    
-    for serve, serve_name in serves:
-        if topic == serve:
-            if command == "off":
-                status = check_service_status(serve_name)
-                if status == "unknown":
-                    logging.error(f"无法获取服务{serve_name}的状态")
-                    notify_in_thread(f"无法获取 {serve_name} 的状态,详情请查看日志")
-                if status == "stopped":
-                    logging.info(f"{serve_name} 还没有运行")
-                    notify_in_thread(f"{serve_name} 还没有运行")
-                else:
-                    result = subprocess.run(["sc", "stop", serve_name], shell=True)
-                    if result.returncode == 0:
-                        logging.info(f"成功关闭 {serve_name}")
-                        notify_in_thread(f"成功关闭 {serve_name}")
-                    else:
-                        logging.error(f"关闭 {serve_name} 失败")
-                        logging.error(result.stderr)
-                        notify_in_thread(f"关闭 {serve_name} 失败")
-            elif command == "on":
-                status = check_service_status(serve_name)
-                if status == "unknown":
-                    logging.error(f"无法获取服务{serve_name}的状态")
-                    notify_in_thread(f"无法获取 {serve_name} 的状态,详情请查看日志")
-                if status == "running":
-                    logging.info(f"{serve_name} 已经在运行")
-                    notify_in_thread(f"{serve_name} 已经在运行")
-                else:
-                    result = subprocess.run(["sc", "start", serve_name], shell=True)
-                    if result.returncode == 0:
-                        logging.info(f"成功启动 {serve_name}")
-                        notify_in_thread(f"成功启动 {serve_name}")
-                    else:
-                        logging.error(f"启动 {serve_name} 失败")
-                        logging.error(result.stderr)
-                        notify_in_thread(f"启动 {serve_name} 失败")
-            return
-
-    # 若不匹配应用程序或服务，再判断是否为内置主题
-    if topic == Computer:
-        # 电脑开关机控制
-        if command == "on":
-            logging.info("执行锁屏操作")
-            ctypes.windll.user32.LockWorkStation()
-        elif command == "off":
-            logging.info("60秒后执行重启操作")
-            execute_command("shutdown -r -t 60")
-            notify_in_thread("电脑将在60秒后重启")
-    elif topic == screen:
-        # 屏幕亮度控制
-        if command == "off":
-            logging.info("执行亮度最小化操作")
-            set_brightness(0)
-        elif command == "on":
-            logging.info("执行亮度最大化操作")
-            set_brightness(100)
-        elif command.startswith("on#"):
-            try:
-                # 解析百分比值
-                brightness = int(command.split("#")[1])
-                logging.info(f"设置亮度: {brightness}")
-                set_brightness(brightness)
-            except ValueError:
-                logging.error("亮度值无效")
-                notify_in_thread("亮度值无效")
-            except Exception as e:
-                logging.error(f"设置亮度时出错: {e}")
-                notify_in_thread(f"设置亮度时发生未知错误，请查看日志")
-        else:
-            logging.error(f"未知的亮度控制命令: {command}")
-            notify_in_thread(f"未知的亮度控制命令: {command}")
-    elif topic == volume:
-        # 音量控制
-        if command == "off":
-            logging.info("执行音量最小化操作")
-            set_volume(0)
-        elif command == "on":
-            logging.info("执行音量最大化操作")
-            set_volume(100)
-        elif command == "pause":
-            # 播放/暂停
-            logging.info("执行静音操作")
-            set_volume(0)
-        elif command.startswith("on#"):
-            try:
-                # 解析百分比值
-                volume_value = int(command.split("#")[1])
-                logging.info(f"设置音量: {volume_value}")
-                set_volume(volume_value)
-            except ValueError:
-                logging.error("音量值无效")
-                notify_in_thread("音量值无效")
-            except Exception as e:
-                logging.error(f"设置音量时出错: {e}")
-                notify_in_thread(f"设置音量时发生未知错误，请查看日志")
-        else:
-            logging.error(f"未知的音量控制命令: {command}")
-            notify_in_thread(f"未知的音量控制命令: {command}")
-    elif topic == sleep:
-        if command == "off":
-            logging.info("执行关闭睡眠模式操作")
-            notify_in_thread("当前还没有进入睡眠模式哦！")
-        elif command == "on":
-            logging.info("执行开启睡眠模式操作")
-            execute_command("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
-    elif topic == media:
-        # 媒体控制（作为窗帘设备）
-        try:
-            if command == "off":
-                # 下一曲
-                logging.info("执行下一曲操作")
-                pyautogui_press('nexttrack')
-            elif command == "on":
-                # 上一曲
-                logging.info("执行上一曲操作")
-                pyautogui_press('prevtrack')
-            elif command == "pause":
-                # 播放/暂停
-                logging.info("执行播放/暂停操作")
-                pyautogui_press('playpause')
-            elif command.startswith("on#"):
-                    # 解析百分比值
-                    value = int(command.split("#")[1])
-                    if value <= 33:
-                        # 1-33：下一曲
-                        logging.info(f"执行下一曲操作（百分比:{value}）")
-                        pyautogui_press('nexttrack')
-                    elif value <= 66:
-                        # 34-66：播放/暂停
-                        logging.info(f"执行播放/暂停操作（百分比:{value}）")
-                        pyautogui_press('playpause')
-                    else:
-                        # 67-100：上一曲
-                        logging.info(f"执行上一曲操作（百分比:{value}）")
-                        pyautogui_press('prevtrack')
-            else:
-                logging.error(f"未知的媒体控制命令: {command}")
-                notify_in_thread(f"未知的媒体控制命令: {command}")
-        except Exception as e:
-            logging.error(f"媒体控制执行失败: {e}")
-            notify_in_thread(f"媒体控制执行失败，详情请查看日志")
-    else:
-        # 未知主题
-        logging.error(f"未知主题: {topic}")
-        notify_in_thread(f"未知主题: {topic}")
-
-
-"""
-MQTT接收到消息时的回调函数。
-
-参数:
-- client: MQTT客户端实例
-- userdata: 用户数据
-- message: 接收到的消息
-"""
-
-
-def on_message(client, userdata: list, message) -> None:
+def dump_history() -> None:
     """
-    English: Callback when an MQTT message is received
-    中文: MQTT接收到消息时的回调函数
+    English: Writes the recent messages and per-topic counters to logs/messages.json
+    中文: 将最近的消息记录和按主题统计导出到 logs/messages.json
     """
-    userdata.append(message.payload)
-    command = message.payload.decode()
-    logging.info(f"'{message.topic}' 主题收到 '{command}'")
-    process_command(command, message.topic)
+    path = os.path.join(logs_dir, "messages.json")
+    try:
+        history.dump(path)
+    except Exception as e:
+        logging.error(f"导出消息记录失败: {e}")
 
 
 """
@@ -408,7 +171,7 @@ MQTT连接时的回调函数。
 """
 
 
-def on_connect(client, userdata: list, flags: dict, reason_code, properties=None) -> None:
+def on_connect(client, userdata: MessageHistory, flags: dict, reason_code, properties=None) -> None:
     # 兼容 int 和 ReasonCode 类型
     try:
         is_fail = reason_code.is_failure
@@ -419,20 +182,52 @@ def on_connect(client, userdata: list, flags: dict, reason_code, properties=None
         notify_in_thread(
             f"连接MQTT失败: {reason_code}. 重新连接中..."
         )
-        logging.error(f"连接失败: {reason_code}. loop_forever() 将重试连接")
+        logging.error(f"连接失败: {reason_code}. 将按退避策略重试连接")
     else:
         notify_in_thread(f"MQTT成功连接至{broker}")
         logging.info(f"连接到 {broker}")
-        for key, value in config.items():
-            if key.endswith("_checked") and value == 1:
-                topic_key = key.replace("_checked", "")
-                topic = config.get(topic_key)
-                if topic:
-                    client.subscribe(topic)
-                    logging.info(f'订阅主题: "{topic}"')
+        # 所有启用的主题合并到尽量少的 SUBSCRIBE 报文中，重连后一次往返即可恢复
+        topics = list(routes)
+        logging.info(f"订阅主题: {topics}")
+        subscriptions.subscribe_all(client, topics)
+        reconnect.on_connected()
+        if state_publish:
+            publish_application_states()
+
+
+"""
+MQTT断开连接时的回调函数。
+
+参数:
+- client: MQTT客户端实例
+- userdata: 用户数据
+- flags: 断开标志
+- reason_code: 断开原因
+- properties: 属性
+"""
+
+
+def on_disconnect(client, userdata: MessageHistory, flags, reason_code, properties=None) -> None:
+    """
+    English: Callback when the MQTT connection is closed
+    中文: MQTT连接断开时的回调函数
+    """
+    logging.warning(f"与 {broker} 的连接已断开: {reason_code}")
+    reconnect.on_disconnected()
+
+
+def publish_application_states() -> None:
+    """
+    English: Publishes whether each application topic's launched process is still running
+    中文: 发布每个程序主题启动的进程是否仍在运行（on/off），用于重连后同步状态
+    """
+    for topic, route in routes.items():
+        if route.kind == "application":
+            reconnect.publish(f"{topic}/set", "on" if process_registry.is_on(topic) else "off")
+
 
 def get_main_proc(process_name):
-    """查找程序进程是否存在"""
+    """查找程序进程是否存在（查共享的进程快照 procsnap，只在没有有效的进程记录时使用，见 discovery.find）"""
     logging.info(f"执行函数: get_main_proc; 参数: {process_name}")
     
     # 如果不是管理员权限运行，可能无法查看所有进程，记录警告
@@ -441,52 +236,25 @@ def get_main_proc(process_name):
         logging.warning("程序未以管理员权限运行,可能无法查看所有进程")
     if process_name.endswith('.exe'):
         logging.info(f"查找程序可执行文件: {process_name}")
-        # 可执行文件查找方式
-        target_user=None
-        process_name = process_name.lower()
-        target_user = target_user.lower() if target_user else None
-
-        for proc in psutil.process_iter(['name', 'username']):
-            try:
-                # 获取进程信息
-                proc_info = proc.info
-                current_name = proc_info['name'].lower()
-                current_user = proc_info['username']
-
-                # 匹配进程名
-                if current_name == process_name:
-                    # 未指定用户则直接返回True
-                    if target_user is None:
-                        logging.info(f"找到程序进程: {proc.pid}, 用户: {current_user}")
-                        return True
-                    # 指定用户时提取用户名部分比较
-                    if current_user:
-                        user_part = current_user.split('\\')[-1].lower()
-                        if user_part == target_user:
-                            logging.info(f"找到程序进程: {proc.pid}, 用户: {current_user}")
-                            return True
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                logging.error(f"获取进程信息失败: {proc.pid}")
-                continue
+        # 可执行文件查找方式：按进程名查共享的进程快照
+        for entry in procsnap.snapshot.by_name(process_name):
+            proc = entry.process()
+            if proc is not None:
+                logging.info(f"找到程序进程: {proc.pid}")
+                return proc
         # 如果找不到进程，记录信息
         logging.info(f"未找到程序进程: {process_name}")
         return None
     else:
         # Python脚本查找方式
         logging.info(f"查找Python脚本主程序: {process_name}")
-        # 尝试查找命令行中包含脚本名的Python进程
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username']):
-            try:
-                proc_info = proc.info
-                if proc_info['name'] and proc_info['name'].lower() in ('python.exe', 'pythonw.exe'):
-                    cmdline = ' '.join(proc_info['cmdline']) if proc_info['cmdline'] else ""
-                    if process_name in cmdline:
-                        logging.info(f"找到程序Python进程: {proc.pid}, 命令行: {cmdline}")
-                        return proc
-            except (psutil.AccessDenied, psutil.NoSuchProcess, Exception) as e:
-                logging.error(f"获取Python进程信息失败: {e}")
-                continue
-        
+        # 按脚本路径查共享的进程快照（快照只读取Python进程的命令行）
+        for entry in procsnap.snapshot.by_script(process_name):
+            proc = entry.process()
+            if proc is not None:
+                logging.info(f"找到程序Python进程: {proc.pid}, 命令行: {' '.join(entry.cmdline)}")
+                return proc
+
         # 如果常规方法找不到，尝试使用wmic命令行工具
         logging.info("常规方法未找到Python进程，尝试使用wmic命令行工具")
         try:
@@ -527,6 +295,9 @@ def open_gui() -> None:
     English: Attempts to open GUI.py or RC-GUI.exe, else shows an error message
     中文: 尝试运行 GUI.py 或 RC-GUI.exe，如果找不到则弹出错误提示
     """
+    if not IS_WINDOWS:
+        logging.error(f"Linux 上没有配置窗口，请直接编辑 {config_path}")
+        return
     if os.path.isfile("GUI.py"):
         logging.info("正在打开配置窗口...")
         subprocess.Popen([".venv\\Scripts\\python.exe", "GUI.py"])
@@ -558,26 +329,122 @@ def open_gui() -> None:
 
 def exit_program() -> None:
     """
-    English: Stops the MQTT loop and exits the program
-    中文: 停止 MQTT 循环，并退出程序
+    English: Stops the MQTT loop and exits the program (user-requested, exit code 0)
+    中文: 停止 MQTT 循环，并退出程序（用户请求的退出，退出码为 0）
     """
-    logging.info("正在退出程序...")
+    shutdown(0)
+
+
+def shutdown(code: int) -> None:
+    """
+    English: Stops the MQTT loop and exits with code; a nonzero code tells the tray watchdog to restart main
+    中文: 停止 MQTT 循环并以 code 退出；非 0 的退出码表示异常退出，托盘的看门狗会重新启动主程序
+
+    参数:
+    - code: 进程退出码
+    """
+    global exit_code
+    exit_code = code
+    logging.info(f"正在退出程序...（退出码 {code}）")
+    reconnect.stop()
+    if runtime is not None:
+        # asyncio 模式：由事件循环按顺序关闭，主线程随后释放互斥体并以 exit_code 退出
+        runtime.stop()
+        threading.Timer(3.0, lambda: os._exit(code)).start()
+        return
     try:
+        dispatcher.stop()
         mqttc.loop_stop()
         mqttc.disconnect()
+        if tracer is not None:
+            tracer.close()
     except Exception as e:
         logging.error(f"程序停止时出错: {e}")
     finally:
         try:
-            ctypes.windll.kernel32.ReleaseMutex(mutex)
-            ctypes.windll.kernel32.CloseHandle(mutex)
+            if control_server is not None:
+                control_server.close()
+            discovery.withdraw(logs_dir, "RC-main")
+            instance_lock.release()
             logging.info("互斥体已释放")
         except Exception as e:
             logging.error(f"释放互斥体时出错: {e}")
         
         logging.info("程序已停止")
-        threading.Timer(0.5, lambda: os._exit(0)).start()
-        sys.exit(0)
+        threading.Timer(0.5, lambda: os._exit(code)).start()
+        sys.exit(code)
+
+def request_stop(restart: bool = False) -> None:
+    """
+    English: Stops the network loop so the main thread runs the normal shutdown; restart relaunches afterwards
+    中文: 停止网络循环，由主线程走正常的退出流程（正常断开 MQTT 连接）；restart 为 True 时退出后重新启动，用于重新加载配置
+    """
+    global restart_requested
+    restart_requested = restart_requested or restart
+    if runtime is not None:
+        runtime.stop()
+        return
+    reconnect.stop()
+    try:
+        mqttc.disconnect()
+    except Exception as e:
+        logging.error(f"断开 MQTT 连接时出错: {e}")
+
+
+def control_status(request: dict) -> dict:
+    return {
+        "pid": os.getpid(),
+        "version": BANBEN,
+        "admin": IS_ADMIN,
+        "connected": mqttc.is_connected(),
+        "runtime": runtime_mode,
+        "topics": len(routes),
+        "uptime": round(time.monotonic() - started_at, 1),
+    }
+
+
+def control_stop(request: dict) -> dict:
+    logging.info("收到本地控制通道的退出请求")
+    request_stop()
+    return {"pid": os.getpid()}
+
+
+def control_reload(request: dict) -> dict:
+    logging.info("收到本地控制通道的重新加载请求，退出后重新启动")
+    request_stop(restart=True)
+    return {"pid": os.getpid()}
+
+
+def control_stats(request: dict) -> dict:
+    stats = {
+        "messages": history.summary(),
+        "dispatcher": dispatcher.snapshot(),
+        "coalescer": coalescer.snapshot(),
+        "reconnect": reconnect.latency_stats(),
+        "process_snapshot": procsnap.snapshot.stats(),
+    }
+    if python_pool is not None:
+        stats["python_pool"] = python_pool.snapshot()
+    return stats
+
+
+def relaunch() -> None:
+    """
+    English: Starts a new instance with the same arguments (after the instance lock is released)
+    中文: 以相同的参数启动一个新的实例（在释放互斥体之后调用），新实例继承当前的权限，不会弹出 UAC
+    """
+    if getattr(sys, "frozen", False):
+        command = [sys.executable] + sys.argv[1:]
+    else:
+        command = [sys.executable] + sys.argv
+    options = {"cwd": os.getcwd()}
+    if not IS_WINDOWS:
+        options["start_new_session"] = True
+    try:
+        subprocess.Popen(command, **options)
+        logging.info(f"已重新启动: {command}")
+    except OSError as e:
+        logging.error(f"重新启动失败: {e}")
 
 # 获取资源文件的路径
 def resource_path(relative_path):
@@ -652,10 +519,13 @@ logging.info(f"配置文件路径: {config_path}")
 logging.info(f"Python版本: {sys.version}")
 logging.info("=" * 50)
 
+# 写入本进程的身份记录，托盘查找主程序时直接校验该记录，不必遍历进程表
+discovery.announce(logs_dir, "RC-main")
+
 # 在程序启动时查询托盘程序的管理员权限状态并保存为全局变量
 IS_ADMIN = False
 try:
-    IS_ADMIN = ctypes.windll.shell32.IsUserAnAdmin() != 0
+    IS_ADMIN = system.is_admin()
     logging.info(f"管理员权限状态: {'已获得' if IS_ADMIN else '未获得'}")
 except Exception as e:
     logging.error(f"检查管理员权限时出错: {e}")
@@ -668,13 +538,13 @@ if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
             config = json.load(f)
     except json.JSONDecodeError:
-        messagebox.showerror("Error", "配置文件格式错误\n请检查config.json文件")
+        show_error("Error", "配置文件格式错误\n请检查config.json文件")
         logging.error("config.json 文件格式错误")
         open_gui()
         threading.Timer(0.5, lambda: os._exit(0)).start()
         sys.exit()
 else:
-    messagebox.showerror("Error", "配置文件不存在\n请先打开RC-GUI配置文件")
+    show_error("Error", "配置文件不存在\n请先打开RC-GUI配置文件")
     logging.error("config.json 文件不存在")
     open_gui()
     threading.Timer(0.5, lambda: os._exit(0)).start()
@@ -685,21 +555,9 @@ else:
 if config.get("test") == 1:
     logging.warning("开启测试模式:可以不启用任何主题")
 else:
-    if (
-        all(
-            config.get(f"{key}_checked", 0) == 0
-            for key in ["Computer", "screen", "volume", "sleep"]
-        )
-        and all(
-            config.get(f"application{index}_checked", 0) == 0
-            for index in range(1, 100)
-        )
-        and all(
-            config.get(f"serve{index}_checked", 0) == 0 for index in range(1, 100)
-        )
-    ):
+    if not any_theme_enabled(config):
         logging.error("没有启用任何主题，显示错误信息")
-        messagebox.showerror("Error", "主题不能一个都没有吧！\n（除了测试模式）")
+        show_error("Error", "主题不能一个都没有吧！\n（除了测试模式）")
         open_gui()
         logging.info("程序已停止")
         threading.Timer(0.5, lambda: os._exit(0)).start()
@@ -727,9 +585,9 @@ volume = load_theme("volume")
 sleep = load_theme("sleep")
 media = load_theme("media")
 
-# 加载应用程序主题到应用程序列表
+# 加载应用程序主题到应用程序列表（序号不设上限）
 applications = []
-for i in range(1, 50):
+for i in custom_theme_indices(config, "application"):
     app_key = f"application{i}"
     directory_key = f"application{i}_directory{i}"
     application = load_theme(app_key)
@@ -739,9 +597,9 @@ for i in range(1, 50):
         applications.append((application, directory))
 logging.info(f"读取的应用程序列表: {applications}\n")
 
-# 加载服务主题到服务列表
+# 加载服务主题到服务列表（序号不设上限）
 serves = []
-for i in range(1, 50):
+for i in custom_theme_indices(config, "serve"):
     serve_key = f"serve{i}"
     serve_name_key = f"serve{i}_value"
     serve = load_theme(serve_key)
@@ -781,6 +639,7 @@ def tray() -> None:
         menu = (
             pystray.MenuItem(f"{admin_status}", None),
             pystray.MenuItem("打开配置", open_gui),
+            pystray.MenuItem("导出消息记录", dump_history),
             pystray.MenuItem("退出", exit_program),
         )
         icon.menu = menu
@@ -801,7 +660,7 @@ def check_tray_and_start():
     检测托盘程序是否运行，如果未运行则启动自带托盘
     """
     TRAY_EXE_NAME = "RC-tray.exe" if getattr(sys, "frozen", False) else "tray.py"
-    tray_zt = get_main_proc(TRAY_EXE_NAME)
+    tray_zt = discovery.find(logs_dir, "RC-tray", lambda: get_main_proc(TRAY_EXE_NAME))
     if not tray_zt:
         logging.error("托盘未启动，将使用自带托盘")
         tray()
@@ -818,7 +677,8 @@ def tray_():
     timer.daemon = True
     timer.start()
 
-tray_()
+if IS_WINDOWS:
+    tray_()
 
 if IS_ADMIN:
     logging.info("当前程序以管理员权限运行")
@@ -841,45 +701,234 @@ else:
     except Exception as e:
         logging.error(f"写入权限状态文件失败: {e}")
 
+# 启动时把所有启用的主题编译为路由表
+routes = build_routes(
+    applications,
+    serves,
+    {"Computer": Computer, "screen": screen, "volume": volume, "sleep": sleep, "media": media},
+)
+logging.info(f"路由表已编译，共 {len(routes)} 个主题")
+
+# 最近消息的环形缓冲区和按主题统计，替代无限增长的消息列表
+history = MessageHistory(config.get("history_size", 200))
+
+# 可选：录制收到的每条消息，供 bench/replay.py 回放
+tracer = None
+if config.get("trace_record", 0) == 1:
+    try:
+        tracer = TraceWriter(
+            os.path.join(logs_dir, "trace.rct"),
+            max_bytes=config.get("trace_max_mb", 50) * 1024 * 1024,
+        )
+    except OSError as e:
+        logging.error(f"无法打开消息轨迹文件: {e}")
+
 # 初始化MQTT客户端
 mqttc = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2) # type: ignore
 mqttc.on_connect = on_connect
-mqttc.on_message = on_message
 mqttc.on_subscribe = on_subscribe
 mqttc.on_unsubscribe = on_unsubscribe
+mqttc.on_disconnect = on_disconnect
+
+# 断线重连：指数退避 + 抖动，离线期间缓存状态消息
+reconnect = ReconnectManager(
+    mqttc,
+    Backoff(
+        base=config.get("reconnect_base", 0.5),
+        cap=config.get("reconnect_max", 60),
+        jitter=config.get("reconnect_jitter", 0.5),
+    ),
+    OfflineBuffer(max_age=config.get("offline_buffer_age", 300)),
+)
+state_publish = config.get("state_publish", 0) == 1
+
+# 消息处理链路：录制 -> 消息记录 -> 滑块合并 -> 调度器，bench/ 下的压测和回放脚本使用同一链路
+pipeline = MessagePipeline(history, reconnect, tracer=tracer, state_publish=state_publish)
+mqttc.on_message = pipeline.on_message
+
+# 亮度后端：Windows 按线程缓存 WMI 连接，Linux 直接写 /sys/class/backlight
+brightness_control = create_brightness()
+
+# 音量后端：Windows 按线程缓存音频端点接口（默认设备切换时自动失效），Linux 控制 PulseAudio/PipeWire
+volume_control = create_volume()
+volume_control.watch()
+
+# 程序主题启动的进程，off 时只结束这些进程
+process_registry = ProcessRegistry()
+
+# 可选：在预热的 Python 解释器池中运行 .py 脚本主题
+python_pool = None
+if config.get("python_pool", 0) == 1 and any(
+    (directory or "").lower().endswith(".py") for _, directory in applications
+):
+    if PythonPool.available():
+        python_pool = PythonPool(
+            size=config.get("python_pool_size", 1),
+            preload=config.get("python_pool_preload", []),
+            max_runs=config.get("python_pool_max_runs", 20),
+            max_rss_mb=config.get("python_pool_max_rss_mb", 200),
+            # 工作进程被脚本占用期间记录在该主题下，off 时结束；Windows 上不加入作业对象，因为之后还会被复用
+            on_start=lambda topic, popen: process_registry.adopt(topic, popen, job=False),
+            on_finish=process_registry.release,
+        ).start()
+        logging.info(f"Python 解释器池已启动，预加载模块: {python_pool.preload}")
+    else:
+        logging.warning("打包后的程序没有独立的 Python 解释器，不使用解释器池")
+
+# 服务控制：进程内调用 SCM / systemd，按服务缓存句柄
+service_manager = create_service_manager()
+service_manager.preload([serve_name for _, serve_name in serves if serve_name])
+service_timeout = float(config.get("service_timeout", 30))
+
+ramp_engine = RampEngine(timer, step=config.get("ramp_step", 0.05))
+ramp_duration = float(config.get("ramp_duration", 0))
+
+# 各类主题的处理函数，调度器的工作线程执行 command_handlers.process_command
+command_handlers = CommandHandlers(
+    routes,
+    system,
+    brightness_control,
+    volume_control,
+    process_registry,
+    service_manager,
+    ramp_engine,
+    reconnect,
+    notify_in_thread,
+    python_pool=python_pool,
+    ramp_duration=ramp_duration,
+    service_timeout=service_timeout,
+)
+
+# 运行模式：threaded（默认，ReconnectManager.run_network_loop + 工作线程）或 asyncio（单事件循环）
+runtime_mode = config.get("runtime", "threaded")
+dispatcher_options = dict(
+    workers=config.get("dispatcher_workers", 4),
+    max_queue=config.get("dispatcher_queue_size", 100),
+    overflow=config.get("dispatcher_overflow", "drop_oldest"),
+    # 每个主题一条串行通道：同一主题按顺序执行，不同主题并行执行
+    lanes=list(routes),
+    on_complete=pipeline.on_complete,
+    on_drop=pipeline.on_drop,
+)
+if runtime_mode == "asyncio":
+    from aio_runtime import AsyncDispatcher, AsyncioRuntime
 
-mqttc.user_data_set([])
+    runtime = AsyncioRuntime(mqttc, reconnect)
+    dispatcher = AsyncDispatcher(runtime, command_handlers.process_command, **dispatcher_options)
+else:
+    if runtime_mode != "threaded":
+        logging.warning(f"未知的运行模式: {runtime_mode}，使用 threaded")
+    runtime = None
+    # 命令在工作线程中执行，避免阻塞MQTT网络循环
+    dispatcher = CommandDispatcher(command_handlers.process_command, **dispatcher_options)
+logging.info(f"运行模式: {runtime_mode}")
+dispatcher.start()
+
+# 合并亮度/音量滑块的连续 on#NN 命令
+coalescer = SliderCoalescer(
+    dispatcher.submit,
+    [screen, volume],
+    window=config.get("coalesce_window", 0.15),
+    on_drop=pipeline.on_merged,
+    scheduler=timer,
+)
+command_handlers.coalescer = coalescer
+pipeline.coalescer = coalescer
+pipeline.dispatcher = dispatcher
+
+# 批量订阅，记录重连后全部主题订阅完成的耗时
+subscriptions = SubscriptionTracker(
+    max_topics=config.get("subscribe_batch_topics", 50),
+    max_bytes=config.get("subscribe_batch_bytes", 16 * 1024),
+    on_ready=reconnect.on_ready,
+)
+
+# 检测系统从睡眠中唤醒，立即重连而不是等心跳超时
+resume_detector = ResumeDetector(
+    lambda gap: reconnect.resume(f"系统唤醒（睡眠约{gap:.0f}秒）"),
+    interval=config.get("resume_check_interval", 2.0),
+).start()
+
+mqttc.user_data_set(history)
 mqttc._client_id = secret_id
+# 首次连接失败不再退出，交给重连管理器按退避策略重试
+connected = False
 try:
     mqttc.connect(broker, port)
+    connected = True
 except socket.timeout:
-    messagebox.showerror(
-        "Error", "连接到 MQTT 服务器超时，请检查网络连接或服务器地址，端口号！"
-    )
-    open_gui()
-    threading.Timer(0.5, lambda: os._exit(0)).start()
+    logging.error("连接到 MQTT 服务器超时，将自动重试")
+    notify_in_thread("连接到 MQTT 服务器超时，将自动重试\n请检查网络连接或服务器地址，端口号！")
 except socket.gaierror:
-    messagebox.showerror(
-        "Error", "无法解析 MQTT 服务器地址，请重试或检查服务器地址是否正确！"
-    )
-    open_gui()
-    threading.Timer(0.5, lambda: os._exit(0)).start()
+    logging.error("无法解析 MQTT 服务器地址，将自动重试")
+    notify_in_thread("无法解析 MQTT 服务器地址，将自动重试\n请检查网络或服务器地址是否正确！")
+except OSError as e:
+    logging.error(f"连接到 MQTT 服务器失败: {e}，将自动重试")
+    notify_in_thread("连接到 MQTT 服务器失败，将自动重试")
+
+# 网络恢复时跳过退避等待，立即重连
+watch_network_changes(reconnect.kick)
+
+# 本地控制通道：托盘通过它查询状态、正常退出和重新加载配置，不再写批处理并 taskkill 强制结束
+control_server = ControlServer(
+    logs_dir,
+    "RC-main",
+    {"status": control_status, "stop": control_stop, "reload": control_reload, "stats": control_stats},
+)
 try:
-    mqttc.loop_forever()
+    control_server.start()
+except OSError as e:
+    logging.error(f"本地控制通道启动失败: {e}")
+
+if not IS_WINDOWS:
+    # systemctl stop 等发送的 SIGTERM 按 Ctrl+C 处理，走正常的退出流程
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+try:
+    if runtime is not None:
+        runtime.run(connected)
+    else:
+        reconnect.run_network_loop(connected)
 except KeyboardInterrupt:
     logging.warning("收到中断,程序停止")
     notify_in_thread("收到中断信号\n程序停止")
     exit_program()
 except Exception as e:
-    logging.error(f"程序异常: {e}")
-    exit_program()
-
-logging.info(f"总共收到以下消息: {mqttc.user_data_get()}")
+    logging.exception(f"程序异常: {e}")
+    notify_in_thread("程序异常退出\n详情请查看日志")
+    # 以非 0 退出码退出，托盘的看门狗据此判断为崩溃并重新启动
+    shutdown(1)
+
+control_server.close()
+if runtime is None:
+    dispatcher.stop()
+logging.info(f"消息统计: {history.summary()}")
+dump_history()
+if tracer is not None:
+    tracer.close()
+logging.info(f"命令调度统计: {dispatcher.snapshot()}")
+logging.info(f"滑块合并统计: {coalescer.snapshot()}")
+logging.info(f"渐变统计: 开始 {ramp_engine.started} 次，中途改变目标 {ramp_engine.retargeted} 次")
+timer.stop()
+service_manager.close()
+process_registry.close()
+if python_pool is not None:
+    logging.info(f"Python 解释器池统计: {python_pool.snapshot()}")
+    python_pool.close()
+logging.info(f"重连统计: {reconnect.latency_stats()}")
+logging.info(f"唤醒后恢复耗时(秒): {[round(value, 3) for value in reconnect.wake_latencies]}")
 
 try:
     logging.info("释放互斥体")
-    ctypes.windll.kernel32.ReleaseMutex(mutex)
-    ctypes.windll.kernel32.CloseHandle(mutex)
+    discovery.withdraw(logs_dir, "RC-main")
+    instance_lock.release()
 except Exception as e:
     logging.error(f"释放互斥体时出错: {e}")
 
+
+if restart_requested:
+    # 重新加载配置：旧实例已释放互斥体，启动新实例读取最新的 config.json
+    relaunch()
+
+if exit_code:
+    sys.exit(exit_code)
@@ -0,0 +1,209 @@
+"""
+媒体控制后端：下一曲、上一曲、播放/暂停。
+
+- SendInputMedia（Windows）：通过 user32.SendInput 一次注入按下和抬起两个媒体键事件。
+  原先使用 pyautogui.press，每次按键后固定 sleep PAUSE（0.1 秒），且导入 pyautogui 本身就很慢。
+  按键对应的 INPUT 数组在首次使用时构造并缓存。
+- MprisMedia（Linux）：通过会话总线上的 MPRIS 接口（org.mpris.MediaPlayer2.Player）直接控制播放器，
+  缓存上次使用的播放器，调用失败时重新查找；D-Bus 不可用时退回 playerctl 命令。
+
+main.py 在第一次收到媒体命令时才调用 create_media()，启动时不加载任何媒体相关模块。
+"""
+
+import ctypes
+import logging
+import subprocess
+import sys
+import threading
+
+# 虚拟键码
+VK_MEDIA_NEXT_TRACK = 0xB0
+VK_MEDIA_PREV_TRACK = 0xB1
+VK_MEDIA_PLAY_PAUSE = 0xB3
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+
+KEYS = {
+    "nexttrack": VK_MEDIA_NEXT_TRACK,
+    "prevtrack": VK_MEDIA_PREV_TRACK,
+    "playpause": VK_MEDIA_PLAY_PAUSE,
+}
+
+ULONG_PTR = ctypes.c_size_t
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ULONG_PTR),
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    # 只用于让联合体的大小与系统定义一致，SendInput 会校验 cbSize
+    _fields_ = [
+        ("dx", ctypes.c_long),
+        ("dy", ctypes.c_long),
+        ("mouseData", ctypes.c_ulong),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ULONG_PTR),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_ulong), ("u", _INPUTUNION)]
+
+
+def key_events(vk: int):
+    """
+    English: Builds the key-down/key-up INPUT pair for a virtual key
+    中文: 构造某个虚拟键按下、抬起两个事件组成的 INPUT 数组
+    """
+    events = (INPUT * 2)()
+    for event, flags in zip(events, (KEYEVENTF_EXTENDEDKEY, KEYEVENTF_EXTENDEDKEY | KEYEVENTF_KEYUP)):
+        event.type = INPUT_KEYBOARD
+        event.u.ki.wVk = vk
+        event.u.ki.dwFlags = flags
+    return events
+
+
+def _default_send(events) -> int:
+    return ctypes.windll.user32.SendInput(len(events), events, ctypes.sizeof(INPUT))
+
+
+class SendInputMedia:
+    """
+    English: Windows media keys injected with a single SendInput call
+    中文: 通过一次 SendInput 调用注入媒体键的 Windows 后端
+
+    参数:
+    - send: 发送 INPUT 数组的函数，返回成功注入的事件数，默认 user32.SendInput
+    """
+
+    name = "SendInput"
+
+    def __init__(self, send=None):
+        self.send = send or _default_send
+        self.presses = 0
+        self._events = {}
+
+    def press(self, key: str) -> None:
+        """
+        English: Presses a media key: nexttrack, prevtrack or playpause
+        中文: 按下并抬起媒体键：nexttrack、prevtrack 或 playpause
+        """
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = key_events(KEYS[key])
+        sent = self.send(events)
+        if sent != len(events):
+            # 被 UIPI 拦截（例如前台是以更高权限运行的窗口）时返回值小于事件数
+            raise OSError(f"SendInput 只注入了 {sent}/{len(events)} 个事件: {key}")
+        self.presses += 1
+
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+MPRIS_PLAYER = "org.mpris.MediaPlayer2.Player"
+DBUS_DAEMON = ("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus")
+
+MPRIS_METHODS = {"nexttrack": "Next", "prevtrack": "Previous", "playpause": "PlayPause"}
+PLAYERCTL_COMMANDS = {"nexttrack": "next", "prevtrack": "previous", "playpause": "play-pause"}
+
+
+class MprisMedia:
+    """
+    English: Linux media control through the MPRIS D-Bus interface, falling back to playerctl
+    中文: 通过 MPRIS D-Bus 接口控制播放器的 Linux 后端，不可用时使用 playerctl
+
+    参数:
+    - bus: system.DBus 实例（会话总线）
+    """
+
+    name = "MPRIS"
+
+    def __init__(self, bus=None):
+        if bus is None:
+            from system import DBus
+
+            bus = DBus("SESSION")
+        self.bus = bus
+        self.presses = 0
+        self.lookups = 0
+        self._player = None
+        self._lock = threading.Lock()
+
+    def _status(self, player: str) -> str:
+        try:
+            return self.bus.call(
+                player, MPRIS_PATH, "org.freedesktop.DBus.Properties", "Get", "ss",
+                (MPRIS_PLAYER, "PlaybackStatus"),
+            )[0][1]
+        except Exception:
+            return ""
+
+    def _find_player(self):
+        # 有多个播放器时优先选择正在播放的，其次是暂停的，与 playerctl 的默认行为接近
+        self.lookups += 1
+        names = [name for name in self.bus.call(*DBUS_DAEMON, "ListNames")[0] if name.startswith(MPRIS_PREFIX)]
+        if not names:
+            return None
+        rank = {"Playing": 0, "Paused": 1}
+        return min(names, key=lambda name: rank.get(self._status(name), 2))
+
+    def press(self, key: str) -> None:
+        """
+        English: Sends Next/Previous/PlayPause to the current player
+        中文: 向当前播放器发送 Next/Previous/PlayPause
+        """
+        method = MPRIS_METHODS[key]
+        if not self.bus.available:
+            self._playerctl(key)
+            return
+        with self._lock:
+            try:
+                for attempt in (0, 1):
+                    if self._player is None:
+                        self._player = self._find_player()
+                        if self._player is None:
+                            raise RuntimeError("没有找到支持 MPRIS 的播放器")
+                    try:
+                        self.bus.call(self._player, MPRIS_PATH, MPRIS_PLAYER, method)
+                        break
+                    except Exception as e:
+                        # 播放器已退出或更换，重新查找一次
+                        if attempt:
+                            raise
+                        logging.info(f"播放器 {self._player} 调用失败，重新查找: {e}")
+                        self._player = None
+            except Exception:
+                if self.bus.available:
+                    raise
+                # 未安装 jeepney 或连不上会话总线
+                self._playerctl(key)
+                return
+        self.presses += 1
+
+    def _playerctl(self, key: str) -> None:
+        subprocess.run(["playerctl", PLAYERCTL_COMMANDS[key]], check=True)
+        self.presses += 1
+
+
+def create_media():
+    """
+    English: Returns the media backend of the current platform
+    中文: 返回当前平台的媒体控制后端
+    """
+    if sys.platform == "win32":
+        return SendInputMedia()
+    return MprisMedia()
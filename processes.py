@@ -0,0 +1,276 @@
+"""
+按主题记录启动的进程：程序主题的 on 启动的进程（及其子进程）由 off 精确结束，不再按进程名结束整台机器上的同名进程。
+
+- Windows：每个主题一个作业对象（Job Object），启动的进程加入作业，它创建的子进程自动属于同一作业；
+  off 时 TerminateJobObject 一次结束整棵进程树
+- Linux：启动的进程在新的会话/进程组中运行，off 时向整个进程组发送 SIGTERM，超时后发送 SIGKILL
+
+结束进程时不遍历系统进程表；is_on() 只检查该主题记录的进程，与系统中的进程数量无关。
+"""
+
+import ctypes
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+import psutil
+
+IS_WINDOWS = sys.platform == "win32"
+
+
+class JOBOBJECT_BASIC_ACCOUNTING_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("TotalUserTime", ctypes.c_int64),
+        ("TotalKernelTime", ctypes.c_int64),
+        ("ThisPeriodTotalUserTime", ctypes.c_int64),
+        ("ThisPeriodTotalKernelTime", ctypes.c_int64),
+        ("TotalPageFaultCount", ctypes.c_uint32),
+        ("TotalProcesses", ctypes.c_uint32),
+        ("ActiveProcesses", ctypes.c_uint32),
+        ("TotalTerminatedProcesses", ctypes.c_uint32),
+    ]
+
+
+JobObjectBasicAccountingInformation = 1
+
+
+class _Job:
+    """
+    English: Windows job object that holds every process started for one topic
+    中文: Windows 作业对象，包含某个主题启动的所有进程
+    """
+
+    def __init__(self):
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateJobObjectW.restype = ctypes.c_void_p
+        kernel32.CreateJobObjectW.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p]
+        kernel32.AssignProcessToJobObject.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        kernel32.TerminateJobObject.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        kernel32.QueryInformationJobObject.argtypes = [
+            ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p
+        ]
+        kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+        self._kernel32 = kernel32
+        # 不设置 KILL_ON_JOB_CLOSE：主程序退出时不结束用户启动的程序
+        self.handle = kernel32.CreateJobObjectW(None, None)
+        if not self.handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def assign(self, popen: subprocess.Popen) -> bool:
+        return bool(self._kernel32.AssignProcessToJobObject(self.handle, int(popen._handle)))
+
+    def active(self) -> int:
+        """
+        English: Returns how many processes in the job are still running (-1 if the query fails)
+        中文: 返回作业中仍在运行的进程数量，查询失败时返回 -1
+        """
+        info = JOBOBJECT_BASIC_ACCOUNTING_INFORMATION()
+        if not self._kernel32.QueryInformationJobObject(
+            self.handle, JobObjectBasicAccountingInformation, ctypes.byref(info), ctypes.sizeof(info), None
+        ):
+            return -1
+        return info.ActiveProcesses
+
+    def terminate(self) -> None:
+        self._kernel32.TerminateJobObject(self.handle, 1)
+
+    def close(self) -> None:
+        if self.handle:
+            self._kernel32.CloseHandle(self.handle)
+            self.handle = None
+
+
+class ProcessRegistry:
+    """
+    English: Keeps the processes started per topic and terminates exactly those (with their children)
+    中文: 按主题保存启动的进程，结束时只结束这些进程及其子进程
+
+    参数:
+    - timeout: 结束进程时等待其退出的时间（秒），超时后强制结束
+    """
+
+    def __init__(self, timeout: float = 3):
+        self.timeout = timeout
+        self.launched = 0
+        self.terminated = 0
+        self._processes = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def launch(self, topic: str, args, **kwargs) -> subprocess.Popen:
+        """
+        English: Starts a process for topic and records it
+        中文: 为主题启动进程并记录下来，参数与 subprocess.Popen 相同
+        """
+        if not IS_WINDOWS:
+            # 新的进程组，off 时可以一次结束它创建的所有子进程
+            kwargs.setdefault("start_new_session", True)
+        return self.adopt(topic, subprocess.Popen(args, **kwargs))
+
+    def adopt(self, topic: str, popen: subprocess.Popen, job: bool = True) -> subprocess.Popen:
+        """
+        English: Records a process started elsewhere (e.g. a Python pool worker) under topic
+        中文: 把在其他地方启动的进程（例如 Python 解释器池的工作进程）记录到主题下
+
+        参数:
+        - job: Windows 上是否加入该主题的作业对象；进程之后还会被其他主题复用时应为 False，
+          因为进程一旦加入作业就无法移出
+        """
+        with self._lock:
+            # 先移除已退出的记录（作业中已没有进程时关闭作业），再加入新的进程
+            self._prune(topic)
+            if IS_WINDOWS and job:
+                job = self._jobs.get(topic)
+                try:
+                    if job is None:
+                        job = self._jobs[topic] = _Job()
+                    if not job.assign(popen):
+                        logging.warning(f"无法把进程 {popen.pid} 加入作业对象，只能结束该进程本身")
+                except OSError as e:
+                    logging.warning(f"创建作业对象失败，只能结束进程 {popen.pid} 本身: {e}")
+            self._processes.setdefault(topic, []).append(popen)
+            self.launched += 1
+        return popen
+
+    def release(self, topic: str, popen: subprocess.Popen) -> None:
+        """
+        English: Forgets a process without terminating it (e.g. a pool worker that finished the script)
+        中文: 不结束进程，只从主题的记录中移除（例如运行完脚本回到池中的工作进程）
+        """
+        with self._lock:
+            processes = self._processes.get(topic)
+            if processes and popen in processes:
+                processes.remove(popen)
+                if not processes:
+                    del self._processes[topic]
+
+    def _prune(self, topic: str) -> None:
+        # 调用方持有 self._lock；poll() 同时回收已退出的子进程
+        # 移除已退出的进程，避免经常开关的主题一直累积 Popen 对象；
+        # 启动的进程已退出但它创建的子进程还在时保留记录（Linux 看进程组，Windows 看作业对象），
+        # 启动器类程序（启动子进程后立即退出）off 时仍可结束整棵进程树
+        processes = self._processes.get(topic)
+        if not processes:
+            return
+        kept = [popen for popen in processes if popen.poll() is None or self._group_alive(popen.pid)]
+        job = self._jobs.get(topic)
+        if not kept and job is not None and job.active() != 0:
+            # 查询失败（-1）时也保留，宁可多保留一个记录也不丢掉仍在运行的进程树
+            kept = processes[-1:]
+        if kept:
+            self._processes[topic] = kept
+            return
+        del self._processes[topic]
+        self._jobs.pop(topic, None)
+        if job is not None:
+            job.close()
+
+    def _alive(self, topic: str) -> list:
+        # 调用方持有 self._lock
+        self._prune(topic)
+        return [popen for popen in self._processes.get(topic, ()) if popen.returncode is None]
+
+    def is_on(self, topic: str) -> bool:
+        """
+        English: Returns True if a process started for topic is still running
+        中文: 该主题启动的进程仍在运行时返回 True
+        """
+        with self._lock:
+            # 与 terminate() 看到的记录一致：包括启动的进程已退出但子进程（进程组/作业）仍在运行的主题
+            self._prune(topic)
+            return topic in self._processes
+
+    def pids(self, topic: str) -> list:
+        with self._lock:
+            return [popen.pid for popen in self._alive(topic)]
+
+    def terminate(self, topic: str) -> int:
+        """
+        English: Terminates the processes started for topic and their children; returns how many were recorded
+        中文: 结束该主题启动的进程及其子进程，返回记录的进程数量（0 表示该主题没有启动过进程）
+        """
+        with self._lock:
+            recorded = self._processes.pop(topic, [])
+            job = self._jobs.pop(topic, None)
+        if not recorded:
+            return 0
+        roots = []
+        for popen in recorded:
+            if popen.poll() is None:
+                try:
+                    roots.append(psutil.Process(popen.pid))
+                except psutil.NoSuchProcess:
+                    pass
+        if job is not None:
+            # 作业中的所有进程（包括父进程已退出的子进程）一起结束
+            job.terminate()
+            job.close()
+        else:
+            for proc in roots:
+                self._stop(proc)
+            if not IS_WINDOWS:
+                # 父进程已退出但仍留在进程组中的子进程也要结束
+                for popen in recorded:
+                    self._signal_group(popen.pid, signal.SIGTERM)
+        gone, alive = psutil.wait_procs(roots, timeout=self.timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+        if not IS_WINDOWS:
+            for popen in recorded:
+                self._signal_group(popen.pid, signal.SIGKILL)
+        for popen in recorded:
+            try:
+                popen.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"进程 {popen.pid} 未能退出")
+        if alive:
+            logging.info(f"{len(alive)} 个进程在 {self.timeout} 秒内没有退出，已强制结束")
+        with self._lock:
+            self.terminated += len(roots)
+        return len(recorded)
+
+    @staticmethod
+    def _stop(proc: psutil.Process) -> None:
+        try:
+            proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            logging.warning(f"无权限结束进程 {proc.pid}: {e}")
+
+    @staticmethod
+    def _group_alive(pgid: int) -> bool:
+        if IS_WINDOWS:
+            return False
+        try:
+            os.killpg(pgid, 0)
+        except (ProcessLookupError, PermissionError):
+            return False
+        return True
+
+    @staticmethod
+    def _signal_group(pgid: int, sig) -> None:
+        # 进程组号即启动时的 pid
+        try:
+            os.killpg(pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def topics(self) -> list:
+        with self._lock:
+            for topic in list(self._processes):
+                self._prune(topic)
+            return list(self._processes)
+
+    def close(self) -> None:
+        # 只释放作业对象句柄，不结束进程
+        with self._lock:
+            for job in self._jobs.values():
+                job.close()
+            self._jobs.clear()
@@ -0,0 +1,149 @@
+"""
+进程快照缓存：托盘和主程序共用。一次遍历进程表，只读取需要的字段（进程名；Python 进程再读取命令行），
+按小写进程名和脚本路径建立索引。快照在短时间（TTL）内复用，同一次界面操作中的多次查询只遍历一次。
+
+刷新快照的耗时和命中/未命中次数写入日志。
+"""
+
+import logging
+import os
+import threading
+import time
+
+import psutil
+
+# 需要读取命令行的解释器进程名（小写）
+PYTHON_NAMES = ("python.exe", "pythonw.exe", "python", "python3", "pythonw")
+
+
+class ProcessEntry:
+    """
+    English: One process in a snapshot
+    中文: 快照中的一个进程
+    """
+
+    __slots__ = ("pid", "name", "cmdline")
+
+    def __init__(self, pid: int, name: str, cmdline: list):
+        self.pid = pid
+        self.name = name
+        self.cmdline = cmdline
+
+    def process(self):
+        """
+        English: Returns a psutil.Process for this entry, or None if it has exited
+        中文: 返回对应的 psutil.Process，进程已退出时返回 None
+        """
+        try:
+            return psutil.Process(self.pid)
+        except psutil.NoSuchProcess:
+            return None
+
+    def __repr__(self) -> str:
+        return f"ProcessEntry(pid={self.pid!r}, name={self.name!r})"
+
+
+class ProcessSnapshot:
+    """
+    English: TTL-cached process table indexed by lower-cased name and script path
+    中文: 带 TTL 的进程表快照，按小写进程名和脚本路径索引
+
+    参数:
+    - ttl: 快照的有效时间（秒）
+    """
+
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.last_cost = 0.0
+        self.last_size = 0
+        self._taken = None
+        self._by_name = {}
+        self._by_script = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """
+        English: Forces the next lookup to take a fresh snapshot (e.g. after starting or killing a process)
+        中文: 使快照失效，下次查询重新遍历（例如刚启动或结束了进程之后）
+        """
+        with self._lock:
+            self._taken = None
+
+    def _refresh(self) -> None:
+        # 调用方持有 self._lock
+        started = time.perf_counter()
+        by_name = {}
+        by_script = {}
+        count = 0
+        for proc in psutil.process_iter(["name"]):
+            name = (proc.info["name"] or "").lower()
+            if not name:
+                continue
+            count += 1
+            cmdline = None
+            if name in PYTHON_NAMES:
+                try:
+                    cmdline = proc.cmdline()
+                except (psutil.AccessDenied, psutil.NoSuchProcess, psutil.ZombieProcess):
+                    cmdline = None
+            entry = ProcessEntry(proc.pid, name, cmdline)
+            by_name.setdefault(name, []).append(entry)
+            for argument in cmdline or ():
+                if argument.lower().endswith((".py", ".pyw")):
+                    # 同时按完整路径和文件名索引
+                    path = os.path.normcase(os.path.abspath(argument)).lower()
+                    by_script.setdefault(path, []).append(entry)
+                    by_script.setdefault(os.path.basename(path), []).append(entry)
+        self._by_name = by_name
+        self._by_script = by_script
+        self._taken = time.monotonic()
+        self.last_cost = time.perf_counter() - started
+        self.last_size = count
+        logging.info(
+            f"进程快照: {count} 个进程，耗时 {self.last_cost * 1000:.1f}ms"
+            f"（命中 {self.hits} 次，未命中 {self.misses} 次）"
+        )
+
+    def _current(self):
+        # 调用方持有 self._lock
+        if self._taken is not None and time.monotonic() - self._taken < self.ttl:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._refresh()
+
+    def by_name(self, name: str) -> list:
+        """
+        English: Returns the entries whose process name equals name (case-insensitive)
+        中文: 返回进程名与 name 相同（不区分大小写）的进程
+        """
+        with self._lock:
+            self._current()
+            return list(self._by_name.get(name.lower(), ()))
+
+    def by_script(self, script: str) -> list:
+        """
+        English: Returns the Python processes running script (a file name or a path)
+        中文: 返回正在运行该脚本（文件名或路径）的 Python 进程
+        """
+        key = script.lower()
+        if os.path.dirname(script):
+            key = os.path.normcase(os.path.abspath(script)).lower()
+        with self._lock:
+            self._current()
+            return list(self._by_script.get(key, ()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "last_cost_ms": round(self.last_cost * 1000, 1),
+                "last_size": self.last_size,
+            }
+
+
+# 进程内共享的快照
+snapshot = ProcessSnapshot()
@@ -0,0 +1,339 @@
+"""
+预热的 Python 解释器池：程序主题指向 .py 脚本时，在已经启动并预先导入常用模块的工作进程中运行脚本，
+省去每次 on 都要付出的解释器启动和导入耗时。
+
+- 工作进程运行本文件（--worker），通过 stdin/stdout 按行交换 JSON：主进程发送 {"path", "args"}，
+  工作进程运行结束后回复 {"event": "done", "code", "elapsed"}
+- 脚本的 print 输出和异常都写到工作进程的 stderr，由主进程按行写入日志
+- 脚本运行结束后工作进程回到池中；所有工作进程都被占用时本次冷启动，并补充一个新的工作进程；
+  off 时直接结束占用该主题的工作进程
+- 运行 max_runs 次或常驻内存超过 max_rss_mb 后回收工作进程，避免脚本残留的状态和内存不断累积
+- 统计从 on 到脚本第一行输出的耗时，与冷启动对比见 bench/bench_pypool.py
+
+打包为 exe 后没有独立的 Python 解释器，解释器池不可用，退回普通启动方式。
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+
+def worker_main(preload: list) -> None:
+    """
+    English: Worker process loop: preloads modules, then runs scripts sent over stdin one by one
+    中文: 工作进程主循环：预先导入模块，然后依次运行通过 stdin 发来的脚本
+    """
+    import runpy
+    import traceback
+
+    # 本文件所在目录不应出现在脚本的导入路径中
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    # stdout 留给协议使用，脚本的输出（包括 C 扩展直接写 fd 1 的输出）都转到 stderr
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    # stdin 同样只用于接收请求：脚本读取 stdin（包括直接读 fd 0）时读到空设备，不会吞掉后续请求
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    stdin = sys.stdin = open(os.devnull, "r", encoding="utf-8")
+
+    def send(**message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f"预加载模块 {name} 失败: {e}", file=sys.stderr)
+    baseline_modules = set(sys.modules)
+    baseline_path = list(sys.path)
+    baseline_cwd = os.getcwd()
+    baseline_environ = dict(os.environ)
+    send(event="ready", pid=os.getpid())
+
+    for line in requests:
+        request = json.loads(line)
+        path = request["path"]
+        started = time.monotonic()
+        code = 0
+        try:
+            # 与直接运行脚本一致：argv[0] 为脚本路径，脚本所在目录在 sys.path 最前面
+            directory = os.path.dirname(os.path.abspath(path))
+            os.chdir(request.get("cwd") or directory)
+            sys.argv = [path] + list(request.get("args", ()))
+            sys.path.insert(0, directory)
+            runpy.run_path(path, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            sys.stdin = stdin
+            # 恢复到预热后的状态，脚本导入的模块下次重新导入
+            for name in set(sys.modules) - baseline_modules:
+                del sys.modules[name]
+            sys.path[:] = baseline_path
+            os.chdir(baseline_cwd)
+            os.environ.clear()
+            os.environ.update(baseline_environ)
+        send(event="done", code=code, elapsed=time.monotonic() - started)
+
+
+class _Worker:
+    __slots__ = ("popen", "ready", "runs", "topic", "requested", "first_line")
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.ready = threading.Event()
+        self.runs = 0
+        self.topic = None
+        self.requested = None
+        self.first_line = False
+
+
+class PythonPool:
+    """
+    English: Pool of pre-warmed Python worker processes for script application topics
+    中文: 运行 Python 脚本主题的预热工作进程池
+
+    参数:
+    - size: 保持的空闲工作进程数量
+    - preload: 工作进程启动后预先导入的模块名列表
+    - max_runs: 每个工作进程最多运行的脚本次数，之后回收
+    - max_rss_mb: 工作进程常驻内存超过该值（MB）时回收
+    - python: Python 解释器路径，默认为当前解释器
+    - on_start: 把脚本交给工作进程之前的回调，签名为 on_start(topic, popen)
+    - on_finish: 脚本运行结束时的回调，签名与 on_start 相同
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        preload=(),
+        max_runs: int = 20,
+        max_rss_mb: float = 200,
+        python: str = None,
+        on_start=None,
+        on_finish=None,
+    ):
+        self.size = max(1, int(size))
+        self.preload = list(preload)
+        self.max_runs = max(1, int(max_runs))
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.python = python or sys.executable
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.spawned = 0
+        self.recycled = 0
+        self.pooled_runs = 0
+        self.first_line_latencies = deque(maxlen=200)
+        self._idle = []
+        self._workers = set()
+        self._failures = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        # 打包后的 exe 没有可用于运行脚本的解释器
+        return not getattr(sys, "frozen", False)
+
+    def start(self) -> "PythonPool":
+        with self._lock:
+            for _ in range(self.size):
+                self._spawn()
+        return self
+
+    def _spawn(self) -> None:
+        # 调用方持有 self._lock
+        if self._closed:
+            return
+        command = [self.python, "-u", os.path.abspath(__file__), "--worker"]
+        if self.preload:
+            command += ["--preload", ",".join(self.preload)]
+        # 协议和脚本输出统一使用 UTF-8，不受控制台代码页影响
+        options = {"env": dict(os.environ, PYTHONIOENCODING="utf-8")}
+        if sys.platform == "win32":
+            options["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+        else:
+            # 与 ProcessRegistry 启动的进程一样使用独立的进程组，off 时连同脚本创建的子进程一起结束
+            options["start_new_session"] = True
+        try:
+            popen = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                **options,
+            )
+        except OSError as e:
+            logging.error(f"启动 Python 工作进程失败: {e}")
+            self._failures += 1
+            return
+        worker = _Worker(popen)
+        self._workers.add(worker)
+        self.spawned += 1
+        threading.Thread(target=self._read_protocol, args=(worker,), name=f"RC-pypool-{popen.pid}", daemon=True).start()
+        threading.Thread(target=self._read_output, args=(worker,), name=f"RC-pypool-err-{popen.pid}", daemon=True).start()
+
+    def run(self, topic: str, path: str, args=()):
+        """
+        English: Runs a script in an idle warm worker; returns the worker's Popen, or None when no worker is ready
+        中文: 在空闲的预热工作进程中运行脚本，返回该工作进程的 Popen；没有就绪的工作进程时返回 None（由调用方冷启动）
+        """
+        with self._lock:
+            worker = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.popen.poll() is None:
+                    worker = candidate
+                    break
+            if worker is None:
+                # 所有工作进程都被占用（例如长时间运行的脚本），补充一个供下次使用，本次由调用方冷启动
+                starting = sum(1 for other in self._workers if not other.ready.is_set())
+                if not self._closed and starting < self.size:
+                    self._spawn()
+                return None
+            worker.topic = topic
+            worker.requested = time.monotonic()
+            worker.first_line = False
+        if self.on_start is not None:
+            # 先登记再发送请求，避免很快结束的脚本在登记之前就已经运行完
+            self.on_start(topic, worker.popen)
+        try:
+            worker.popen.stdin.write(json.dumps({"path": path, "args": list(args)}) + "\n")
+            worker.popen.stdin.flush()
+        except OSError as e:
+            logging.warning(f"Python 工作进程 {worker.popen.pid} 已失效: {e}")
+            if self.on_finish is not None:
+                self.on_finish(topic, worker.popen)
+            self._retire(worker)
+            return None
+        self.pooled_runs += 1
+        logging.info(f"在预热的 Python 工作进程 {worker.popen.pid} 中运行: {path}")
+        return worker.popen
+
+    def _read_protocol(self, worker: _Worker) -> None:
+        for line in worker.popen.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("event") == "ready":
+                worker.ready.set()
+                with self._lock:
+                    self._failures = 0
+                    self._idle.append(worker)
+            elif message.get("event") == "done":
+                logging.info(
+                    f"脚本运行结束（主题 {worker.topic}），退出码 {message.get('code')}，"
+                    f"耗时 {message.get('elapsed', 0):.2f}秒"
+                )
+                self._finish(worker)
+        # 工作进程退出（被 off 结束、崩溃或被回收）
+        worker.popen.wait()
+        with self._lock:
+            self._workers.discard(worker)
+            if worker in self._idle:
+                self._idle.remove(worker)
+            if not worker.ready.is_set():
+                self._failures += 1
+                logging.error(f"Python 工作进程 {worker.popen.pid} 启动失败，退出码 {worker.popen.returncode}")
+            # 空闲进程（包括正在启动的）不足时补充；连续启动失败（例如解释器路径错误）时不再补充
+            starting = sum(1 for other in self._workers if not other.ready.is_set())
+            if len(self._idle) + starting < self.size and self._failures < 3:
+                self._spawn()
+
+    def _read_output(self, worker: _Worker) -> None:
+        for line in worker.popen.stderr:
+            line = line.rstrip()
+            if not line:
+                continue
+            if worker.requested is not None and not worker.first_line:
+                worker.first_line = True
+                latency = time.monotonic() - worker.requested
+                self.first_line_latencies.append(latency)
+                logging.info(f"脚本首行输出耗时（预热）: {latency * 1000:.1f}ms")
+            logging.info(f"[{worker.topic or 'pypool'}] {line}")
+
+    def _finish(self, worker: _Worker) -> None:
+        worker.runs += 1
+        if self.on_finish is not None:
+            self.on_finish(worker.topic, worker.popen)
+        worker.topic = None
+        worker.requested = None
+        recycle = worker.runs >= self.max_runs
+        if not recycle:
+            try:
+                import psutil
+
+                recycle = psutil.Process(worker.popen.pid).memory_info().rss > self.max_rss
+            except Exception:
+                recycle = True
+        with self._lock:
+            if not recycle and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        self.recycled += 1
+        logging.info(f"回收 Python 工作进程 {worker.popen.pid}（已运行 {worker.runs} 次）")
+        self._retire(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        # 关闭 stdin 后工作进程的主循环自然结束
+        try:
+            worker.popen.stdin.close()
+        except OSError:
+            pass
+        try:
+            worker.popen.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            worker.popen.kill()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.first_line_latencies)
+        return {
+            "spawned": self.spawned,
+            "recycled": self.recycled,
+            "pooled_runs": self.pooled_runs,
+            "first_line_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        }
+
+    def close(self) -> None:
+        """
+        English: Stops idle workers; workers still running a script are left running
+        中文: 结束空闲的工作进程，正在运行脚本的工作进程保留（与普通启动的程序一致）
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            self._retire(worker)
+
+
+if __name__ == "__main__":
+    preload_modules = []
+    if "--preload" in sys.argv:
+        preload_modules = [name for name in sys.argv[sys.argv.index("--preload") + 1].split(",") if name]
+    if "--worker" in sys.argv:
+        worker_main(preload_modules)
@@ -0,0 +1,168 @@
+"""
+亮度/音量渐变：由共享定时器按固定步长计时、在少量常驻的渐变线程中逐步逼近目标值，
+不阻塞调度器的工作线程，也不为每次渐变创建线程。
+
+命令格式在 on#NN 的基础上增加可选的时长后缀：on#80@2 表示在 2 秒内渐变到 80。
+同一目标收到新命令时，从当前已到达的值重新开始渐变（或直接设置）。
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import TimerScheduler
+
+
+def parse_level(command: str):
+    """
+    English: Parses "on#NN" or "on#NN@seconds"; returns (value, duration or None)
+    中文: 解析 "on#NN" 或 "on#NN@秒数"，返回 (目标值, 渐变时长或 None)，格式错误时抛出 ValueError
+    """
+    body = command.split("#", 1)[1]
+    if "@" in body:
+        value, duration = body.split("@", 1)
+        duration = float(duration)
+        if duration < 0:
+            raise ValueError(f"渐变时长不能为负数: {duration}")
+    else:
+        value, duration = body, None
+    return int(value), duration
+
+
+class _Ramp:
+    __slots__ = ("key", "apply", "on_done", "start_value", "target", "started", "duration", "current", "handle")
+
+    def __init__(self, key, apply, on_done, start_value: int, target: int, duration: float):
+        self.key = key
+        self.apply = apply
+        self.on_done = on_done
+        self.start_value = start_value
+        self.target = target
+        self.started = time.monotonic()
+        self.duration = duration
+        self.current = start_value
+        self.handle = None
+
+
+class RampEngine:
+    """
+    English: Non-blocking value transitions timed by a shared TimerScheduler
+    中文: 由共享定时器计时的非阻塞渐变引擎
+
+    定时器线程只把到期的一步交给渐变线程，设置亮度（WMI）等可能耗时的调用在渐变线程中执行，
+    不会推迟同一定时器上的滑块合并和命令超时。同一 key 的设置由该 key 的设置锁串行化：
+    start() 直接设置与渐变的每一步都持有它，并在锁内确认渐变仍未被取代后才写入，
+    已被新命令取代的旧步骤不会覆盖新值。
+
+    参数:
+    - scheduler: TimerScheduler 实例
+    - step: 渐变的步长间隔（秒）
+    - workers: 渐变线程数上限，不同 key 的渐变可以同时设置
+    """
+
+    def __init__(self, scheduler: TimerScheduler, step: float = 0.05, workers: int = 2):
+        self.scheduler = scheduler
+        self.step = max(0.01, float(step))
+        self.started = 0
+        self.retargeted = 0
+        self._ramps = {}
+        self._apply_locks = {}
+        self._lock = threading.Lock()
+        # 线程在需要时创建，创建后一直保留，线程内缓存的 WMI 连接可以复用
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="RC-ramp")
+
+    def _apply_lock(self, key) -> threading.Lock:
+        with self._lock:
+            lock = self._apply_locks.get(key)
+            if lock is None:
+                lock = self._apply_locks[key] = threading.Lock()
+            return lock
+
+    def start(self, key, target: int, duration: float, apply, current, on_done=None) -> None:
+        """
+        English: Ramps key to target over duration seconds; retargets a ramp already in progress
+        中文: 在 duration 秒内把 key 渐变到 target；该 key 已有渐变时从当前到达的值重新开始
+
+        参数:
+        - apply: 设置实际值的函数；直接设置时在调用方线程中调用，渐变时在渐变线程中调用
+        - current: 返回当前值的函数，仅在没有进行中的渐变时调用
+        - on_done: 到达目标值后的回调，签名为 on_done(target)
+        """
+        # 先取得设置锁：正在设置的旧步骤完成后才读取它到达的值，直接设置也不会被旧步骤覆盖
+        with self._apply_lock(key):
+            with self._lock:
+                previous = self._ramps.pop(key, None)
+                if previous is not None:
+                    previous.handle.cancel()
+                    self.retargeted += 1
+                    start_value = previous.current
+                else:
+                    start_value = None
+            if duration > 0 and start_value is None:
+                start_value = current()
+            if duration > 0 and start_value != target:
+                ramp = _Ramp(key, apply, on_done, start_value, target, duration)
+                logging.info(f"开始渐变: {key} {start_value} -> {target}，时长 {duration}秒")
+                with self._lock:
+                    self.started += 1
+                    self._ramps[key] = ramp
+                    ramp.handle = self._executor.submit(self._step, ramp)
+                return
+            apply(target)
+        if on_done:
+            on_done(target)
+
+    def cancel(self, key) -> bool:
+        """
+        English: Stops the ramp of key at its current value; returns True if one was running
+        中文: 在当前值停止 key 的渐变，有进行中的渐变时返回 True
+        """
+        with self._lock:
+            ramp = self._ramps.pop(key, None)
+        if ramp is None:
+            return False
+        ramp.handle.cancel()
+        logging.info(f"取消渐变: {key}，停在 {ramp.current}")
+        return True
+
+    def active(self, key) -> bool:
+        with self._lock:
+            return key in self._ramps
+
+    def _submit(self, ramp: _Ramp) -> None:
+        # 在定时器线程中执行，只把下一步交给渐变线程
+        with self._lock:
+            if self._ramps.get(ramp.key) is not ramp:
+                return
+            ramp.handle = self._executor.submit(self._step, ramp)
+
+    def _step(self, ramp: _Ramp) -> None:
+        with self._apply_lock(ramp.key):
+            with self._lock:
+                if self._ramps.get(ramp.key) is not ramp:
+                    return
+            progress = min(1.0, (time.monotonic() - ramp.started) / ramp.duration)
+            value = round(ramp.start_value + (ramp.target - ramp.start_value) * progress)
+            if value != ramp.current:
+                try:
+                    ramp.apply(value)
+                except Exception as e:
+                    logging.error(f"渐变失败: {ramp.key}，停在 {ramp.current}: {e}")
+                    with self._lock:
+                        if self._ramps.get(ramp.key) is ramp:
+                            del self._ramps[ramp.key]
+                    return
+                ramp.current = value
+        with self._lock:
+            if self._ramps.get(ramp.key) is not ramp:
+                return
+            if progress < 1.0:
+                ramp.handle = self.scheduler.call_later(self.step, self._submit, ramp)
+                return
+            del self._ramps[ramp.key]
+        if ramp.on_done:
+            try:
+                ramp.on_done(ramp.target)
+            except Exception as e:
+                logging.error(f"渐变完成回调出错: {ramp.key}: {e}")
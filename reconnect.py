@@ -0,0 +1,333 @@
+"""
+断线重连：指数退避 + 随机抖动，网络恢复时立即重连，
+离线期间缓存要发布的状态消息，重连后补发，并统计重连耗时分位数。
+"""
+
+import ctypes
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+
+class Backoff:
+    """
+    English: Exponential backoff with jitter; the first retry is immediate
+    中文: 带随机抖动的指数退避，第一次重试立即进行
+
+    参数:
+    - base: 第二次重试的基础等待时间（秒）
+    - cap: 等待时间上限（秒）
+    - jitter: 抖动比例（0-1），实际等待时间在 [delay*(1-jitter), delay] 之间
+    """
+
+    def __init__(self, base: float = 0.5, cap: float = 60.0, jitter: float = 0.5, rng=random.random):
+        self.base = max(0.0, float(base))
+        self.cap = max(self.base, float(cap))
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+        self.rng = rng
+        self.attempt = 0
+
+    def next(self) -> float:
+        attempt = self.attempt
+        self.attempt += 1
+        if attempt == 0:
+            return 0.0
+        delay = min(self.cap, self.base * (2 ** (attempt - 1)))
+        return delay * (1 - self.jitter * self.rng())
+
+    def reset(self) -> None:
+        self.attempt = 0
+
+
+class OfflineBuffer:
+    """
+    English: Time-bounded buffer of outgoing publications kept while offline
+    中文: 离线期间缓存待发布的消息，超过 max_age 秒的消息会被丢弃
+
+    同一主题只保留最新的一条状态。
+    """
+
+    def __init__(self, max_age: float = 300.0, max_items: int = 100):
+        self.max_age = max_age
+        self.max_items = max(1, int(max_items))
+        self.expired = 0
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def put(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+        with self._lock:
+            self._items.pop(topic, None)
+            self._items[topic] = (payload, qos, retain, time.monotonic())
+            while len(self._items) > self.max_items:
+                self._items.pop(next(iter(self._items)))
+                self.expired += 1
+
+    def drain(self) -> list:
+        """
+        English: Removes and returns the messages that have not expired
+        中文: 取出所有未过期的消息
+        """
+        now = time.monotonic()
+        with self._lock:
+            items, self._items = self._items, {}
+        fresh = []
+        for topic, (payload, qos, retain, queued) in items.items():
+            if now - queued <= self.max_age:
+                fresh.append((topic, payload, qos, retain))
+            else:
+                self.expired += 1
+        return fresh
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ReconnectManager:
+    """
+    English: Paces reconnects, buffers publications while offline and records reconnect latency
+    中文: 控制重连节奏、离线缓存发布消息并记录重连耗时
+
+    参数:
+    - client: paho 客户端
+    - backoff: Backoff 实例
+    - buffer: OfflineBuffer 实例
+    - monotonic: 计算重连和唤醒耗时的时钟，默认使用 time.monotonic
+    """
+
+    def __init__(self, client, backoff: Backoff = None, buffer: OfflineBuffer = None, monotonic=time.monotonic):
+        self.client = client
+        self.monotonic = monotonic
+        self.backoff = backoff or Backoff()
+        self.buffer = buffer or OfflineBuffer()
+        self.connected = False
+        self.latencies = deque(maxlen=200)
+        self.wake_latencies = deque(maxlen=50)
+        # 在 kick() 时调用，asyncio 模式用它立即安排重连
+        self.on_kick = None
+        # 在网络线程中执行客户端操作，asyncio 模式替换为 call_soon
+        self.call = lambda callback, *args: callback(*args)
+        self._disconnected_at = None
+        self._paused_until = None
+        self._resumed_at = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def on_connected(self) -> None:
+        """
+        English: Call from on_connect on success; flushes buffered publications
+        中文: 连接成功时调用，补发离线期间缓存的消息
+        """
+        with self._lock:
+            self.connected = True
+            started = self._disconnected_at
+            self._disconnected_at = None
+        self.backoff.reset()
+        if started is not None:
+            latency = self.monotonic() - started
+            self.latencies.append(latency)
+            stats = self.latency_stats()
+            logging.info(
+                f"重连耗时 {latency * 1000:.0f}ms，累计 {stats['count']} 次: "
+                f"p50={stats['p50_ms']}ms p90={stats['p90_ms']}ms p99={stats['p99_ms']}ms"
+            )
+        pending = self.buffer.drain()
+        for topic, payload, qos, retain in pending:
+            self.client.publish(topic, payload, qos=qos, retain=retain)
+        if pending:
+            logging.info(f"已补发离线期间缓存的 {len(pending)} 条消息")
+
+    def on_disconnected(self) -> None:
+        """
+        English: Call when the connection is lost; idempotent
+        中文: 连接断开时调用，可重复调用
+        """
+        with self._lock:
+            self.connected = False
+            if self._disconnected_at is None:
+                self._disconnected_at = self.monotonic()
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+        """
+        English: Publishes now if connected, otherwise buffers until reconnected
+        中文: 已连接时立即发布，否则缓存到重连后补发
+        """
+        if self.connected:
+            info = self.client.publish(topic, payload, qos=qos, retain=retain)
+            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                return
+        self.buffer.put(topic, payload, qos, retain)
+
+    def pause(self, reason: str, max_pause: float = 120.0) -> None:
+        """
+        English: Disconnects cleanly and holds off reconnecting until resume() or max_pause seconds
+        中文: 主动断开连接，并在 resume() 或 max_pause 秒之前不再重连（例如即将睡眠）
+        """
+        logging.info(f"暂停MQTT连接: {reason}")
+        with self._lock:
+            self._paused_until = self.monotonic() + max_pause
+        self.on_disconnected()
+        self.call(self.client.disconnect)
+
+    def resume(self, reason: str) -> None:
+        """
+        English: Called after wake-up: drops the (likely dead) socket and reconnects immediately
+        中文: 系统唤醒后调用：丢弃可能已失效的连接并立即重连
+        """
+        with self._lock:
+            was_connected = self.connected
+            self._paused_until = None
+            self._resumed_at = self.monotonic()
+        if was_connected:
+            # 睡眠期间 TCP 连接已失效，不必等心跳超时
+            self.on_disconnected()
+            self.call(self.client.disconnect)
+        with self._lock:
+            # 重连耗时从唤醒时开始计算，不把睡眠时长计入
+            self._disconnected_at = self._resumed_at
+        self.kick(reason)
+
+    def on_ready(self, elapsed: float = 0.0) -> None:
+        """
+        English: Call once all topics are subscribed; records wake-to-ready latency after a resume
+        中文: 全部主题订阅完成后调用；若刚从睡眠唤醒，记录唤醒到可用的耗时
+        """
+        with self._lock:
+            resumed_at, self._resumed_at = self._resumed_at, None
+        if resumed_at is not None:
+            latency = self.monotonic() - resumed_at
+            self.wake_latencies.append(latency)
+            logging.info(f"唤醒后恢复可用耗时 {latency * 1000:.0f}ms")
+
+    def next_delay(self) -> float:
+        """
+        English: Delay before the next reconnect attempt, honouring pause()
+        中文: 下次重连前的等待时间，暂停期间返回剩余暂停时间
+        """
+        with self._lock:
+            paused_until = self._paused_until
+        if paused_until is not None:
+            remaining = paused_until - self.monotonic()
+            if remaining > 0:
+                return remaining
+            with self._lock:
+                self._paused_until = None
+            logging.warning("暂停超时，恢复重连")
+        return self.backoff.next()
+
+    @property
+    def paused(self) -> bool:
+        with self._lock:
+            return self._paused_until is not None
+
+    def kick(self, reason: str = "") -> None:
+        """
+        English: Skips the current backoff wait and reconnects immediately
+        中文: 跳过当前退避等待，立即重连（例如网络恢复、系统唤醒）
+        """
+        if self.connected or self.paused:
+            # 暂停期间（即将睡眠）忽略网络变化
+            return
+        logging.info(f"立即重连: {reason}")
+        self.backoff.reset()
+        self._wake.set()
+        if self.on_kick:
+            self.on_kick()
+
+    def wait(self, delay: float) -> bool:
+        """
+        English: Sleeps for delay seconds unless kicked or stopped; returns True if woken early
+        中文: 等待 delay 秒，被 kick() 或 stop() 唤醒时返回 True
+        """
+        woken = self._wake.wait(delay) if delay > 0 else self._wake.is_set()
+        self._wake.clear()
+        return woken
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def latency_stats(self) -> dict:
+        values = list(self.latencies)
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.5) * 1000, 1),
+            "p90_ms": round(percentile(values, 0.9) * 1000, 1),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        }
+
+    def run_network_loop(self, connected_at_start: bool) -> None:
+        """
+        English: Replacement for loop_forever() that reconnects with our own backoff
+        中文: 替代 loop_forever()，断线后按退避策略重连
+        """
+        need_reconnect = not connected_at_start
+        if need_reconnect:
+            self.on_disconnected()
+        while not self.stopped:
+            if not need_reconnect:
+                rc = self.client.loop(timeout=1.0)
+                if rc == mqtt.MQTT_ERR_SUCCESS:
+                    continue
+                if self.stopped:
+                    break
+                self.on_disconnected()
+                if not self.paused:
+                    logging.warning(f"MQTT连接已断开: {mqtt.error_string(rc)}")
+            delay = self.next_delay()
+            if delay > 0:
+                if not self.paused:
+                    logging.info(f"{delay:.1f}秒后重连（第 {self.backoff.attempt} 次）")
+                self.wait(delay)
+                if self.stopped:
+                    break
+                if self.paused:
+                    continue
+            try:
+                # 连接成功后由 loop() 处理 CONNACK，on_connect 中调用 on_connected()
+                self.client.reconnect()
+                need_reconnect = False
+            except OSError as e:
+                logging.error(f"重连失败: {e}")
+                need_reconnect = True
+
+
+def watch_network_changes(callback) -> None:
+    """
+    English: Calls callback whenever the IP address table changes (Windows only)
+    中文: 每当网络地址变化（如网络恢复）时调用 callback，仅支持 Windows
+    """
+    if sys.platform != "win32":
+        return
+
+    def watch():
+        while True:
+            try:
+                # 阻塞直到本机 IP 地址表发生变化
+                result = ctypes.windll.iphlpapi.NotifyAddrChange(None, None)
+            except Exception as e:
+                logging.error(f"监听网络变化失败: {e}")
+                return
+            if result == 0:
+                callback("网络地址变化")
+
+    thread = threading.Thread(target=watch, name="RC-netwatch", daemon=True)
+    thread.start()
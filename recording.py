@@ -0,0 +1,141 @@
+"""
+消息轨迹：把收到的每条消息（主题、内容、到达时间）追加写入紧凑的二进制文件，
+供 bench/replay.py 按原速、N 倍速或最快速度回放。
+
+文件格式（小端）:
+- 文件头 b"RCTRACE1"，仅在新文件开头写一次
+- b"S"：一次录制会话开始，之后的主题编号重新计数
+- b"T" + 主题编号(H) + 长度(H) + 主题：首次出现的主题
+- b"M" + 主题编号(H) + 到达时间(d, Unix 时间戳) + 长度(I) + 内容：一条消息
+
+每条消息只比内容多 15 字节。程序异常退出时末尾可能有不完整的记录，读取时会忽略。
+"""
+
+import logging
+import struct
+import threading
+import time
+
+MAGIC = b"RCTRACE1"
+_TOPIC = struct.Struct("<HH")
+_MESSAGE = struct.Struct("<HdI")
+
+
+class TraceMessage:
+    """
+    English: One message read back from a trace file
+    中文: 从轨迹文件中读出的一条消息
+    """
+
+    __slots__ = ("topic", "payload", "arrival")
+
+    def __init__(self, topic: str, payload: bytes, arrival: float):
+        self.topic = topic
+        self.payload = payload
+        self.arrival = arrival
+
+
+class TraceWriter:
+    """
+    English: Append-only recorder of received messages
+    中文: 只追加写入的消息录制器
+
+    参数:
+    - path: 轨迹文件路径，已存在时在末尾追加新的会话
+    - max_bytes: 文件大小上限，超过后停止录制，0 表示不限制
+    - flush_interval: 刷新到磁盘的最长间隔（秒）
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, flush_interval: float = 1.0):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._write(MAGIC)
+        self._write(b"S")
+        self._last_flush = time.monotonic()
+        logging.info(f"开始录制消息轨迹: {path}")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._size += len(data)
+
+    def record(self, topic: str, payload: bytes, arrival: float = None) -> None:
+        """
+        English: Appends one message; safe to call from any thread
+        中文: 追加一条消息，可从任意线程调用
+        """
+        if arrival is None:
+            arrival = time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            if self.max_bytes and self._size >= self.max_bytes:
+                logging.warning(f"消息轨迹文件已达上限 {self.max_bytes} 字节，停止录制")
+                self._close()
+                return
+            topic_id = self._topics.get(topic)
+            if topic_id is None:
+                topic_id = self._topics[topic] = len(self._topics)
+                name = topic.encode("utf-8")
+                self._write(b"T" + _TOPIC.pack(topic_id, len(name)) + name)
+            self._write(b"M" + _MESSAGE.pack(topic_id, arrival, len(payload)) + payload)
+            self.recorded += 1
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logging.info(f"消息轨迹录制结束: {self.path}（{self.recorded} 条）")
+
+
+def read_trace(path: str):
+    """
+    English: Yields TraceMessage objects in file order; a truncated tail is ignored
+    中文: 按文件顺序逐条返回 TraceMessage，末尾不完整的记录会被忽略
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"不是消息轨迹文件: {path}")
+    offset = len(MAGIC)
+    end = len(data)
+    topics = {}
+    while offset < end:
+        kind = data[offset:offset + 1]
+        offset += 1
+        if kind == b"S":
+            topics = {}
+        elif kind == b"T":
+            if offset + _TOPIC.size > end:
+                break
+            topic_id, size = _TOPIC.unpack_from(data, offset)
+            offset += _TOPIC.size
+            if offset + size > end:
+                break
+            topics[topic_id] = data[offset:offset + size].decode("utf-8")
+            offset += size
+        elif kind == b"M":
+            if offset + _MESSAGE.size > end:
+                break
+            topic_id, arrival, size = _MESSAGE.unpack_from(data, offset)
+            offset += _MESSAGE.size
+            if offset + size > end:
+                break
+            yield TraceMessage(topics[topic_id], data[offset:offset + size], arrival)
+            offset += size
+        else:
+            raise ValueError(f"消息轨迹文件已损坏: {path}（偏移 {offset - 1}）")
@@ -0,0 +1,77 @@
+"""
+睡眠唤醒检测：后台线程按固定间隔醒来，比较单调时钟与系统时钟的走时。
+
+- Windows 的 time.monotonic() 包含睡眠时间，唤醒后两次检查的间隔会远大于设定间隔
+- Linux 的 CLOCK_MONOTONIC 不含睡眠时间，唤醒后系统时钟比单调时钟多走了睡眠的时长
+
+两种情况都判定为刚从睡眠中唤醒。时钟和 sleep 函数可以替换，便于用模拟时钟测试。
+"""
+
+import logging
+import threading
+import time
+
+
+class ResumeDetector:
+    """
+    English: Detects resume from suspend via jumps between monotonic and wall clock time
+    中文: 通过单调时钟与系统时钟的跳变检测系统从睡眠中唤醒
+
+    参数:
+    - on_resume: 检测到唤醒时的回调，签名为 on_resume(gap)，gap 为估计的睡眠时长（秒）
+    - interval: 检查间隔（秒）
+    - threshold: 判定为睡眠的最小时间跳变（秒）
+    - monotonic / wall / sleep: 时钟与等待函数，默认使用 time 模块
+    """
+
+    def __init__(self, on_resume, interval: float = 2.0, threshold: float = 5.0,
+                 monotonic=time.monotonic, wall=time.time, sleep=time.sleep):
+        self.on_resume = on_resume
+        self.interval = interval
+        self.threshold = threshold
+        self.monotonic = monotonic
+        self.wall = wall
+        self.sleep = sleep
+        self.resumes = 0
+        self._last_mono = monotonic()
+        self._last_wall = wall()
+        self._stopped = threading.Event()
+
+    def check(self) -> float:
+        """
+        English: Compares clocks with the previous check; returns the detected sleep gap or 0
+        中文: 与上次检查比较两个时钟，返回检测到的睡眠时长，未检测到返回 0
+        """
+        mono = self.monotonic()
+        wall = self.wall()
+        mono_gap = mono - self._last_mono
+        wall_gap = wall - self._last_wall
+        self._last_mono = mono
+        self._last_wall = wall
+        # 单调时钟包含睡眠（Windows）：间隔明显超出设定值
+        overrun = mono_gap - self.interval
+        # 单调时钟不含睡眠（Linux）：系统时钟比单调时钟多走了一截
+        drift = wall_gap - mono_gap
+        gap = max(overrun, drift)
+        if gap < self.threshold:
+            return 0.0
+        self.resumes += 1
+        logging.info(f"检测到系统唤醒，估计睡眠 {gap:.1f}秒")
+        try:
+            self.on_resume(gap)
+        except Exception as e:
+            logging.error(f"处理系统唤醒时出错: {e}")
+        return gap
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            self.sleep(self.interval)
+            self.check()
+
+    def start(self) -> "ResumeDetector":
+        thread = threading.Thread(target=self.run, name="RC-resume", daemon=True)
+        thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
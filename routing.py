@@ -0,0 +1,150 @@
+"""
+主题路由表：启动时把所有启用的主题编译为 主题 -> 路由记录 的字典，
+处理命令时只需一次字典查找，与自定义主题数量无关。
+"""
+
+import re
+
+# 内置主题的名称，同时作为对应路由记录的 kind
+BUILTIN_TOPICS = ("Computer", "screen", "volume", "sleep", "media")
+
+_CUSTOM_KEY = re.compile(r"^(application|serve)(\d+)$")
+
+
+def custom_theme_indices(config: dict, prefix: str) -> list:
+    """
+    English: Returns the sorted indices of all applicationN/serveN keys, without an upper bound
+    中文: 返回配置中所有 applicationN / serveN 键的序号（升序），数量不设上限
+    """
+    indices = []
+    for key in config:
+        match = _CUSTOM_KEY.match(key)
+        if match and match.group(1) == prefix:
+            indices.append(int(match.group(2)))
+    return sorted(indices)
+
+
+def any_theme_enabled(config: dict) -> bool:
+    """
+    English: Returns True if a built-in topic or an applicationN/serveN topic is enabled
+    中文: 至少启用了一个内置主题或 applicationN / serveN 主题时返回 True，
+    与 custom_theme_indices 识别的键一致，其他以 _checked 结尾的键不算
+    """
+    for key in BUILTIN_TOPICS:
+        if config.get(f"{key}_checked") == 1:
+            return True
+    for key in config:
+        if _CUSTOM_KEY.match(key) and config.get(f"{key}_checked") == 1:
+            return True
+    return False
+
+
+class Route:
+    """
+    English: Base routing record; kind selects the handler
+    中文: 路由记录基类，kind 决定使用哪个处理函数
+    """
+
+    __slots__ = ("topic", "kind")
+
+    def __init__(self, topic: str, kind: str):
+        self.topic = topic
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def _fields(cls):
+        names = []
+        for klass in reversed(cls.__mro__):
+            names.extend(getattr(klass, "__slots__", ()))
+        return names
+
+
+class ApplicationRoute(Route):
+    """
+    English: Routing record of an application/script topic
+    中文: 程序或脚本主题的路由记录
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, topic: str, path: str):
+        super().__init__(topic, "application")
+        self.path = path
+
+
+class ServiceRoute(Route):
+    """
+    English: Routing record of a Windows service topic
+    中文: 服务主题的路由记录
+    """
+
+    __slots__ = ("service",)
+
+    def __init__(self, topic: str, service: str):
+        super().__init__(topic, "service")
+        self.service = service
+
+
+class BuiltinRoute(Route):
+    """
+    English: Routing record of a built-in topic (Computer/screen/volume/sleep/media)
+    中文: 内置主题（计算机/屏幕/音量/睡眠/媒体）的路由记录
+    """
+
+    __slots__ = ()
+
+    def __init__(self, topic: str, name: str):
+        super().__init__(topic, name)
+
+
+def build_routes(applications, serves, builtins: dict) -> dict:
+    """
+    English: Compiles enabled topics into a topic -> route dictionary
+    中文: 将启用的主题编译为 主题 -> 路由记录 的字典
+
+    参数:
+    - applications: [(主题, 程序路径), ...]
+    - serves: [(主题, 服务名称), ...]
+    - builtins: {内置主题名称: 主题}，未启用的主题值为 None
+
+    主题重复时与原先的匹配顺序一致：程序优先于服务，服务优先于内置主题，
+    同类主题中靠前的优先。
+    """
+    routes = {}
+    for topic, path in applications:
+        if topic:
+            routes.setdefault(topic, ApplicationRoute(topic, path))
+    for topic, service in serves:
+        if topic:
+            routes.setdefault(topic, ServiceRoute(topic, service))
+    for name in BUILTIN_TOPICS:
+        topic = builtins.get(name)
+        if topic:
+            routes.setdefault(topic, BuiltinRoute(topic, name))
+    return routes
+
+
+def routes_from_config(config: dict) -> dict:
+    """
+    English: Builds the route table from a config.json dictionary, the same way main.py loads topics
+    中文: 按 main.py 加载主题的规则，从 config.json 的内容直接生成路由表（供回放等工具使用）
+    """
+
+    def enabled(key):
+        return config.get(key) if config.get(f"{key}_checked") == 1 else None
+
+    applications = []
+    for i in custom_theme_indices(config, "application"):
+        topic = enabled(f"application{i}")
+        if topic:
+            applications.append((topic, config.get(f"application{i}_directory{i}")))
+    serves = []
+    for i in custom_theme_indices(config, "serve"):
+        topic = enabled(f"serve{i}")
+        if topic:
+            serves.append((topic, config.get(f"serve{i}_value")))
+    return build_routes(applications, serves, {name: enabled(name) for name in BUILTIN_TOPICS})
@@ -0,0 +1,105 @@
+"""
+共享定时器：所有延迟任务（滑块合并窗口、渐变的每一步等）都在同一个后台线程中按时间顺序执行，
+不再为每个定时任务单独创建线程。
+
+回调在定时器线程中执行，应尽快返回；耗时的工作应交给调度器的工作线程。
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class TimerHandle:
+    """
+    English: Handle of a scheduled callback; cancel() prevents it from running
+    中文: 已安排的定时任务，调用 cancel() 后不再执行
+    """
+
+    __slots__ = ("due", "callback", "args", "cancelled")
+
+    def __init__(self, due: float, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """
+    English: Runs delayed callbacks in due order on one shared daemon thread
+    中文: 在一个共享的后台线程中按到期顺序执行延迟任务
+
+    参数:
+    - name: 定时器线程名称
+    """
+
+    def __init__(self, name: str = "RC-timer"):
+        self.name = name
+        self.executed = 0
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def call_later(self, delay: float, callback, *args) -> TimerHandle:
+        """
+        English: Schedules callback(*args) after delay seconds; safe to call from any thread
+        中文: delay 秒后执行 callback(*args)，可从任意线程调用
+        """
+        handle = TimerHandle(time.monotonic() + max(0.0, delay), callback, args)
+        with self._condition:
+            if self._stopped:
+                handle.cancelled = True
+                return handle
+            heapq.heappush(self._heap, (handle.due, next(self._counter), handle))
+            if self._thread is None:
+                # 第一次安排任务时才创建线程
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                # 新任务比原先最早的任务更早到期，唤醒线程重新计算等待时间
+                self._condition.notify()
+        return handle
+
+    def pending(self) -> int:
+        with self._condition:
+            return sum(1 for _, _, handle in self._heap if not handle.cancelled)
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._heap.clear()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    if self._heap:
+                        due, _, handle = self._heap[0]
+                        if handle.cancelled:
+                            heapq.heappop(self._heap)
+                            continue
+                        wait = due - time.monotonic()
+                        if wait <= 0:
+                            heapq.heappop(self._heap)
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            if handle.cancelled:
+                continue
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logging.error(f"定时任务执行出错: {e}")
+            self.executed += 1
@@ -0,0 +1,594 @@
+"""
+服务控制：在进程内直接与服务管理器通信，不再为每个命令启动 sc / systemctl 进程并解析文本输出。
+
+- WindowsServiceManager：通过 advapi32 的 SCM API（OpenServiceW / QueryServiceStatusEx / StartServiceW /
+  ControlService）控制服务，每个服务的句柄只打开一次并缓存；等待状态变化使用
+  NotifyServiceStatusChangeW，在可提醒等待中接收通知，不轮询
+- SystemdServiceManager：通过 systemd 的 D-Bus 接口（需要可选依赖 jeepney）控制单元，缓存每个单元的对象路径；
+  启动/停止时等待对应作业的 JobRemoved 信号，等待期间不持有锁，多个服务可以同时启动/停止。
+  没有 jeepney 或连不上系统总线时退回 systemctl 命令
+
+所有操作都返回 ServiceResult，错误信息以结构化字段给出。
+"""
+
+import ctypes
+import logging
+import subprocess
+import sys
+import threading
+import time
+from queue import Empty
+
+# 服务状态（SERVICE_STATUS_PROCESS.dwCurrentState）
+SERVICE_STOPPED = 1
+SERVICE_START_PENDING = 2
+SERVICE_STOP_PENDING = 3
+SERVICE_RUNNING = 4
+SERVICE_CONTINUE_PENDING = 5
+SERVICE_PAUSE_PENDING = 6
+SERVICE_PAUSED = 7
+
+STATE_NAMES = {
+    SERVICE_STOPPED: "stopped",
+    SERVICE_START_PENDING: "starting",
+    SERVICE_STOP_PENDING: "stopping",
+    SERVICE_RUNNING: "running",
+    SERVICE_CONTINUE_PENDING: "starting",
+    SERVICE_PAUSE_PENDING: "stopping",
+    SERVICE_PAUSED: "paused",
+}
+
+SC_MANAGER_CONNECT = 0x0001
+SERVICE_QUERY_STATUS = 0x0004
+SERVICE_START = 0x0010
+SERVICE_STOP = 0x0020
+SERVICE_CONTROL_STOP = 0x00000001
+SC_STATUS_PROCESS_INFO = 0
+
+SERVICE_NOTIFY_STATUS_CHANGE = 2
+SERVICE_NOTIFY_STOPPED = 0x1
+SERVICE_NOTIFY_RUNNING = 0x8
+
+# SleepEx 因 APC（服务状态通知）返回
+WAIT_IO_COMPLETION = 0xC0
+
+ERROR_ACCESS_DENIED = 5
+ERROR_INVALID_HANDLE = 6
+ERROR_SERVICE_ALREADY_RUNNING = 1056
+ERROR_SERVICE_NOT_ACTIVE = 1062
+ERROR_SERVICE_MARKED_FOR_DELETE = 1072
+ERROR_SERVICE_NOTIFY_CLIENT_LAGGING = 1294
+
+WIN32_ERRORS = {
+    ERROR_ACCESS_DENIED: "拒绝访问，需要管理员权限",
+    1053: "服务没有及时响应启动或控制请求",
+    1058: "服务已被禁用",
+    1060: "服务不存在",
+    1068: "依赖的服务无法启动",
+    ERROR_SERVICE_NOT_ACTIVE: "服务没有运行",
+}
+
+DWORD = ctypes.c_uint32
+
+
+class SERVICE_STATUS_PROCESS(ctypes.Structure):
+    _fields_ = [
+        ("dwServiceType", DWORD),
+        ("dwCurrentState", DWORD),
+        ("dwControlsAccepted", DWORD),
+        ("dwWin32ExitCode", DWORD),
+        ("dwServiceSpecificExitCode", DWORD),
+        ("dwCheckPoint", DWORD),
+        ("dwWaitHint", DWORD),
+        ("dwProcessId", DWORD),
+        ("dwServiceFlags", DWORD),
+    ]
+
+
+class SERVICE_NOTIFY_2W(ctypes.Structure):
+    _fields_ = [
+        ("dwVersion", DWORD),
+        ("pfnNotifyCallback", ctypes.c_void_p),
+        ("pContext", ctypes.c_void_p),
+        ("dwNotificationStatus", DWORD),
+        ("ServiceStatus", SERVICE_STATUS_PROCESS),
+        ("dwNotificationTriggered", DWORD),
+        ("pszServiceNames", ctypes.c_wchar_p),
+    ]
+
+
+class ServiceResult:
+    """
+    English: Outcome of a service operation
+    中文: 服务操作的结果
+
+    - ok: 操作是否成功（查询状态时表示是否查询成功）
+    - state: 操作后的状态：running/stopped/starting/stopping/paused/unknown
+    - changed: 是否实际改变了服务状态（服务本来就处于目标状态时为 False）
+    - error: 失败原因，成功时为 None
+    - code: 系统错误码（Windows 为 Win32 错误码，systemd 为 0）
+    """
+
+    __slots__ = ("ok", "state", "changed", "error", "code")
+
+    def __init__(self, ok: bool, state: str, changed: bool = False, error: str = None, code: int = 0):
+        self.ok = ok
+        self.state = state
+        self.changed = changed
+        self.error = error
+        self.code = code
+
+    def __repr__(self) -> str:
+        return (
+            f"ServiceResult(ok={self.ok!r}, state={self.state!r}, changed={self.changed!r}, "
+            f"error={self.error!r}, code={self.code!r})"
+        )
+
+
+class _Win32Error(Exception):
+    def __init__(self, code: int, action: str):
+        self.code = code
+        message = WIN32_ERRORS.get(code) or ctypes.FormatError(code).strip()
+        super().__init__(f"{action}失败: {message}（错误码 {code}）")
+
+
+class WindowsServiceManager:
+    """
+    English: Service control through the Windows SCM API with cached per-service handles
+    中文: 通过 Windows SCM API 控制服务，按服务缓存句柄
+
+    没有管理员权限时句柄只以查询权限打开，查询状态仍然可用，启动/停止返回“拒绝访问”。
+    同一服务的操作依次执行，不同服务之间互不阻塞。
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self._api = None
+        self._scm = None
+        self._handles = {}
+        self._service_locks = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # 调用方持有 self._lock
+        if self._api is not None:
+            return self._api
+        advapi = ctypes.WinDLL("advapi32", use_last_error=True)
+        kernel = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = ctypes.c_void_p
+        advapi.OpenSCManagerW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, DWORD]
+        advapi.OpenSCManagerW.restype = handle
+        advapi.OpenServiceW.argtypes = [handle, ctypes.c_wchar_p, DWORD]
+        advapi.OpenServiceW.restype = handle
+        advapi.CloseServiceHandle.argtypes = [handle]
+        advapi.QueryServiceStatusEx.argtypes = [handle, ctypes.c_int, ctypes.c_void_p, DWORD, ctypes.POINTER(DWORD)]
+        advapi.StartServiceW.argtypes = [handle, DWORD, ctypes.c_void_p]
+        advapi.ControlService.argtypes = [handle, DWORD, ctypes.c_void_p]
+        advapi.NotifyServiceStatusChangeW.argtypes = [handle, DWORD, ctypes.POINTER(SERVICE_NOTIFY_2W)]
+        advapi.NotifyServiceStatusChangeW.restype = DWORD
+        kernel.SleepEx.argtypes = [DWORD, ctypes.c_int]
+        kernel.SleepEx.restype = DWORD
+        # 通知通过 APC 送达，状态从 SERVICE_NOTIFY_2W 结构读取，回调本身什么都不做；保持引用防止被回收
+        self._callback = ctypes.WINFUNCTYPE(None, ctypes.c_void_p)(lambda parameter: None)
+        self._api = (advapi, kernel)
+        return self._api
+
+    def _service_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            lock = self._service_locks.get(name)
+            if lock is None:
+                lock = self._service_locks[name] = threading.Lock()
+            return lock
+
+    def _handle(self, name: str):
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None:
+                return handle
+            advapi, _ = self._load()
+            if not self._scm:
+                self._scm = advapi.OpenSCManagerW(None, None, SC_MANAGER_CONNECT)
+                if not self._scm:
+                    raise _Win32Error(ctypes.get_last_error(), "连接服务管理器")
+            handle = advapi.OpenServiceW(self._scm, name, SERVICE_QUERY_STATUS | SERVICE_START | SERVICE_STOP)
+            if not handle and ctypes.get_last_error() == ERROR_ACCESS_DENIED:
+                # 没有管理员权限时仍然可以查询状态
+                handle = advapi.OpenServiceW(self._scm, name, SERVICE_QUERY_STATUS)
+            if not handle:
+                raise _Win32Error(ctypes.get_last_error(), f"打开服务 {name} ")
+            self._handles[name] = handle
+            self.opened += 1
+            return handle
+
+    def _drop(self, name: str) -> None:
+        # 关闭句柄同时取消该句柄上尚未送达的状态通知
+        with self._lock:
+            handle = self._handles.pop(name, None)
+            if handle is not None:
+                self._api[0].CloseServiceHandle(handle)
+
+    def _query(self, name: str) -> SERVICE_STATUS_PROCESS:
+        for attempt in (0, 1):
+            handle = self._handle(name)
+            status = SERVICE_STATUS_PROCESS()
+            needed = DWORD()
+            if self._api[0].QueryServiceStatusEx(
+                handle, SC_STATUS_PROCESS_INFO, ctypes.byref(status), ctypes.sizeof(status), ctypes.byref(needed)
+            ):
+                return status
+            code = ctypes.get_last_error()
+            if attempt or code not in (ERROR_INVALID_HANDLE, ERROR_SERVICE_MARKED_FOR_DELETE):
+                raise _Win32Error(code, f"查询服务 {name} ")
+            # 服务被删除后重新创建等情况，句柄失效，重新打开一次
+            self._drop(name)
+
+    @staticmethod
+    def _failed(error: _Win32Error, state: str = "unknown") -> ServiceResult:
+        return ServiceResult(False, state, error=str(error), code=error.code)
+
+    def preload(self, names) -> None:
+        """
+        English: Opens and caches the handles of the configured services
+        中文: 预先打开并缓存已配置服务的句柄
+        """
+        for name in names:
+            try:
+                self._handle(name)
+            except _Win32Error as e:
+                logging.warning(str(e))
+
+    def status(self, name: str) -> ServiceResult:
+        """
+        English: Returns the current state of a service
+        中文: 查询服务当前状态
+        """
+        ok = False
+        try:
+            state = self._query(name).dwCurrentState
+            ok = True
+        except _Win32Error as e:
+            return self._failed(e)
+        finally:
+            if not ok:
+                # 查询失败（包括非 _Win32Error 的异常）时关闭缓存的句柄，下次重新打开
+                self._drop(name)
+        return ServiceResult(True, STATE_NAMES.get(state, "unknown"))
+
+    def start(self, name: str, timeout: float = 30) -> ServiceResult:
+        """
+        English: Starts a service and waits until it is running, stopped again or timeout expires
+        中文: 启动服务并等待其进入运行状态（启动后又停止或超时视为失败）
+        """
+        with self._service_lock(name):
+            try:
+                if self._query(name).dwCurrentState == SERVICE_RUNNING:
+                    return ServiceResult(True, "running")
+                if not self._api[0].StartServiceW(self._handle(name), 0, None):
+                    code = ctypes.get_last_error()
+                    if code != ERROR_SERVICE_ALREADY_RUNNING:
+                        raise _Win32Error(code, f"启动服务 {name} ")
+                return self._wait(name, SERVICE_RUNNING, timeout)
+            except _Win32Error as e:
+                return self._failed(e)
+
+    def stop(self, name: str, timeout: float = 30) -> ServiceResult:
+        """
+        English: Stops a service and waits until it has stopped or timeout expires
+        中文: 停止服务并等待其进入停止状态
+        """
+        with self._service_lock(name):
+            try:
+                if self._query(name).dwCurrentState == SERVICE_STOPPED:
+                    return ServiceResult(True, "stopped")
+                status = SERVICE_STATUS_PROCESS()
+                if not self._api[0].ControlService(self._handle(name), SERVICE_CONTROL_STOP, ctypes.byref(status)):
+                    code = ctypes.get_last_error()
+                    if code != ERROR_SERVICE_NOT_ACTIVE:
+                        raise _Win32Error(code, f"停止服务 {name} ")
+                return self._wait(name, SERVICE_STOPPED, timeout)
+            except _Win32Error as e:
+                return self._failed(e)
+
+    def _wait(self, name: str, target: int, timeout: float) -> ServiceResult:
+        # 等待失败或抛出异常（包括 KeyboardInterrupt）时，句柄上可能还有引用着已释放的 notify 的状态通知，
+        # 在 finally 中关闭句柄（CloseServiceHandle）以取消它，下次使用时重新打开
+        result = None
+        try:
+            result = self._wait_state(name, target, timeout)
+            return result
+        finally:
+            if result is None or not result.ok:
+                self._drop(name)
+
+    def _wait_state(self, name: str, target: int, timeout: float) -> ServiceResult:
+        advapi, kernel = self._api
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self._query(name)
+            state = status.dwCurrentState
+            if state == target:
+                return ServiceResult(True, STATE_NAMES[state], changed=True)
+            if target == SERVICE_RUNNING and state == SERVICE_STOPPED:
+                # 启动过程中服务自行退出
+                code = status.dwWin32ExitCode
+                return ServiceResult(False, "stopped", error=f"服务 {name} 启动后退出（退出码 {code}）", code=code)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return ServiceResult(False, STATE_NAMES.get(state, "unknown"), error=f"等待服务 {name} 超时")
+            notify = SERVICE_NOTIFY_2W()
+            notify.dwVersion = SERVICE_NOTIFY_STATUS_CHANGE
+            notify.pfnNotifyCallback = ctypes.cast(self._callback, ctypes.c_void_p)
+            code = advapi.NotifyServiceStatusChangeW(
+                self._handle(name), SERVICE_NOTIFY_RUNNING | SERVICE_NOTIFY_STOPPED, ctypes.byref(notify)
+            )
+            if code == ERROR_SERVICE_NOTIFY_CLIENT_LAGGING:
+                self._drop(name)
+                continue
+            if code:
+                raise _Win32Error(code, f"注册服务 {name} 状态通知")
+            # 可提醒等待：状态变化时系统在本线程上排队 APC，SleepEx 提前返回
+            if kernel.SleepEx(max(1, int(remaining * 1000)), True) != WAIT_IO_COMPLETION:
+                # 超时时通知仍在等待，notify 即将被释放，关闭句柄以取消它
+                self._drop(name)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._api is None:
+                return
+            for handle in self._handles.values():
+                self._api[0].CloseServiceHandle(handle)
+            self._handles.clear()
+            if self._scm:
+                self._api[0].CloseServiceHandle(self._scm)
+                self._scm = None
+
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_PATH = "/org/freedesktop/systemd1"
+SYSTEMD_MANAGER = "org.freedesktop.systemd1.Manager"
+
+ACTIVE_STATES = {
+    "active": "running",
+    "reloading": "running",
+    "activating": "starting",
+    "deactivating": "stopping",
+    "inactive": "stopped",
+    "failed": "stopped",
+}
+
+
+class SystemdServiceManager:
+    """
+    English: Service control through the systemd D-Bus API, falling back to systemctl
+    中文: 通过 systemd 的 D-Bus 接口控制服务，不可用时使用 systemctl 命令
+
+    使用一个独立的系统总线连接（需要接收 JobRemoved 信号），由 jeepney 的路由器在接收线程中把方法回复交给
+    对应的调用方，把 JobRemoved 信号放入每个等待中的作业自己的队列；self._lock 只保护连接的建立与关闭，
+    等待作业完成时不持有锁，一个服务的长时间启动不会阻塞其他服务的操作。
+    服务名不带后缀时自动补 .service。
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.available = True
+        self._router = None
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(name: str) -> str:
+        return name if "." in name else f"{name}.service"
+
+    def _connect(self):
+        # 调用方持有 self._lock；没有 jeepney 或连不上总线时抛出异常并标记为不可用
+        if self._router is not None:
+            return self._router
+        try:
+            from jeepney.bus_messages import MatchRule, message_bus
+            from jeepney.io.threading import DBusRouter, open_dbus_connection
+            from jeepney.wrappers import unwrap_msg
+        except ImportError:
+            self.available = False
+            raise
+        try:
+            connection = open_dbus_connection(bus="SYSTEM")
+        except OSError:
+            self.available = False
+            raise
+        self._job_rule = MatchRule(
+            type="signal", sender=SYSTEMD_BUS_NAME, interface=SYSTEMD_MANAGER, member="JobRemoved", path=SYSTEMD_PATH
+        )
+        router = DBusRouter(connection)
+        try:
+            router.send_and_get_reply(message_bus.AddMatch(self._job_rule), timeout=10)
+            # systemd 只向订阅过的客户端发送作业信号；这里持有 self._lock，不经过 _call 的断线处理
+            unwrap_msg(router.send_and_get_reply(self._message(SYSTEMD_PATH, SYSTEMD_MANAGER, "Subscribe"), timeout=10))
+        except Exception:
+            router.close()
+            connection.close()
+            raise
+        self._router = router
+        return router
+
+    def _disconnect(self, router) -> None:
+        # 连接断开，下次重新连接；其他线程可能已经换上了新的连接
+        with self._lock:
+            if self._router is not router:
+                return
+            self._router = None
+        router.close()
+        router.conn.close()
+
+    @staticmethod
+    def _message(path: str, interface: str, method: str, signature: str = "", args=()):
+        from jeepney import DBusAddress, new_method_call
+
+        return new_method_call(DBusAddress(path, bus_name=SYSTEMD_BUS_NAME, interface=interface), method, signature, args)
+
+    def _call(self, router, path: str, interface: str, method: str, signature: str = "", args=()):
+        from jeepney.io.common import RouterClosed
+        from jeepney.wrappers import unwrap_msg
+
+        message = self._message(path, interface, method, signature, args)
+        try:
+            return unwrap_msg(router.send_and_get_reply(message, timeout=10))
+        except (OSError, ConnectionError, RouterClosed):
+            self._disconnect(router)
+            raise
+
+    def _path(self, router, name: str) -> str:
+        path = self._paths.get(name)
+        if path is None:
+            path = self._call(router, SYSTEMD_PATH, SYSTEMD_MANAGER, "LoadUnit", "s", (self._unit(name),))[0]
+            with self._lock:
+                if name not in self._paths:
+                    self._paths[name] = path
+                    self.opened += 1
+        return path
+
+    def _active_state(self, router, name: str) -> str:
+        return self._call(
+            router, self._path(router, name), "org.freedesktop.DBus.Properties", "Get", "ss",
+            ("org.freedesktop.systemd1.Unit", "ActiveState"),
+        )[0][1]
+
+    @staticmethod
+    def _failed(error: Exception) -> ServiceResult:
+        # jeepney 的 DBusErrorResponse 带有错误名，例如 org.freedesktop.systemd1.NoSuchUnit
+        name = getattr(error, "name", None)
+        return ServiceResult(False, "unknown", error=f"{name}: {error}" if name else str(error))
+
+    def preload(self, names) -> None:
+        """
+        English: Resolves and caches the unit object paths of the configured services
+        中文: 预先解析并缓存已配置服务的单元对象路径
+        """
+        for name in names:
+            router = self._usable()
+            if router is None:
+                return
+            try:
+                self._path(router, name)
+            except Exception as e:
+                logging.warning(f"解析服务 {name} 失败: {e}")
+
+    def status(self, name: str) -> ServiceResult:
+        """
+        English: Returns the current state of a service from its ActiveState
+        中文: 根据单元的 ActiveState 返回服务当前状态
+        """
+        router = self._usable()
+        if router is None:
+            return self._systemctl_status(name)
+        try:
+            state = self._active_state(router, name)
+        except Exception as e:
+            return self._failed(e)
+        return ServiceResult(True, ACTIVE_STATES.get(state, "unknown"))
+
+    def start(self, name: str, timeout: float = 30) -> ServiceResult:
+        """
+        English: Starts a unit and waits for its job to finish
+        中文: 启动服务并等待对应作业完成
+        """
+        return self._run_job(name, "StartUnit", "running", timeout)
+
+    def stop(self, name: str, timeout: float = 30) -> ServiceResult:
+        """
+        English: Stops a unit and waits for its job to finish
+        中文: 停止服务并等待对应作业完成
+        """
+        return self._run_job(name, "StopUnit", "stopped", timeout)
+
+    def _usable(self):
+        # 返回当前的路由器，D-Bus 不可用时返回 None
+        with self._lock:
+            if not self.available:
+                return None
+            try:
+                return self._connect()
+            except Exception as e:
+                # 没有 jeepney 或没有系统总线时之后不再尝试，其他错误下次重新连接
+                logging.info(f"systemd D-Bus 不可用，本次使用 systemctl 控制服务: {e}")
+                return None
+
+    def _run_job(self, name: str, method: str, target: str, timeout: float) -> ServiceResult:
+        router = self._usable()
+        if router is None:
+            return self._systemctl(name, method, target, timeout)
+        try:
+            if ACTIVE_STATES.get(self._active_state(router, name)) == target:
+                return ServiceResult(True, target)
+            # 先登记自己的信号队列再提交作业，避免作业在登记前就已完成；
+            # 每个作业一个队列，同一单元上的并发请求被 systemd 合并为同一作业时也都能收到信号
+            with router.filter(self._job_rule, bufsize=64) as queue:
+                job = self._call(router, SYSTEMD_PATH, SYSTEMD_MANAGER, method, "ss", (self._unit(name), "replace"))[0]
+                result = self._wait_job(queue, job, timeout)
+            if result is None:
+                return ServiceResult(False, ACTIVE_STATES.get(self._active_state(router, name), "unknown"),
+                                     error=f"等待服务 {name} 超时")
+            state = ACTIVE_STATES.get(self._active_state(router, name), "unknown")
+            if result != "done":
+                # 作业结果：failed/timeout/canceled/dependency/skipped 等
+                return ServiceResult(False, state, error=f"服务 {name} 的作业结果为 {result}")
+            return ServiceResult(True, state, changed=True)
+        except Exception as e:
+            return self._failed(e)
+
+    @staticmethod
+    def _wait_job(queue, job: str, timeout: float):
+        # queue 只收到 JobRemoved 信号，其中也有其他作业的，跳过即可
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                message = queue.get(timeout=remaining)
+            except Empty:
+                return None
+            # JobRemoved(u id, o job, s unit, s result)
+            _, removed, _, result = message.body
+            if removed == job:
+                return result
+
+    def _systemctl_status(self, name: str) -> ServiceResult:
+        result = subprocess.run(["systemctl", "is-active", self._unit(name)], capture_output=True, text=True)
+        state = result.stdout.strip()
+        if state not in ACTIVE_STATES:
+            return ServiceResult(False, "unknown", error=result.stderr.strip() or state, code=result.returncode)
+        return ServiceResult(True, ACTIVE_STATES[state])
+
+    def _systemctl(self, name: str, method: str, target: str, timeout: float) -> ServiceResult:
+        current = self._systemctl_status(name)
+        if current.state == target:
+            return current
+        command = "start" if method == "StartUnit" else "stop"
+        try:
+            # systemctl 默认等待作业完成
+            result = subprocess.run(
+                ["systemctl", command, self._unit(name)], capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return ServiceResult(False, self._systemctl_status(name).state, error=f"等待服务 {name} 超时")
+        state = self._systemctl_status(name).state
+        if result.returncode != 0:
+            return ServiceResult(False, state, error=result.stderr.strip(), code=result.returncode)
+        return ServiceResult(True, state, changed=True)
+
+    def close(self) -> None:
+        with self._lock:
+            router, self._router = self._router, None
+        if router is not None:
+            router.close()
+            router.conn.close()
+
+
+def create_service_manager():
+    """
+    English: Returns the service manager of the current platform
+    中文: 返回当前平台的服务控制后端
+    """
+    if sys.platform == "win32":
+        return WindowsServiceManager()
+    return SystemdServiceManager()
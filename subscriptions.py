@@ -0,0 +1,95 @@
+"""
+批量订阅：重连后用尽量少的 SUBSCRIBE 报文订阅全部主题，
+并记录从连接成功到全部主题订阅确认的耗时。
+"""
+
+import logging
+import threading
+import time
+
+# 单个 SUBSCRIBE 报文最多携带的主题数和字节数，避免超出服务器限制
+DEFAULT_MAX_TOPICS = 50
+DEFAULT_MAX_BYTES = 16 * 1024
+
+
+def chunk_topics(topics, max_topics: int = DEFAULT_MAX_TOPICS, max_bytes: int = DEFAULT_MAX_BYTES):
+    """
+    English: Splits topics into chunks that each fit in one SUBSCRIBE packet
+    中文: 将主题切分为若干批，每批可放入一个 SUBSCRIBE 报文
+
+    每个主题在报文中占用 2 字节长度 + 主题字节 + 1 字节 QoS。
+    """
+    max_topics = max(1, int(max_topics))
+    chunk = []
+    size = 0
+    for topic in topics:
+        cost = len(topic.encode("utf-8")) + 3
+        if chunk and (len(chunk) >= max_topics or size + cost > max_bytes):
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append(topic)
+        size += cost
+    if chunk:
+        yield chunk
+
+
+class SubscriptionTracker:
+    """
+    English: Sends batched subscriptions and measures time until all are acknowledged
+    中文: 批量发送订阅，并统计从连接成功到全部订阅确认的耗时
+
+    参数:
+    - max_topics: 每个 SUBSCRIBE 报文最多的主题数
+    - max_bytes: 每个 SUBSCRIBE 报文主题部分的最大字节数
+    - on_ready: 全部订阅确认后的回调，签名为 on_ready(elapsed)
+    """
+
+    def __init__(self, max_topics: int = DEFAULT_MAX_TOPICS, max_bytes: int = DEFAULT_MAX_BYTES, on_ready=None):
+        self.max_topics = max_topics
+        self.max_bytes = max_bytes
+        self.on_ready = on_ready
+        self.last_elapsed = None
+        self._pending = set()
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def subscribe_all(self, client, topics, qos: int = 0) -> int:
+        """
+        English: Subscribes to all topics in as few packets as possible, returns the packet count
+        中文: 用尽量少的报文订阅全部主题，返回发送的报文数
+        """
+        topics = list(dict.fromkeys(topic for topic in topics if topic))
+        with self._lock:
+            self._pending.clear()
+            self._started = time.monotonic()
+        if not topics:
+            return 0
+        packets = 0
+        for chunk in chunk_topics(topics, self.max_topics, self.max_bytes):
+            result, mid = client.subscribe([(topic, qos) for topic in chunk])
+            if result != 0:
+                logging.error(f"发送订阅失败: {result}, 主题: {chunk}")
+                continue
+            with self._lock:
+                self._pending.add(mid)
+            packets += 1
+        logging.info(f"已发送订阅: {len(topics)} 个主题，{packets} 个报文")
+        return packets
+
+    def acknowledge(self, mid: int) -> None:
+        """
+        English: Called from on_subscribe for every SUBACK
+        中文: 在 on_subscribe 中对每个 SUBACK 调用
+        """
+        with self._lock:
+            if mid not in self._pending:
+                return
+            self._pending.discard(mid)
+            if self._pending:
+                return
+            elapsed = time.monotonic() - self._started
+            self.last_elapsed = elapsed
+        logging.info(f"全部主题订阅完成，耗时 {elapsed * 1000:.1f}ms")
+        if self.on_ready:
+            self.on_ready(elapsed)
@@ -0,0 +1,242 @@
+"""
+主程序看门狗：托盘在一个线程中持有主程序的进程句柄并阻塞等待它退出（Windows 上为 WaitForSingleObject），
+不轮询，空闲时不占用 CPU；主程序意外退出后按指数退避重新启动。
+
+- 通过托盘关闭、重启或重新加载主程序前先调用 expect_exit()，这次退出不计为崩溃
+- 退出码为 0 视为主程序自己正常退出（例如从自带托盘退出、配置错误），不自动重启
+- 主程序稳定运行超过 stable_after 秒后退避重新从头计算
+- 崩溃循环：window 秒内崩溃 max_crashes 次时暂停自动重启并通知，手动启动主程序后恢复
+- 托盘没有管理员权限而主程序有时，只以 SYNCHRONIZE 权限打开主程序进程等待退出（system.wait_process）；
+  仍然无法打开时才退回每 poll_interval 秒检查一次进程是否仍在运行
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from reconnect import Backoff
+from system import wait_process
+
+
+class MainSupervisor:
+    """
+    English: Watches the main process, restarting it with backoff when it exits unexpectedly
+    中文: 监视主程序进程，意外退出时按退避策略重新启动
+
+    参数:
+    - find: 查找主程序进程的函数，返回 psutil.Process 或 None
+    - launch: 启动主程序的函数
+    - backoff: 重启前的退避策略，默认第一次立即重启，之后 2、4、8... 秒，最多 60 秒
+    - stable_after: 运行超过该时间（秒）后再退出时，退避从头计算
+    - window: 崩溃循环的统计窗口（秒）
+    - max_crashes: 窗口内崩溃达到该次数时暂停自动重启
+    - on_change: 状态变化（崩溃、重启、暂停）时的回调，无参数
+    - poll_interval: 无法等待进程退出事件时检查进程的间隔（秒）
+    - idle_check: 主程序未运行时检查它是否被其他方式启动的间隔（秒）
+    - relaunch_timeout: 启动主程序后等待新进程出现的最长时间（秒）
+    """
+
+    def __init__(
+        self,
+        find,
+        launch,
+        backoff: Backoff = None,
+        stable_after: float = 60.0,
+        window: float = 300.0,
+        max_crashes: int = 5,
+        on_change=None,
+        poll_interval: float = 2.0,
+        idle_check: float = 30.0,
+        relaunch_timeout: float = 15.0,
+    ):
+        self.find = find
+        self.launch = launch
+        self.backoff = backoff or Backoff(base=2.0, cap=60.0, jitter=0.2)
+        self.stable_after = stable_after
+        self.window = window
+        self.max_crashes = max(1, int(max_crashes))
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.idle_check = idle_check
+        self.relaunch_timeout = relaunch_timeout
+        self.crashes = 0
+        self.restarts = 0
+        self.paused = False
+        self._recent = deque()
+        self._current = None
+        self._expected_pid = None
+        self._relaunching = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> "MainSupervisor":
+        threading.Thread(target=self._run, name="RC-supervisor", daemon=True).start()
+        return self
+
+    def expect_exit(self, relaunching: bool = False) -> None:
+        """
+        English: Marks the next exit of the current main process as requested, not a crash
+        中文: 标记当前主程序的下一次退出是托盘请求的，不计为崩溃
+
+        参数:
+        - relaunching: 主程序退出后会被重新启动（重启、重新加载配置），看门狗随后查找新的进程
+        """
+        with self._lock:
+            proc = self._current
+        if proc is None:
+            # 看门狗可能还没有找到主程序（例如托盘刚启动），直接查找
+            proc = self.find()
+        if not isinstance(proc, psutil.Process):
+            return
+        with self._lock:
+            if self._expected_pid != proc.pid:
+                self._expected_pid = proc.pid
+                self._relaunching = False
+            # 重启时 close_main 会再次调用，不覆盖已经标记的 relaunching
+            self._relaunching = self._relaunching or relaunching
+
+    def watch(self) -> None:
+        """
+        English: Tells the supervisor that main was (re)started by the tray; resumes after a crash loop
+        中文: 通知看门狗托盘已启动主程序，立即查找新的进程；处于崩溃循环暂停状态时恢复自动重启
+        """
+        with self._lock:
+            if self.paused:
+                logging.info("手动启动主程序，恢复自动重启")
+                self.paused = False
+                self._recent.clear()
+                self.backoff.reset()
+        self._wake.set()
+
+    def status_text(self) -> str:
+        if self.paused:
+            return f"主程序崩溃: {self.crashes} 次（崩溃过于频繁，已暂停自动重启）"
+        return f"主程序崩溃: {self.crashes} 次，自动重启 {self.restarts} 次"
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception:
+                logging.exception("看门狗状态回调出错")
+
+    def _wait_exit(self, proc: psutil.Process):
+        """阻塞到进程退出，返回退出码（无法取得时为 None）"""
+        try:
+            return proc.wait()
+        except psutil.NoSuchProcess:
+            return None
+        except psutil.AccessDenied:
+            pass
+        # 托盘没有管理员权限而主程序有时，psutil 请求的查询权限被拒绝，
+        # 改为只以 SYNCHRONIZE 权限打开进程，仍然由退出事件唤醒并取得退出码
+        if not proc.is_running():
+            return None
+        exited, code = wait_process(proc.pid)
+        if exited:
+            return code
+        logging.info(f"无法打开主程序进程 {proc.pid}，改为每 {self.poll_interval} 秒检查一次")
+        while True:
+            try:
+                if not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE:
+                    return None
+            except psutil.NoSuchProcess:
+                return None
+            except psutil.AccessDenied:
+                pass
+            time.sleep(self.poll_interval)
+
+    def _locate(self, timeout: float):
+        """查找主程序进程，最多等待 timeout 秒（期间被 watch() 唤醒时立即重新查找）"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._wake.clear()
+            try:
+                proc = self.find()
+            except Exception:
+                logging.exception("看门狗查找主程序失败")
+                proc = None
+            if isinstance(proc, psutil.Process):
+                return proc
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._wake.wait(min(0.5, remaining))
+
+    def _run(self) -> None:
+        proc = None
+        while True:
+            if proc is None:
+                proc = self._locate(0)
+            if proc is None:
+                # 主程序未运行：等待托盘启动它（watch() 唤醒），或定期检查是否被其他方式启动
+                self._wake.wait(self.idle_check)
+                continue
+            with self._lock:
+                self._current = proc
+            logging.info(f"看门狗开始监视主程序，PID: {proc.pid}")
+            try:
+                started = proc.create_time()
+            except psutil.Error:
+                started = time.time()
+            code = self._wait_exit(proc)
+            uptime = time.time() - started
+            with self._lock:
+                expected = self._expected_pid == proc.pid
+                relaunching = self._relaunching and expected
+                self._current = None
+                self._expected_pid = None
+                self._relaunching = False
+            pid, proc = proc.pid, None
+            if expected:
+                logging.info(f"主程序按请求退出，PID: {pid}")
+                if relaunching:
+                    proc = self._locate(self.relaunch_timeout)
+                continue
+            if code == 0:
+                logging.info(f"主程序正常退出（退出码 0），不自动重启，PID: {pid}")
+                self._changed()
+                continue
+            proc = self._crashed(pid, code, uptime)
+
+    def _crashed(self, pid: int, code, uptime: float):
+        """记录一次崩溃并按退避策略重启，返回重启后的主程序进程（没有重启或没有找到时为 None）"""
+        now = time.monotonic()
+        with self._lock:
+            self.crashes += 1
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.window:
+                self._recent.popleft()
+            if uptime >= self.stable_after:
+                self.backoff.reset()
+            if len(self._recent) >= self.max_crashes:
+                self.paused = True
+        logging.error(f"主程序意外退出，PID: {pid}，退出码: {code}，运行了 {uptime:.1f}秒（累计崩溃 {self.crashes} 次）")
+        if self.paused:
+            logging.error(f"{self.window:.0f}秒内崩溃 {len(self._recent)} 次，暂停自动重启")
+            self._changed()
+            # 直到手动启动主程序（watch()）才恢复
+            while True:
+                self._wake.clear()
+                if not self.paused:
+                    break
+                self._wake.wait()
+            return None
+        delay = self.backoff.next()
+        self._changed()
+        if delay > 0:
+            logging.info(f"{delay:.1f}秒后重启主程序（第 {self.backoff.attempt} 次）")
+            # 等待期间手动启动了主程序时不再重复启动
+            self._wake.clear()
+            if self._wake.wait(delay):
+                return None
+        self.restarts += 1
+        try:
+            self.launch()
+        except Exception:
+            logging.exception("看门狗重启主程序失败")
+        self._changed()
+        return self._locate(self.relaunch_timeout)
@@ -0,0 +1,249 @@
+"""
+系统操作后端：锁屏、重启、睡眠、单实例锁、等待其他进程退出。媒体控制见 media.py，服务控制见 services.py。
+
+- WindowsSystem：与原先相同，使用 user32、shutdown、rundll32
+- LinuxSystem：优先通过 D-Bus 调用 systemd-logind / systemd（需要可选依赖 jeepney），
+  不可用时退回 loginctl / systemctl 命令
+
+程序主题的进程由 processes.ProcessRegistry 按主题结束，这里不提供按进程名结束进程。
+外部命令（shutdown、rundll32、loginctl 等）通过 CommandRunner 异步执行，返回 Future，不阻塞调度器的工作线程。
+get_system() 按当前平台返回对应的实现。
+"""
+
+import ctypes
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from commands import CommandRunner
+
+IS_WINDOWS = sys.platform == "win32"
+
+
+class InstanceLock:
+    """
+    English: Single-instance lock: a named mutex on Windows, an flock()ed file on Linux
+    中文: 单实例锁：Windows 上为命名互斥体，Linux 上为 flock 加锁的文件
+
+    acquire() 返回 False 表示已有实例在运行。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._handle = None
+
+    def acquire(self) -> bool:
+        if IS_WINDOWS:
+            self._handle = ctypes.windll.kernel32.CreateMutexW(None, False, self.name)
+            # ERROR_ALREADY_EXISTS
+            return ctypes.windll.kernel32.GetLastError() != 183
+        import fcntl
+
+        directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+        self._handle = open(os.path.join(directory, f"{self.name}.lock"), "a+")
+        try:
+            fcntl.flock(self._handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._handle.close()
+            self._handle = None
+            return False
+        self._handle.seek(0)
+        self._handle.truncate()
+        self._handle.write(str(os.getpid()))
+        self._handle.flush()
+        return True
+
+    def release(self) -> None:
+        if self._handle is None:
+            return
+        if IS_WINDOWS:
+            ctypes.windll.kernel32.ReleaseMutex(self._handle)
+            ctypes.windll.kernel32.CloseHandle(self._handle)
+        else:
+            # 关闭文件即释放 flock
+            self._handle.close()
+        self._handle = None
+
+
+SYNCHRONIZE = 0x00100000
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+WAIT_OBJECT_0 = 0
+WAIT_TIMEOUT = 0x102
+INFINITE = 0xFFFFFFFF
+STILL_ACTIVE = 259
+
+
+def wait_process(pid: int, timeout: float = None):
+    """
+    English: Blocks on the exit event of a process opened with SYNCHRONIZE access only (Windows)
+    中文: 只以 SYNCHRONIZE 权限打开进程并阻塞等待其退出事件（仅 Windows）
+
+    托盘没有管理员权限时，psutil 请求的查询权限会被以管理员权限运行的主程序拒绝，
+    但仍允许打开 SYNCHRONIZE 和 PROCESS_QUERY_LIMITED_INFORMATION 句柄，因此不需要轮询。
+
+    参数:
+    - pid: 进程号，调用方负责确认它仍属于要等待的进程
+    - timeout: 最长等待时间（秒），None 表示一直等待
+
+    返回 (exited, returncode)：exited 为 True（已退出）或 False（超时），无法打开进程、等待失败或不是 Windows 时为 None；
+    returncode 为退出码，无法取得时为 None。
+    """
+    if not IS_WINDOWS:
+        return None, None
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = ctypes.c_void_p
+    kernel32.OpenProcess.argtypes = [ctypes.c_uint32, ctypes.c_int, ctypes.c_uint32]
+    kernel32.WaitForSingleObject.restype = ctypes.c_uint32
+    kernel32.WaitForSingleObject.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+    kernel32.GetExitCodeProcess.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32)]
+    kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+    handle = kernel32.OpenProcess(SYNCHRONIZE | PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # 取不到退出码也可以等待退出
+        handle = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+    if not handle:
+        return None, None
+    try:
+        milliseconds = INFINITE if timeout is None else max(0, min(int(timeout * 1000), INFINITE - 1))
+        result = kernel32.WaitForSingleObject(handle, milliseconds)
+        if result == WAIT_TIMEOUT:
+            return False, None
+        if result != WAIT_OBJECT_0:
+            return None, None
+        code = ctypes.c_uint32()
+        if kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) and code.value != STILL_ACTIVE:
+            return True, code.value
+        return True, None
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class WindowsSystem:
+    """
+    English: System operations on Windows
+    中文: Windows 上的系统操作
+
+    参数:
+    - runner: 执行外部命令的 CommandRunner，重启、睡眠等命令异步执行，不阻塞调用方
+    """
+
+    name = "windows"
+
+    def __init__(self, runner: CommandRunner = None):
+        self.runner = runner or CommandRunner()
+
+    def is_admin(self) -> bool:
+        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+
+    def lock(self) -> None:
+        ctypes.windll.user32.LockWorkStation()
+
+    # 电源命令不设超时：超时定时器使用单调时钟，Windows 上睡眠期间单调时钟继续计时，
+    # 唤醒后定时器立即到期，会结束仍在返回途中的命令并误报失败
+    def reboot(self, delay: int = 60):
+        return self.runner.run(["shutdown", "-r", "-t", str(delay)], timeout=None)
+
+    def suspend(self):
+        return self.runner.run(["rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0"], timeout=None)
+
+
+class DBus:
+    """
+    English: Lazily opened, lock-protected jeepney connection to a D-Bus bus
+    中文: 按需打开、加锁保护的 D-Bus 连接（基于 jeepney）
+
+    参数:
+    - bus: "SYSTEM"（系统总线）或 "SESSION"（会话总线）
+    """
+
+    def __init__(self, bus: str = "SYSTEM"):
+        self.bus = bus
+        self._connection = None
+        self._lock = threading.Lock()
+        self.available = True
+
+    def call(self, bus_name: str, path: str, interface: str, method: str, signature: str = "", args=()):
+        """
+        English: Calls a method and returns the reply body; raises if D-Bus is unavailable or the call fails
+        中文: 调用 D-Bus 方法并返回结果，D-Bus 不可用或调用失败时抛出异常
+        """
+        if not self.available:
+            raise RuntimeError("D-Bus 不可用")
+        try:
+            from jeepney import DBusAddress, new_method_call
+            from jeepney.io.blocking import open_dbus_connection
+            from jeepney.wrappers import unwrap_msg
+        except ImportError:
+            self.available = False
+            raise RuntimeError("未安装 jeepney，无法使用 D-Bus")
+        address = DBusAddress(path, bus_name=bus_name, interface=interface)
+        message = new_method_call(address, method, signature, args)
+        with self._lock:
+            if self._connection is None:
+                try:
+                    self._connection = open_dbus_connection(bus=self.bus)
+                except OSError:
+                    self.available = False
+                    raise
+            try:
+                return unwrap_msg(self._connection.send_and_get_reply(message, timeout=10))
+            except (OSError, ConnectionError):
+                # 连接断开时下次重新打开
+                self._connection.close()
+                self._connection = None
+                raise
+
+
+LOGIN1 = ("org.freedesktop.login1", "/org/freedesktop/login1", "org.freedesktop.login1.Manager")
+
+
+class LinuxSystem:
+    """
+    English: System operations on Linux via logind/systemd D-Bus, falling back to their CLIs
+    中文: Linux 上的系统操作，优先使用 logind/systemd 的 D-Bus 接口，不可用时使用命令行
+    """
+
+    name = "linux"
+
+    def __init__(self, bus: DBus = None, runner: CommandRunner = None):
+        self.bus = bus or DBus()
+        self.runner = runner or CommandRunner()
+
+    def is_admin(self) -> bool:
+        return os.geteuid() == 0
+
+    def _try_dbus(self, target, method: str, signature: str = "", args=()):
+        try:
+            return self.bus.call(*target, method, signature, args)
+        except Exception as e:
+            logging.info(f"D-Bus 调用 {method} 失败，使用命令行: {e}")
+            return None
+
+    def lock(self):
+        if self._try_dbus(LOGIN1, "LockSessions") is None:
+            return self.runner.run(["loginctl", "lock-sessions"])
+
+    def reboot(self, delay: int = 60):
+        # ScheduleShutdown 的时间为 CLOCK_REALTIME 微秒
+        when = int((time.time() + delay) * 1_000_000)
+        if self._try_dbus(LOGIN1, "ScheduleShutdown", "st", ("reboot", when)) is None:
+            # 与 Windows 相同，电源命令不设超时
+            return self.runner.run(["shutdown", "-r", f"+{max(1, round(delay / 60))}"], timeout=None)
+
+    def suspend(self):
+        if self._try_dbus(LOGIN1, "Suspend", "b", (False,)) is None:
+            return self.runner.run(["systemctl", "suspend"], timeout=None)
+
+
+def get_system(runner: CommandRunner = None):
+    """
+    English: Returns the system backend of the current platform
+    中文: 返回当前平台的系统操作后端
+
+    参数:
+    - runner: 执行外部命令的 CommandRunner，默认新建一个
+    """
+    return WindowsSystem(runner) if IS_WINDOWS else LinuxSystem(runner=runner)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 与 bench/ 中的脚本一样，从项目根目录导入各模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
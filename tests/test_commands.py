@@ -0,0 +1,54 @@
+"""CommandRunner：结果以进程退出为准，继承了输出管道的子进程不会让 Future 一直不完成。"""
+
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from commands import CommandRunner
+
+# 启动一个继承 stdout 的子进程（打印其 PID）后自己再运行 sleep 秒
+SPAWNER = (
+    "import subprocess, sys, time; "
+    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+    "print(child.pid, flush=True); time.sleep({sleep})"
+)
+
+
+@pytest.fixture
+def runner():
+    runner = CommandRunner(output_grace=0.5)
+    yield runner
+    runner.scheduler.stop()
+
+
+def spawner(runner, sleep: float, timeout):
+    return runner.run([sys.executable, "-c", SPAWNER.format(sleep=sleep)], timeout=timeout)
+
+
+def test_exit_settles_while_grandchild_holds_pipe(runner):
+    started = time.monotonic()
+    result = spawner(runner, 0, None).result(timeout=10)
+    assert result.ok
+    assert time.monotonic() - started < 5
+    assert runner.running() == 0
+    child = psutil.Process(int(result.output[0]))
+    child.kill()
+    child.wait(5)
+
+
+def test_timeout_settles_and_kills_the_tree(runner):
+    started = time.monotonic()
+    result = spawner(runner, 30, 0.5).result(timeout=10)
+    assert result.timed_out and not result.ok
+    assert time.monotonic() - started < 5
+    assert runner.running() == 0
+    child = int(result.output[0])
+    if sys.platform != "win32":
+        # Linux 上结束整个进程组，子进程一起结束
+        gone, alive = psutil.wait_procs([psutil.Process(child)], timeout=3) if psutil.pid_exists(child) else ([], [])
+        assert not alive
+    else:
+        subprocess.run(["taskkill", "/F", "/PID", str(child)], capture_output=True)
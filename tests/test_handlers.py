@@ -0,0 +1,62 @@
+"""CommandHandlers：亮度/音量设置失败时命令记为失败，启用状态同步时也不发布新状态。"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from bench.bench_e2e import FakeLevel, FakeProcesses, FakeServices, FakeSystem
+from coalescer import SliderCoalescer
+from dispatcher import CommandDispatcher
+from handlers import CommandHandlers, MessagePipeline
+from history import MessageHistory
+from ramp import RampEngine
+from routing import build_routes
+from scheduler import TimerScheduler
+
+
+class BrokenLevel(FakeLevel):
+    """没有背光设备时的亮度后端：每次设置都失败"""
+
+    def set(self, value: int) -> None:
+        raise OSError("没有找到背光设备")
+
+
+@pytest.mark.parametrize("topic, command", [("screen002", "on#40"), ("screen002", "on"), ("volume003", "on#40")])
+def test_failed_level_is_not_published(topic, command):
+    timer = TimerScheduler("test-timer")
+    published = []
+    reconnect = SimpleNamespace(publish=lambda topic, payload: published.append((topic, payload)))
+    history = MessageHistory(10)
+    pipeline = MessagePipeline(history, reconnect, state_publish=True)
+    routes = build_routes([], [], {"screen": "screen002", "volume": "volume003"})
+    handlers = CommandHandlers(
+        routes,
+        FakeSystem(0),
+        BrokenLevel("screen", 0),
+        BrokenLevel("volume", 0),
+        FakeProcesses(0),
+        FakeServices(0),
+        RampEngine(timer),
+        reconnect,
+        lambda message: None,
+    )
+    done = threading.Event()
+
+    def on_complete(entry, latency, failed):
+        pipeline.on_complete(entry, latency, failed)
+        done.set()
+
+    dispatcher = CommandDispatcher(handlers.process_command, lanes=list(routes), on_complete=on_complete)
+    dispatcher.start()
+    coalescer = SliderCoalescer(dispatcher.submit, [], scheduler=timer)
+    handlers.coalescer = pipeline.coalescer = coalescer
+    pipeline.dispatcher = dispatcher
+    try:
+        pipeline.on_message(None, None, SimpleNamespace(topic=topic, payload=command.encode()))
+        assert done.wait(5)
+        assert published == []
+        assert history.summary()["topics"][topic]["failed"] == 1
+    finally:
+        dispatcher.stop()
+        timer.stop()
@@ -0,0 +1,58 @@
+"""ProcessRegistry：记录时和查询状态时移除已退出的进程，不随开关次数累积 Popen 对象。"""
+
+import subprocess
+import sys
+
+import psutil
+
+from processes import ProcessRegistry
+
+
+def short_lived():
+    return [sys.executable, "-c", "pass"]
+
+
+def test_exited_processes_are_pruned():
+    registry = ProcessRegistry()
+    for _ in range(5):
+        registry.launch("app", short_lived()).wait()
+    # 每次记录前都会移除已退出的进程，只剩最后一个
+    assert len(registry._processes["app"]) == 1
+    assert not registry.is_on("app")
+    assert "app" not in registry._processes
+    assert registry.terminate("app") == 0
+
+
+def test_running_process_is_kept():
+    registry = ProcessRegistry()
+    popen = registry.launch("app", [sys.executable, "-c", "import time; time.sleep(30)"])
+    registry.launch("app", short_lived()).wait()
+    try:
+        assert registry.is_on("app")
+        assert registry.pids("app") == [popen.pid]
+        assert registry.terminate("app") == 1
+    finally:
+        if popen.poll() is None:
+            popen.kill()
+        popen.wait()
+    assert popen.returncode is not None
+
+
+def test_launcher_children_keep_the_record():
+    # 启动器类程序：启动子进程后立即退出，子进程留在同一进程组（Windows 上为同一作业）中
+    registry = ProcessRegistry()
+    launcher = (
+        "import subprocess, sys; "
+        "print(subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']).pid)"
+    )
+    popen = registry.launch("app", [sys.executable, "-c", launcher], stdout=subprocess.PIPE, text=True)
+    child = psutil.Process(int(popen.stdout.readline()))
+    popen.wait()
+    popen.stdout.close()
+    assert registry.is_on("app")
+    assert "app" in registry.topics()
+    assert registry.terminate("app") == 1
+    # 子进程已被按进程组结束（SIGKILL 送达后很快退出）
+    gone, alive = psutil.wait_procs([child], timeout=3)
+    assert not alive
+    assert not registry.is_on("app")
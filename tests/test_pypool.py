@@ -0,0 +1,40 @@
+"""PythonPool：脚本读取 stdin 时读到空设备，不会读走发给工作进程的下一条请求。"""
+
+import os
+import threading
+import time
+
+from pypool import PythonPool
+
+SCRIPT = """
+import os, sys
+print("stdin=%r fd0=%r" % (sys.stdin.read(), os.read(0, 100)), file=sys.stderr)
+"""
+
+
+def test_script_cannot_read_protocol_stdin(tmp_path):
+    script = tmp_path / "reader.py"
+    script.write_text(SCRIPT, encoding="utf-8")
+    finished = []
+    done = threading.Event()
+
+    def on_finish(topic, popen):
+        finished.append(topic)
+        done.set()
+
+    pool = PythonPool(size=1, max_runs=5, on_finish=on_finish).start()
+    try:
+        for topic in ("first", "second"):
+            done.clear()
+            deadline = time.monotonic() + 10
+            popen = None
+            while popen is None and time.monotonic() < deadline:
+                popen = pool.run(topic, os.fspath(script))
+                if popen is None:
+                    time.sleep(0.05)
+            assert popen is not None
+            # 脚本读到 EOF 后立即结束，工作进程随即处理下一条请求
+            assert done.wait(10)
+        assert finished == ["first", "second"]
+    finally:
+        pool.close()
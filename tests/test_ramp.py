@@ -0,0 +1,62 @@
+"""RampEngine：耗时的设置不占用定时器线程，直接设置不会被已被取代的旧步骤覆盖。"""
+
+import threading
+
+from ramp import RampEngine
+from scheduler import TimerScheduler
+
+
+class SlowLevel:
+    """第一次设置阻塞到 release 被触发，模拟耗时的 WMI 调用；设置完成后才记录写入的值"""
+
+    def __init__(self):
+        self.values = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def set(self, value: int) -> None:
+        if not self.entered.is_set():
+            self.entered.set()
+            assert self.release.wait(5)
+        self.values.append(value)
+
+    def get(self) -> int:
+        return self.values[-1] if self.values else 0
+
+
+def test_direct_set_is_not_overwritten_by_a_stale_step():
+    timer = TimerScheduler("test-timer")
+    engine = RampEngine(timer, step=0.01)
+    level = SlowLevel()
+    try:
+        engine.start("screen", 100, 1.0, level.set, level.get)
+        assert level.entered.wait(5)
+        direct = threading.Thread(target=engine.start, args=("screen", 30, 0, level.set, level.get))
+        direct.start()
+        direct.join(0.2)
+        # 旧步骤仍在设置，直接设置等待它完成
+        assert direct.is_alive()
+        level.release.set()
+        direct.join(5)
+        assert level.values[-1] == 30
+        assert not engine.active("screen")
+    finally:
+        level.release.set()
+        timer.stop()
+
+
+def test_slow_apply_does_not_block_the_timer():
+    timer = TimerScheduler("test-timer")
+    engine = RampEngine(timer, step=0.01)
+    level = SlowLevel()
+    fired = threading.Event()
+    try:
+        engine.start("screen", 100, 1.0, level.set, level.get)
+        assert level.entered.wait(5)
+        timer.call_later(0, fired.set)
+        assert fired.wait(1)
+        level.release.set()
+        engine.cancel("screen")
+    finally:
+        level.release.set()
+        timer.stop()
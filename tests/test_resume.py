@@ -0,0 +1,102 @@
+"""
+ResumeDetector：用模拟时钟驱动 run()，系统时钟跳变（睡眠）只触发一次回调，正常的时钟漂移不触发。
+ReconnectManager：用模拟时钟驱动唤醒 → 立即重连 → 订阅完成，记录的耗时从唤醒时开始计算。
+"""
+
+import pytest
+
+from reconnect import ReconnectManager
+from resume import ResumeDetector
+
+
+class FakeClock:
+    """模拟的单调时钟和系统时钟；sleep() 推进两个时钟，并在指定的次数上注入跳变"""
+
+    def __init__(self, ticks: int, wall_jumps=None, mono_jumps=None, drift: float = 0.0):
+        self.mono = 1000.0
+        self.wall = 1_700_000_000.0
+        self.ticks = ticks
+        self.wall_jumps = wall_jumps or {}
+        self.mono_jumps = mono_jumps or {}
+        self.drift = drift
+        self.calls = 0
+        self.detector = None
+
+    def sleep(self, seconds: float) -> None:
+        self.calls += 1
+        self.mono += seconds + self.mono_jumps.get(self.calls, 0.0)
+        self.wall += seconds + self.drift + self.wall_jumps.get(self.calls, 0.0)
+        if self.calls >= self.ticks:
+            self.detector.stop()
+
+
+def run(clock: FakeClock) -> list:
+    gaps = []
+    clock.detector = ResumeDetector(
+        gaps.append,
+        interval=2.0,
+        threshold=5.0,
+        monotonic=lambda: clock.mono,
+        wall=lambda: clock.wall,
+        sleep=clock.sleep,
+    )
+    clock.detector.run()
+    return gaps
+
+
+def test_wall_clock_jump_fires_once():
+    # Linux：睡眠期间单调时钟不走，唤醒后系统时钟多走了 600 秒
+    gaps = run(FakeClock(ticks=20, wall_jumps={7: 600.0}))
+    assert len(gaps) == 1
+    assert abs(gaps[0] - 600.0) < 1e-6
+
+
+def test_monotonic_jump_fires_once():
+    # Windows：单调时钟包含睡眠时间，两个时钟一起跳变
+    gaps = run(FakeClock(ticks=20, wall_jumps={5: 300.0}, mono_jumps={5: 300.0}))
+    assert len(gaps) == 1
+    assert abs(gaps[0] - 300.0) < 1e-6
+
+
+def test_normal_drift_fires_nothing():
+    # NTP 校时造成的小幅漂移和调度延迟都远小于阈值
+    assert run(FakeClock(ticks=200, drift=0.05, mono_jumps={50: 1.0}, wall_jumps={50: 1.0})) == []
+
+
+class FakeClient:
+    def __init__(self):
+        self.disconnects = 0
+
+    def disconnect(self):
+        self.disconnects += 1
+
+
+@pytest.mark.parametrize("paused", [True, False])
+def test_wake_latency_starts_at_resume(paused):
+    # paused=True：睡眠前收到通知并主动断开；False：没有收到通知，唤醒时连接仍被认为可用
+    now = [1000.0]
+    client = FakeClient()
+    manager = ReconnectManager(client, monotonic=lambda: now[0])
+    kicks = []
+    manager.on_kick = lambda: kicks.append(now[0])
+    manager.on_connected()
+    if paused:
+        manager.pause("即将睡眠")
+        assert manager.paused
+    now[0] += 600.0
+    manager.resume("系统唤醒")
+    assert client.disconnects == 1
+    assert not manager.paused
+    # kick() 跳过退避等待，网络线程被立即唤醒
+    assert kicks == [1600.0]
+    assert manager.wait(60.0)
+    assert manager.next_delay() == 0.0
+    now[0] += 0.25
+    manager.on_connected()
+    now[0] += 0.15
+    manager.on_ready()
+    assert list(manager.latencies) == [pytest.approx(0.25)]
+    assert list(manager.wake_latencies) == [pytest.approx(0.4)]
+    # 之后的普通订阅完成不再记录唤醒耗时
+    manager.on_ready()
+    assert len(manager.wake_latencies) == 1
@@ -0,0 +1,51 @@
+"""threaded 与 asyncio 两种运行模式：同一串消息经过相同的处理链路后，执行的命令、顺序和后端最终状态一致。"""
+
+from bench.bench_e2e import Harness
+
+# 程序、服务、亮度、音量、媒体主题交替，亮度/音量使用不会被合并掉的整数命令
+MESSAGES = [
+    (topic, payload)
+    for round_ in range(6)
+    for topic, payload in (
+        ("app0006", "on" if round_ % 2 == 0 else "off"),
+        ("app1006", "off" if round_ % 2 == 0 else "on"),
+        ("serve0006", "on" if round_ % 3 else "off"),
+        ("screen002", "on" if round_ % 2 else "off"),
+        ("volume003", f"on#{round_ * 10 + 5}"),
+        ("media005", "pause"),
+    )
+]
+
+
+def run(mode: str):
+    # 合并窗口为 0：每条消息都执行，才能逐条比较
+    harness = Harness(mode, cost_scale=0.1, window=0).start()
+    try:
+        for topic, payload in MESSAGES:
+            harness.inject(topic, payload.encode())
+        assert harness.wait_settled(len(MESSAGES), timeout=10)
+        handlers = harness.handlers
+        state = {
+            "brightness": handlers.brightness.level,
+            "volume": handlers.volume.level,
+            "processes": sorted(handlers.process_registry.running),
+            "services": sorted(handlers.service_manager.running),
+        }
+        by_topic = {}
+        for topic, command in harness.executed:
+            by_topic.setdefault(topic, []).append(command)
+        return by_topic, state, (harness.completed, harness.dropped, harness.merged)
+    finally:
+        harness.stop()
+
+
+def test_modes_produce_same_results_and_order():
+    threaded = run("threaded")
+    asyncio_ = run("asyncio")
+    assert threaded == asyncio_
+    by_topic, state, counts = threaded
+    # 同一主题按收到的顺序执行
+    for topic in by_topic:
+        assert by_topic[topic] == [payload for name, payload in MESSAGES if name == topic]
+    assert counts == (len(MESSAGES), 0, 0)
+    assert state["volume"] == 55
@@ -0,0 +1,122 @@
+"""MainSupervisor：崩溃（非 0 退出码）后重启，正常退出（退出码 0）和托盘请求的退出不重启。"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+import pytest
+
+from reconnect import Backoff
+from supervisor import MainSupervisor
+
+
+class FakeMain:
+    """用子进程模拟主程序：按给定的退出码在 life 秒后退出"""
+
+    def __init__(self):
+        self.popen = None
+        self.launches = 0
+        self.codes = []
+        self.launched = threading.Event()
+
+    def start(self, code: int, life: float) -> None:
+        self.popen = subprocess.Popen(
+            [sys.executable, "-c", f"import sys, time; time.sleep({life}); sys.exit({code})"]
+        )
+
+    def launch(self) -> None:
+        # 看门狗重启的实例一直运行，直到测试结束
+        self.launches += 1
+        self.start(0, 30)
+        self.launched.set()
+
+    def find(self):
+        popen = self.popen
+        if popen is None or popen.poll() is not None:
+            return None
+        try:
+            return psutil.Process(popen.pid)
+        except psutil.NoSuchProcess:
+            return None
+
+    def close(self) -> None:
+        if self.popen is not None and self.popen.poll() is None:
+            self.popen.kill()
+            self.popen.wait()
+
+
+@pytest.fixture
+def fake_main():
+    main = FakeMain()
+    yield main
+    main.close()
+
+
+def make_supervisor(fake_main: FakeMain) -> MainSupervisor:
+    return MainSupervisor(
+        fake_main.find,
+        fake_main.launch,
+        backoff=Backoff(base=0.1, cap=0.5, jitter=0),
+        idle_check=0.2,
+        relaunch_timeout=2.0,
+    )
+
+
+def test_crash_is_restarted(fake_main):
+    fake_main.start(code=1, life=0.3)
+    supervisor = make_supervisor(fake_main).start()
+    assert fake_main.launched.wait(5)
+    assert supervisor.crashes == 1
+    assert supervisor.restarts == 1
+    assert fake_main.launches == 1
+
+
+def test_clean_exit_is_not_restarted(fake_main):
+    fake_main.start(code=0, life=0.3)
+    supervisor = make_supervisor(fake_main).start()
+    fake_main.popen.wait(5)
+    assert not fake_main.launched.wait(1.0)
+    assert supervisor.crashes == 0
+    assert fake_main.launches == 0
+
+
+def test_requested_exit_is_not_a_crash(fake_main):
+    fake_main.start(code=0, life=30)
+    supervisor = make_supervisor(fake_main).start()
+    deadline = time.monotonic() + 5
+    while supervisor._current is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    supervisor.expect_exit()
+    # 被强制结束的退出码非 0，但这次退出是托盘请求的
+    fake_main.popen.kill()
+    fake_main.popen.wait()
+    assert not fake_main.launched.wait(1.0)
+    assert supervisor.crashes == 0
+
+
+@pytest.mark.parametrize("code, restarted", [(0, False), (1, True)])
+def test_elevated_main_waits_on_exit_event(fake_main, monkeypatch, code, restarted):
+    # 托盘没有管理员权限：psutil 打开主程序进程被拒绝，改为 system.wait_process（SYNCHRONIZE 句柄）
+    import supervisor as supervisor_module
+
+    waited = []
+
+    def denied(self, timeout=None):
+        raise psutil.AccessDenied(self.pid)
+
+    def wait_process(pid, timeout=None):
+        waited.append(pid)
+        popen = fake_main.popen
+        assert popen.pid == pid
+        return True, popen.wait()
+
+    monkeypatch.setattr(psutil.Process, "wait", denied)
+    monkeypatch.setattr(supervisor_module, "wait_process", wait_process)
+    fake_main.start(code=code, life=0.3)
+    first = fake_main.popen.pid
+    supervisor = make_supervisor(fake_main).start()
+    assert fake_main.launched.wait(3 if restarted else 1.0) is restarted
+    assert waited[0] == first
+    assert supervisor.crashes == (1 if restarted else 0)
@@ -19,6 +19,12 @@ from win11toast import notify as toast
 from PIL import Image
 import psutil
 
+import discovery
+import ipc
+import procsnap
+from supervisor import MainSupervisor
+from system import wait_process
+
 BANBEN = "V2.1.0"
 
 # 日志配置
@@ -77,6 +83,9 @@ logging.info(f"Python版本: {sys.version}")
 logging.info(f"系统信息: {sys.platform}")
 logging.info("="*50)
 
+# 写入托盘的身份记录，主程序据此判断托盘是否在运行
+discovery.announce(logs_dir, "RC-tray")
+
 # 在程序启动时查询托盘程序的管理员权限状态并保存为全局变量
 IS_TRAY_ADMIN = False
 try:
@@ -91,6 +100,12 @@ GUI_EXE_ = "RC-GUI.exe"
 GUI_PY_ = "GUI.py"
 ICON_FILE = "icon.ico" if getattr(sys, "frozen", False) else "res\\icon.ico"
 MUTEX_NAME = "RC-main"
+# 重启时等待主程序退出的最长时间（秒），超时后强制结束
+RESTART_EXIT_TIMEOUT = 15
+# 无法打开主程序进程时检查互斥体的间隔（秒），总等待时间仍受 wait_main_exit 的 timeout 限制
+MUTEX_POLL_INTERVAL = 0.5
+# 上次重启的耗时：(总耗时, 关闭旧进程的耗时)，显示在托盘菜单中
+last_restart = None
 MAIN_EXE = os.path.join(appdata_dir, MAIN_EXE_NAME)
 GUI_EXE = os.path.join(appdata_dir, GUI_EXE_)
 GUI_PY = os.path.join(appdata_dir, GUI_PY_)
@@ -123,7 +138,8 @@ except (ImportError, AttributeError) as e:
 def is_main_running():
     # 优先按进程检测主程序是否已运行
     logging.info(f"执行函数: is_main_running")
-    main_proc = get_main_proc(MAIN_EXE_NAME)
+    # 先校验主程序写入的进程记录，记录无效时才遍历进程表
+    main_proc = discovery.find(logs_dir, "RC-main", lambda: get_main_proc(MAIN_EXE_NAME))
     if main_proc:
         return True
     
@@ -203,7 +219,7 @@ def run_py_in_venv_as_admin_hidden(python_exe_path, script_path, script_args=Non
     return result
 
 def get_main_proc(process_name):
-    """查找程序进程是否存在"""
+    """查找程序进程是否存在（查共享的进程快照 procsnap，只在没有有效的进程记录时使用，见 discovery.find）"""
     logging.info(f"执行函数: get_main_proc; 参数: {process_name}")
     
     # 如果不是管理员权限运行，可能无法查看所有进程，记录警告
@@ -212,51 +228,25 @@ def get_main_proc(process_name):
         logging.warning("托盘程序未以管理员权限运行,可能无法查看所有进程")
     if process_name.endswith('.exe'):
         logging.info(f"查找程序可执行文件: {process_name}")
-        # 可执行文件查找方式
-        target_user=None
-        process_name = process_name.lower()
-        target_user = target_user.lower() if target_user else None
-
-        for proc in psutil.process_iter(['name', 'username']):
-            try:
-                # 获取进程信息
-                proc_info = proc.info
-                current_name = proc_info['name'].lower()
-                current_user = proc_info['username']
-
-                # 匹配进程名
-                if current_name == process_name:
-                    # 未指定用户则直接返回True
-                    if target_user is None:
-                        logging.info(f"找到主程序进程: {proc.pid}, 用户: {current_user}")
-                        return True
-                    # 指定用户时提取用户名部分比较
-                    if current_user:
-                        user_part = current_user.split('\\')[-1].lower()
-                        if user_part == target_user:
-                            logging.info(f"找到主程序进程: {proc.pid}, 用户: {current_user}")
-                            return True
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                continue
+        # 可执行文件查找方式：按进程名查共享的进程快照
+        for entry in procsnap.snapshot.by_name(process_name):
+            proc = entry.process()
+            if proc is not None:
+                logging.info(f"找到主程序进程: {proc.pid}")
+                return proc
         # 如果找不到进程，记录信息
         logging.info(f"未找到主程序进程: {process_name}")
         return None
     else:
         # Python脚本查找方式
         logging.info(f"查找Python脚本主程序: {process_name}")
-        # 尝试查找命令行中包含脚本名的Python进程
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username']):
-            try:
-                proc_info = proc.info
-                if proc_info['name'] and proc_info['name'].lower() in ('python.exe', 'pythonw.exe'):
-                    cmdline = ' '.join(proc_info['cmdline']) if proc_info['cmdline'] else ""
-                    if process_name in cmdline:
-                        logging.info(f"找到主程序Python进程: {proc.pid}, 命令行: {cmdline}")
-                        return proc
-            except (psutil.AccessDenied, psutil.NoSuchProcess, Exception) as e:
-                logging.error(f"获取Python进程信息失败: {e}")
-                continue
-        
+        # 按脚本路径查共享的进程快照（快照只读取Python进程的命令行）
+        for entry in procsnap.snapshot.by_script(process_name):
+            proc = entry.process()
+            if proc is not None:
+                logging.info(f"找到主程序Python进程: {proc.pid}, 命令行: {' '.join(entry.cmdline)}")
+                return proc
+
         # 如果常规方法找不到，尝试使用wmic命令行工具
         logging.info("常规方法未找到Python进程，尝试使用wmic命令行工具")
         try:
@@ -295,7 +285,11 @@ def get_main_proc(process_name):
 def is_main_admin():
     """检查主程序是否以管理员权限运行"""
     logging.info("执行函数: is_main_admin")
-    # 通过读取主程序写入的状态文件来判断管理员权限
+    # 优先通过本地控制通道查询主程序状态
+    reply = ipc.request(logs_dir, "status")
+    if reply and reply.get("ok"):
+        return bool(reply.get("admin"))
+    # 控制通道不可用时（例如旧版本主程序），读取主程序写入的状态文件来判断管理员权限
     status_file = os.path.join(logs_dir, "admin_status.txt")
     
     # 首先检查文件是否存在
@@ -340,6 +334,10 @@ def _admin_start_main_worker():
             logging.info(f"成功以管理员权限启动主程序，PID: {rest}")
         else:
             notify(f"以管理员权限启动主程序失败，错误码: {rest}", level="error", show_error=True)
+    # 主程序刚启动或启动失败，之后的状态查询重新遍历进程表
+    procsnap.snapshot.invalidate()
+    # 通知看门狗监视新的主程序进程
+    supervisor.watch()
 
 def check_admin(icon=None, item=None):
     """检查主程序的管理员权限状态"""
@@ -448,18 +446,10 @@ def close_script(script_name,skip_admin:bool=False):
     try:
         is_admin = ctypes.windll.shell32.IsUserAnAdmin() != 0
         if is_admin or skip_admin:
-            # 通过名称查找进程（模糊匹配）
+            # 按脚本路径查进程快照，结束进程前先刷新，避免使用过期的PID
             logging.info(f"尝试关闭脚本: {script_name}")
-            cmd_find = f'tasklist /FI "IMAGENAME eq python.exe" /FO CSV /NH'
-            output = subprocess.check_output(cmd_find, shell=True).decode('utf-8')
-            
-            # 解析输出，找到目标脚本的PID
-            target_pids = []
-            for line in output.splitlines():
-                if script_name in line:
-                    parts = line.replace('"', '').split(',')
-                    pid = parts[1].strip()
-                    target_pids.append(pid)
+            procsnap.snapshot.invalidate()
+            target_pids = [entry.pid for entry in procsnap.snapshot.by_script(script_name)]
             
             # 终止所有匹配的进程
             for pid in target_pids:
@@ -507,16 +497,110 @@ def stop_tray():
     restart_main(callback=exit_after_restart)
 
 def close_main():
-    """关闭主程序"""
+    """关闭主程序：优先通过本地控制通道请求正常退出，控制通道不可用时才结束进程"""
     logging.info(f"执行函数: close_main,{MAIN_EXE}")
+    # 托盘请求的退出不计为崩溃，看门狗不会自动重启
+    supervisor.expect_exit()
     try:
-        if MAIN_EXE_NAME.endswith('.exe') and os.path.exists(MAIN_EXE):
-            close_exe(MAIN_EXE_NAME)
-        elif os.path.exists(MAIN_EXE):
-            close_script(MAIN_EXE_NAME)
+        reply = ipc.request(logs_dir, "stop")
+        if reply and reply.get("ok"):
+            logging.info(f"已通过本地控制通道请求主程序正常退出，PID: {reply.get('pid')}")
+            return
+        logging.info("本地控制通道不可用，结束主程序进程")
+        kill_main(discovery.lookup(logs_dir, "RC-main"))
     except Exception as e:
         # logging.error(f"关闭主程序时出错: {e}")
         notify(f"关闭主程序时出错: {e}", level="error", show_error=True)
+    finally:
+        procsnap.snapshot.invalidate()
+
+def kill_main(main_proc=None):
+    """强制结束主程序（控制通道不可用或正常退出超时时使用）"""
+    logging.info("执行函数: kill_main")
+    if main_proc is not None:
+        # 有权限时直接结束进程，不需要提权
+        try:
+            main_proc.kill()
+            logging.info(f"已结束主程序进程: {main_proc.pid}")
+            return
+        except psutil.NoSuchProcess:
+            return
+        except psutil.AccessDenied:
+            logging.info("没有权限直接结束主程序进程，改为提权结束")
+    if MAIN_EXE_NAME.endswith('.exe') and os.path.exists(MAIN_EXE):
+        close_exe(MAIN_EXE_NAME)
+    elif os.path.exists(MAIN_EXE):
+        close_script(MAIN_EXE_NAME)
+
+def wait_main_exit(main_proc, timeout):
+    """
+    等待主程序退出，退出后立即返回 True，超时返回 False。
+
+    有进程句柄时等待进程的退出事件（WaitForSingleObject）；psutil 无权限打开进程时（例如主程序以管理员权限运行而托盘没有），
+    按进程记录中的 PID 只以 SYNCHRONIZE 权限打开进程再等待；仍然无法打开时才每 MUTEX_POLL_INTERVAL 秒检查一次
+    主程序的互斥体是否已随进程退出而销毁，总等待时间不超过 timeout。
+    """
+    deadline = time.monotonic() + timeout
+    if main_proc is not None:
+        try:
+            main_proc.wait(timeout)
+            return True
+        except psutil.TimeoutExpired:
+            return False
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.AccessDenied:
+            logging.info("无法以查询权限打开主程序进程，改为只请求 SYNCHRONIZE 权限等待退出事件")
+        exited, _ = wait_process(main_proc.pid, deadline - time.monotonic())
+        if exited is not None:
+            return exited
+        logging.info(f"无法等待主程序进程的退出事件，改为每 {MUTEX_POLL_INTERVAL} 秒检查互斥体")
+    # 主程序创建互斥体时不持有它，无法等待其释放，只能检查互斥体是否还存在
+    while True:
+        mutex = ctypes.windll.kernel32.OpenMutexW(0x100000, False, MUTEX_NAME)
+        if not mutex:
+            return True
+        ctypes.windll.kernel32.CloseHandle(mutex)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(MUTEX_POLL_INTERVAL, remaining))
+
+def restart_status_text(item=None):
+    """托盘菜单中显示的上次重启耗时"""
+    if last_restart is None:
+        return "上次重启: 无"
+    total, waited = last_restart
+    return f"上次重启: {total:.2f}秒（关闭旧进程 {waited:.2f}秒）"
+
+def reload_main(icon=None, item=None):
+    """重新加载配置：主程序正常退出后以相同权限重新启动；控制通道不可用时按重启主程序处理"""
+    logging.info("执行函数: reload_main")
+    supervisor.expect_exit(relaunching=True)
+    reply = ipc.request(logs_dir, "reload")
+    if reply and reply.get("ok"):
+        notify("主程序正在重新加载配置...")
+        procsnap.snapshot.invalidate()
+        return
+    restart_main()
+
+def show_stats(icon=None, item=None):
+    """显示主程序的运行统计"""
+    logging.info("执行函数: show_stats")
+    reply = ipc.request(logs_dir, "stats")
+    if not reply or not reply.get("ok"):
+        notify("主程序未运行或不支持本地控制通道", level="warning")
+        return
+    messages = reply.get("messages", {})
+    dispatcher = reply.get("dispatcher", {})
+    reconnect = reply.get("reconnect", {})
+    logging.info(f"主程序运行统计: {reply}")
+    notify(
+        f"收到消息: {messages.get('total')} 条\n"
+        f"执行命令: {dispatcher.get('executed')} 条，失败 {dispatcher.get('failed')} 条，"
+        f"平均耗时 {dispatcher.get('exec_avg_ms')}ms\n"
+        f"重连: {reconnect.get('count')} 次，p50 {reconnect.get('p50_ms')}ms"
+    )
 
 def restart_main(icon=None, item=None, callback=None):
     """重启主程序（先关闭再启动）"""
@@ -524,16 +608,32 @@ def restart_main(icon=None, item=None, callback=None):
     threading.Thread(target=lambda: _restart_main_worker(callback)).start()
 
 def _restart_main_worker(callback=None):
-    """重启主程序的实际工作函数"""
+    """重启主程序的实际工作函数：等待旧进程真正退出后立即启动，不再固定等待"""
+    global last_restart
     logging.info("执行函数: restart_main")
     notify("正在重启主程序...")
-    # 先关闭主程序
+    started = time.monotonic()
+    supervisor.expect_exit(relaunching=True)
+    # 关闭之前先取得主程序进程，之后等待它的退出事件
+    main_proc = discovery.find(logs_dir, "RC-main", lambda: get_main_proc(MAIN_EXE_NAME))
+    if not isinstance(main_proc, psutil.Process):
+        main_proc = None
     close_main()
-    # 等待一会儿确保进程完全关闭
-    time.sleep(1)
-    # 再启动主程序
-    _admin_start_main_worker()
-    logging.info("主程序重启完成")
+    exited = wait_main_exit(main_proc, RESTART_EXIT_TIMEOUT)
+    if not exited:
+        logging.warning(f"主程序在 {RESTART_EXIT_TIMEOUT} 秒内没有退出，强制结束")
+        kill_main(main_proc)
+        exited = wait_main_exit(main_proc, 5)
+    waited = time.monotonic() - started
+    if exited:
+        # 旧进程已退出，立即启动
+        _admin_start_main_worker()
+        last_restart = (time.monotonic() - started, waited)
+        logging.info(f"主程序重启完成，总耗时 {last_restart[0]:.2f}秒（关闭旧进程 {waited:.2f}秒）")
+        if 'icon' in globals() and icon:
+            icon.update_menu()
+    else:
+        notify("主程序没有退出，无法重启", level="error", show_error=True)
     
     # 如果有回调函数，执行它
     if callback and callable(callback):
@@ -573,11 +673,17 @@ def get_menu_items():
         pystray.MenuItem(f"{mode_info} 版本-{BANBEN}", None),
         # 显示权限状态的纯文本项
         pystray.MenuItem(f"托盘状态: {admin_status}", None),
+        # 上次重启的耗时，重启后刷新
+        pystray.MenuItem(restart_status_text, None),
+        # 看门狗统计的崩溃次数，状态变化时刷新
+        pystray.MenuItem(lambda item: supervisor.status_text(), None),
         # 其他功能菜单项
         pystray.MenuItem("打开配置界面", open_gui),
         pystray.MenuItem("检查主程序管理员权限", check_admin),
         pystray.MenuItem("启动主程序", is_admin_start_main),
         pystray.MenuItem("重启主程序", lambda icon, item: restart_main(icon, item)),        
+        pystray.MenuItem("重新加载配置", reload_main),
+        pystray.MenuItem("主程序运行统计", show_stats),
         pystray.MenuItem("关闭主程序", close_main),
         pystray.MenuItem("退出托盘（使用主程序自带托盘）", lambda icon, item: stop_tray()),
     ]
@@ -591,6 +697,20 @@ def init_main_program():
         logging.info("托盘启动时未发现主程序运行，准备启动...")
         is_admin_start_main()
 
+def on_supervisor_change():
+    """看门狗状态变化时刷新托盘菜单，崩溃过于频繁而暂停自动重启时通知用户"""
+    if supervisor.paused:
+        notify("主程序崩溃过于频繁，已暂停自动重启\n请检查日志后手动启动主程序", level="error", show_error=True)
+    if 'icon' in globals() and icon:
+        icon.update_menu()
+
+# 主程序看门狗：阻塞等待主程序进程退出，意外退出时按退避策略重启
+supervisor = MainSupervisor(
+    find=lambda: discovery.lookup(logs_dir, "RC-main"),
+    launch=_admin_start_main_worker,
+    on_change=on_supervisor_change,
+).start()
+
 # 在单独的线程中处理主程序初始化
 threading.Thread(target=init_main_program, daemon=True).start()
 
@@ -625,4 +745,5 @@ except Exception as e:
     logging.error(traceback.format_exc())
 finally:
     logging.warning("托盘程序正在退出")
+    discovery.withdraw(logs_dir, "RC-tray")
     os._exit(0)
\ No newline at end of file